@@ -0,0 +1,68 @@
+"""Event-driven audio state for the bar.
+
+Instead of asking pactl for the volume every second, one long-lived
+`pactl subscribe` child reports sink/server events. Bursts of events
+(holding a volume key, a sink switch that fires a dozen changes) are
+coalesced into one callback per window.
+"""
+
+import logging
+
+from sysmon_stream import LineStream
+
+logger = logging.getLogger(__name__)
+
+
+class PactlSubscriber(LineStream):
+    """Calls on_change() at most once per `window` seconds after sink events.
+
+    Only sink and server events matter for the default-sink volume; the
+    per-application sink-input events are ignored. A (re)start also
+    fires on_change(), since events may have been missed while the
+    listener was down.
+    """
+
+    EVENTS = (b" on sink #", b" on server")
+
+    def __init__(self, on_change=None, window=0.05, binary="pactl", restart_delay=5):
+        super().__init__(restart_delay)
+        self.on_change = on_change
+        self.window = window
+        self.binary = binary
+        self.events = 0
+        self.notified = 0
+        self._pending = None
+
+    def argv(self):
+        return [self.binary, "subscribe"]
+
+    def parse(self, line):
+        if any(event in line for event in self.EVENTS):
+            return line
+        return None
+
+    def start(self, loop=None):
+        was_running = self.running
+        super().start(loop)
+        if self.running and not was_running:
+            self.changed()
+
+    def stop(self):
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        super().stop()
+
+    def changed(self):
+        self.events += 1
+        if self._pending is None:
+            self._pending = self._loop.call_later(self.window, self._fire)
+
+    def _fire(self):
+        self._pending = None
+        self.notified += 1
+        if self.on_change is not None:
+            try:
+                self.on_change()
+            except Exception:
+                logger.exception("volume change callback failed")
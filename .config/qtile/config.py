@@ -1,12 +1,43 @@
 from libqtile import bar, layout, widget, hook, qtile
 from libqtile.config import Click, Drag, Group, Key, Match, Screen
 from libqtile.lazy import lazy
-import psutil
-import time
+import asyncio
 import subprocess
 import os
-import json
-import re
+import sys
+import time
+
+# Shared with the scripts in ~/.local/src/ui_scripts (notifications.py)
+UI_SCRIPTS = os.path.expanduser("~/.local/src/ui_scripts")
+if UI_SCRIPTS not in sys.path:
+    sys.path.insert(0, UI_SCRIPTS)
+
+from audio import PactlSubscriber
+from control import Control
+from gamemode import GameMode
+from gpu import GpuSource
+from group_index import GroupIndex
+from history import HistoryStore
+from media import MediaController
+from hud import HudClient
+from notifications import Notifier, SessionBus, has_dbus
+from perf import Timings
+from polling import AsyncPollText, run_command
+from sampler import Sampler
+from scheduler import PollScheduler, x_idle_seconds
+from sparkline import Sparkline
+from theme import Theme, load_colors
+
+# ─── Instrumentation ─────────────────────────────────────────────────────────
+
+# Hooks, keybinding functions and widget polls are wrapped with timed() so
+# `qtile cmd-obj -o widget control -f perf_stats` can name whatever is
+# making the desktop sluggish. Set QTILE_PERF_DUMP=/path.json to also get
+# a JSON snapshot every minute.
+if "timings" not in globals():
+    timings = Timings()
+timed = timings.timed
+PERF_DUMP = os.environ.get("QTILE_PERF_DUMP")
 
 # ─── Autostart ───────────────────────────────────────────────────────────────
 
@@ -20,75 +51,177 @@ def autostart():
 
 # ─── Sysmon Helpers ───────────────────────────────────────────────────────────
 
-SYSMON = os.path.expanduser("~/.local/bin/sysmon")
+# CPU/RAM/battery are read in-process (see sampler.py) instead of forking
+# sysmon on every tick. GPU comes from a long-lived source (gpu.py): one
+# `nvidia-smi --loop-ms` child read by the event loop, or sysfs/fdinfo on
+# AMD/Intel, so a slow nvidia-smi never stalls the bar.
+#
+# Every fresh reading also lands in metric_history: fixed-size float32 rings
+# with a float64 timestamp per sample (600 samples each, 36 KB total) that
+# the sparklines draw from and the popups read instead of re-sampling.
+#
+# reload_config re-runs this file and rebuilds every layout and widget, so
+# anything that holds state (open fds, previous CPU/net counters, child
+# processes, ring buffers, timings) is created once and kept in the module
+# globals, which importlib.reload leaves in place. That stops the leaks and
+# blank widgets, not the rebuild: a wallpaper change skips reload_config
+# altogether and recolours the live bar with set_theme (theme.py).
+if "metric_history" not in globals():
+    metric_history = HistoryStore(["cpu", "ram", "gpu", "net_down", "net_up"], capacity=600)
+
+if "sampler" not in globals():
+    sampler = Sampler(history=metric_history)
+
+# Last good text of every poll widget, so a rebuilt bar starts from the
+# previous values instead of blank until its first poll returns
+if "poll_texts" not in globals():
+    poll_texts = {}
+
+# One session bus connection for MPRIS and notifications. Notifications are
+# queued until dunst is up, replaced in place per tag and coalesced, instead
+# of forking notify-send. Kept across reload_config like the rest.
+if "session_bus" not in globals():
+    session_bus = SessionBus() if has_dbus else None
+    notifier = Notifier(session_bus, "qtile")
+
+# All periodic widgets share one coalesced timer (scheduler.py): polls due
+# on the same tick run in a single wakeup, and every interval is stretched
+# while gaming, on battery or when nobody has touched the machine.
+if "poll_scheduler" not in globals():
+    poll_scheduler = PollScheduler(tick=1.0)
+
+# Game mode is switched over IPC (`qtile cmd-obj -o widget control -f
+# gamemode`, which ~/.local/bin/gamemode runs). While on, the system
+# widgets below stop updating, the rest poll 5x slower, the HUD is skipped
+# and wallpaper players are stopped (gamemode.py).
+if "game_mode" not in globals():
+    game_mode = GameMode(poll_scheduler, notifier)
+GAME_PAUSED = ("gamemode",)
+
+
+def on_battery():
+    try:
+        return sampler.battery()[1] == "Discharging"
+    except (OSError, ValueError):
+        return False
+
+
+poll_scheduler.set_mode("gamemode", lambda: game_mode.active, 5)
+poll_scheduler.set_mode("battery", on_battery, 2)
+poll_scheduler.set_mode("idle", lambda: x_idle_seconds(qtile) > 300, 10)
+
+# Keep the running nvidia-smi across reload_config instead of leaking a child
+if "gpu_source" not in globals():
+    gpu_source = GpuSource.detect(interval=2, history=metric_history)
+
+
+def stop_gpu_stream(on):
+    # The paused GPU widget would leave nvidia-smi running; its next poll
+    # after game mode restarts it
+    if on and gpu_source is not None:
+        gpu_source.stop()
+
+
+# Assigned, not appended, so reload_config doesn't stack callbacks
+game_mode.on_change = [stop_gpu_stream]
+
+
+@hook.subscribe.shutdown
+def stop_streams():
+    # Don't leave the wallpaper players stopped
+    game_mode.set(False, notify=False)
+    volume_events.stop()
+    media_controller.close()
+    if session_bus is not None:
+        session_bus.close()
+    if gpu_source is not None:
+        gpu_source.stop()
 
 
+@timed("get_gpu_usage")
 def get_gpu_usage():
-    try:
-        return subprocess.check_output([SYSMON, "gpu"], timeout=2).decode().strip()
-    except Exception:
+    if gpu_source is None:
         return "GPU [Error]"
+    gpu_source.ensure_started(qtile)
+    return gpu_source.text()
 
 
+@timed("get_battery")
 def get_battery():
-    try:
-        return subprocess.check_output([SYSMON, "bat"], timeout=2).decode().strip()
-    except Exception:
-        return "BAT --%"
+    return sampler.battery_text()
 
 
+@timed("get_cpu_usage")
 def get_cpu_usage():
-    try:
-        return subprocess.check_output([SYSMON, "cpu"], timeout=2).decode().strip()
-    except Exception:
-        return "CPU [Error]"
+    return sampler.cpu_text()
 
 
+@timed("get_ram_usage")
 def get_ram_usage():
-    try:
-        return subprocess.check_output([SYSMON, "ram"], timeout=2).decode().strip()
-    except Exception:
-        return "RAM [Error]"
-
-
-last_net_recv = psutil.net_io_counters().bytes_recv
-last_net_sent = psutil.net_io_counters().bytes_sent
-last_net_time = time.time()
+    return sampler.ram_text()
 
 
+@timed("get_net")
 def get_net():
-    global last_net_recv, last_net_sent, last_net_time
-
-    current_time = time.time()
-    current_net = psutil.net_io_counters()
-    interval = current_time - last_net_time
+    return sampler.net_text()
 
-    if interval <= 0:
-        return "↓ 0K ↑ 0K"
 
-    down = (current_net.bytes_recv - last_net_recv) / interval / 1024
-    up = (current_net.bytes_sent - last_net_sent) / interval / 1024
+# Volume is event driven: a single `pactl subscribe` listener refreshes the
+# widget when a sink changes, instead of polling pactl every second.
+if "volume_events" not in globals():
+    volume_events = PactlSubscriber(window=0.05)
 
-    last_net_recv = current_net.bytes_recv
-    last_net_sent = current_net.bytes_sent
-    last_net_time = current_time
 
-    return f"↓ {down:.1f}K ↑ {up:.1f}K"
+# Volume/media keys go through one controller holding a persistent audio
+# connection; presses are coalesced and the notification is updated in place.
+if "media_controller" not in globals():
+    media_controller = MediaController.create(session_bus, notifier)
 
 
-def get_vol():
+@timed("get_vol")
+async def get_vol():
+    volume_events.ensure_started(qtile)
     try:
-        out = subprocess.check_output(
-            ["pactl", "get-sink-volume", "@DEFAULT_SINK@"], timeout=2
-        ).decode()
-        match = re.search(r"(\d+)%", out)
-        return f"VOL {match.group(1)}%" if match else "VOL --%"
-    except Exception:
+        percent, _ = await media_controller.audio.volume()
+    except OSError:
         return "VOL --%"
+    return f"VOL {percent}%"
+
+
+@timed("volume_key")
+def volume_key(qtile, delta):
+    media_controller.change_volume(delta)
+
+
+@timed("mute_key")
+def mute_key(qtile):
+    media_controller.toggle_mute()
+
+
+@timed("media_key")
+def media_key(qtile, member):
+    media_controller.media_command(member)
 
 
+_DETAIL_HISTORY = {"cpu": "cpu", "ram": "ram", "gpu": "gpu", "net": "net_down"}
+
+
+@timed("open_details")
 def open_details(module_type):
-    subprocess.Popen([os.path.expanduser("~/.local/bin/sys_popup"), module_type])
+    # Hand the popup the bar's history so it can plot it instead of
+    # starting from an empty graph
+    env = dict(os.environ)
+    metric = _DETAIL_HISTORY.get(module_type)
+    if metric is not None:
+        try:
+            values, times = metric_history.export(metric)
+            env["QTILE_HISTORY_FILE"] = values
+            # Per-sample timestamps: series are sampled at different and
+            # changing rates, so there is no one interval to pass
+            env["QTILE_HISTORY_TIMES"] = times
+        except OSError:
+            pass
+    subprocess.Popen([os.path.expanduser("~/.local/bin/sys_popup"), module_type], env=env)
 
 
 # ─── Core Config ─────────────────────────────────────────────────────────────
@@ -99,47 +232,118 @@ mod = "mod4"
 
 # ─── Workspace History & Switcher ─────────────────────────────────────────────
 
-_group_history = []
+# Window counts per group and MRU order are kept incrementally by the hooks
+# below (group_index.py) instead of being recomputed from every window. The
+# index survives reload_config and is saved across restarts.
+if "group_index" not in globals():
+    group_index = GroupIndex()
+    group_index.load()
+    # qtile is still None on the first load; this only matters when the index
+    # first appears through a reload_config with windows already open
+    if qtile is not None:
+        group_index.rebuild(qtile.windows_map.values())
+
+
+@hook.subscribe.client_managed
+def index_window_managed(window):
+    group_index.window_added(window.wid, window.group.name if window.group else None)
+
+
+@hook.subscribe.group_window_add
+def index_window_moved(group, window):
+    group_index.window_added(window.wid, group.name)
+
+
+@hook.subscribe.client_killed
+def index_window_killed(window):
+    group_index.window_removed(window.wid)
+
+
+@hook.subscribe.shutdown
+def save_group_index():
+    try:
+        group_index.save()
+    except OSError:
+        pass
+
+
+# Adding or removing a workspace is rare, so it's saved straight away rather
+# than on the next throttled setgroup save
+@hook.subscribe.addgroup
+def index_group_added(group_name):
+    if group_name not in group_names:
+        save_group_index()
 
+
+@hook.subscribe.delgroup
+def index_group_deleted(group_name):
+    group_index.group_removed(group_name)
+    save_group_index()
+
+
+@timed("go_to_last_group")
 def go_to_last_group(qtile):
-    global _group_history
-    if len(_group_history) < 2:
-        return
-    # [0] is current, [1] is the one we were just on
-    last_group_name = _group_history[1]
+    last_group_name = group_index.previous()
     if last_group_name in qtile.groups_map:
         qtile.groups_map[last_group_name].toscreen()
 
+# Rofi runs as an asyncio child of Qtile and the choice is applied with
+# direct calls, instead of a bash script that pipes rofi through sed/xargs
+# and then starts `qtile cmd-obj` (a whole interpreter plus an IPC round
+# trip) to act on it.
+ROFI_THEME = os.path.expanduser("~/.cache/wal/colors-rofi-dark.rasi")
+
+_background_tasks = set()
+
+
+def _spawn(coro):
+    # Keep a reference so the task isn't garbage collected mid-flight
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def rofi(prompt, lines=(), *options):
+    """Run rofi -dmenu; returns its stdout stripped, or None if dismissed."""
+    argv = ["rofi", "-dmenu", "-p", prompt, "-theme", ROFI_THEME, *options]
+    try:
+        out = await run_command(argv, input="\n".join(lines))
+    except OSError:
+        # Escape exits 1; a missing rofi lands here too
+        return None
+    return out.strip() or None
+
+
+@timed("workspace_switcher")
 def workspace_switcher(qtile):
-    # 1. Prepare the list of workspaces
+    names = []
     lines = []
     for g in qtile.groups:
-        if g.name in "123456789" or len(g.windows) > 0:
+        count = group_index.count(g.name)
+        if g.name in "123456789" or count > 0:
             prefix = "➜ " if g == qtile.current_group else "  "
-            suffix = " ●" if len(g.windows) > 0 else ""
+            suffix = " ●" if count > 0 else ""
+            names.append(g.name)
             lines.append(f"{prefix}{g.name}{suffix}")
-    
-    input_str = "\n".join(lines)
-    
-    # 2. Build a detached bash command
-    # Note: We use double braces {{ }} so python f-strings don't get confused by CSS syntax
-    bash_script = f"""
-    target=$(cat << 'EOF' | rofi -dmenu -p "Switch to" -theme ~/.cache/wal/colors-rofi-dark.rasi -theme-str 'window {{width: 15%;}} listview {{lines: 10;}}' -hover-select -me-select-entry '' -me-accept-entry MousePrimary
-{input_str}
-EOF
+    _spawn(_switch_to_choice(qtile, names, lines))
+
+
+async def _switch_to_choice(qtile, names, lines):
+    choice = await rofi(
+        "Switch to",
+        lines,
+        "-format", "i",
+        "-theme-str", "window {width: 15%;} listview {lines: 10;}",
+        "-hover-select",
+        "-me-select-entry", "",
+        "-me-accept-entry", "MousePrimary",
     )
-    
-    # Clean the markers to get the raw group name
-    target=$(echo "$target" | sed 's/➜ //g' | sed 's/ ●//g' | xargs)
-    
-    # Send the command back to Qtile asynchronously
-    if [ -n "$target" ]; then
-        qtile cmd-obj -o group "$target" -f toscreen
-    fi
-    """
-    
-    # 3. Fire and forget! (Qtile doesn't freeze)
-    subprocess.Popen(["bash", "-c", bash_script])
+    # -format i prints the selected row; typed text that matches nothing is -1
+    if choice is None or not choice.lstrip("-").isdigit():
+        return
+    index = int(choice)
+    if 0 <= index < len(names) and names[index] in qtile.groups_map:
+        qtile.groups_map[names[index]].toscreen()
 
 # 
 
@@ -164,56 +368,13 @@ keys = [
     Key([mod, "control", "shift"], "F2", 
         lazy.spawn("layout-switcher"), 
         desc="Cycle keyboard layouts"),
-    # Volume
-    Key(
-        [],
-        "XF86AudioRaiseVolume",
-        lazy.spawn(
-            "bash -c 'pactl set-sink-volume @DEFAULT_SINK@ +5% && "
-            'notify-send -t 1000 -h string:x-dunst-stack-tag:vol "Volume" "Increased"\''
-        ),
-    ),
-    Key(
-        [],
-        "XF86AudioLowerVolume",
-        lazy.spawn(
-            "bash -c 'pactl set-sink-volume @DEFAULT_SINK@ -5% && "
-            'notify-send -t 1000 -h string:x-dunst-stack-tag:vol "Volume" "Decreased"\''
-        ),
-    ),
-    Key(
-        [],
-        "XF86AudioMute",
-        lazy.spawn(
-            "bash -c 'pactl set-sink-mute @DEFAULT_SINK@ toggle && "
-            'notify-send -t 1000 -h string:x-dunst-stack-tag:vol "Volume" "Toggled Mute"\''
-        ),
-    ),
-    # Media
-    Key(
-        [],
-        "XF86AudioPlay",
-        lazy.spawn(
-            "bash -c 'playerctl play-pause && sleep 0.1 && "
-            'notify-send -t 2000 -h string:x-dunst-stack-tag:media "Play/Pause" "$(playerctl metadata title)"\''
-        ),
-    ),
-    Key(
-        [],
-        "XF86AudioNext",
-        lazy.spawn(
-            "bash -c 'playerctl next && sleep 0.1 && "
-            'notify-send -t 2000 -h string:x-dunst-stack-tag:media "Next Track" "$(playerctl metadata title)"\''
-        ),
-    ),
-    Key(
-        [],
-        "XF86AudioPrev",
-        lazy.spawn(
-            "bash -c 'playerctl previous && sleep 0.1 && "
-            'notify-send -t 2000 -h string:x-dunst-stack-tag:media "Previous Track" "$(playerctl metadata title)"\''
-        ),
-    ),
+    # Volume / Media: handled in-process by media_controller (media.py)
+    Key([], "XF86AudioRaiseVolume", lazy.function(volume_key, 5)),
+    Key([], "XF86AudioLowerVolume", lazy.function(volume_key, -5)),
+    Key([], "XF86AudioMute", lazy.function(mute_key)),
+    Key([], "XF86AudioPlay", lazy.function(media_key, "PlayPause")),
+    Key([], "XF86AudioNext", lazy.function(media_key, "Next")),
+    Key([], "XF86AudioPrev", lazy.function(media_key, "Previous")),
     # Window / Session
     Key(["mod1"], "F4", lazy.window.kill()),
     Key([mod, "control"], "r", lazy.reload_config()),
@@ -246,46 +407,31 @@ keys = [
 group_names = list("123456789")
 
 
+@timed("add_group")
 def add_group(qtile):
-    bash_script = """
-    # Ask Rofi for the name
-    group_name=$(rofi -dmenu -p "New Workspace Name:" -theme ~/.cache/wal/colors-rofi-dark.rasi -theme-str 'window {width: 20%;}')
-    group_name=$(echo "$group_name" | xargs)
-    
-    # Exit if you press escape or leave it blank
-    [ -z "$group_name" ] && exit 0
-    
-    # Check if the group already exists by querying Qtile
-    exists=$(qtile cmd-obj -o root -f items -a group | grep -c "'$group_name'")
-    
-    if [ "$exists" -gt 0 ]; then
-        notify-send "Workspace Exists" "\\"$group_name\\" already exists."
-    else
-        # Add the group and switch to it using Qtile IPC
-        qtile cmd-obj -o root -f addgroup -a "$group_name"
-        qtile cmd-obj -o group "$group_name" -f toscreen
-    fi
-    """
-    
-    # Fire and forget!
-    subprocess.Popen(["bash", "-c", bash_script])
+    _spawn(_add_named_group(qtile))
 
 
+async def _add_named_group(qtile):
+    name = await rofi("New Workspace Name:", (), "-theme-str", "window {width: 20%;}")
+    if name is None:
+        return
+    # Checked and created on the loop in one go, so nothing can sneak in between
+    if name in qtile.groups_map:
+        notifier.notify("Workspace Exists", f'"{name}" already exists.', "workspace")
+        return
+    qtile.add_group(name)
+    qtile.groups_map[name].toscreen()
+
+
+@timed("delete_group")
 def delete_group(qtile):
     group = qtile.current_group
     if group.name in group_names:
-        subprocess.Popen(
-            [
-                "notify-send",
-                "Cannot Delete",
-                "Default workspaces 1-9 cannot be deleted.",
-            ]
-        )
+        notifier.notify("Cannot Delete", "Default workspaces 1-9 cannot be deleted.", "workspace")
         return
-    if len(group.windows) > 0:
-        subprocess.Popen(
-            ["notify-send", "Workspace Busy", "Close all windows before deleting."]
-        )
+    if group_index.count(group.name) > 0:
+        notifier.notify("Workspace Busy", "Close all windows before deleting.", "workspace")
         return
     qtile.groups_map["1"].toscreen()
     qtile.del_group(group.name)
@@ -301,15 +447,12 @@ for i in group_names:
 
 
 @hook.subscribe.startup_complete
+@timed("restore_groups")
 def restore_groups():
-    for window in qtile.windows_map.values():
-        if (
-            hasattr(window, "group")
-            and window.group
-            and window.group.name not in group_names
-            and window.group.name not in qtile.groups_map
-        ):
-            qtile.add_group(window.group.name)
+    # Dynamic groups that a still-managed window was on at the last save
+    for name in group_index.restorable(qtile.windows_map):
+        if name not in group_names and name not in qtile.groups_map:
+            qtile.add_group(name)
 
 
 keys.extend(
@@ -333,21 +476,13 @@ keys.extend(
 
 # ─── Theme & Layouts ──────────────────────────────────────────────────────────
 
+# Every coloured attribute below is bound to a role in `theme`, so
+# theme_sync can recolour the running bar with
+# `qtile cmd-obj -o widget control -f set_theme -a '<colors json>'`
+# instead of a full reload_config (see theme.py).
 theme_file = os.path.expanduser("~/.config/qtile_theme.json")
-try:
-    with open(theme_file, "r") as f:
-        colors = json.load(f)
-except FileNotFoundError:
-    colors = {
-        "bg": "#1e1e2e",
-        "fg": "#cdd6f4",
-        "surface": "#313244",
-        "blue": "#89b4fa",
-        "mauve": "#cba6f7",
-        "red": "#f38ba8",
-        "green": "#a6e3a1",
-        "yellow": "#f9e2af",
-    }
+theme = Theme(load_colors(theme_file))
+colors = theme.colors
 
 layout_theme = {
     "border_width": 0,
@@ -355,7 +490,11 @@ layout_theme = {
     "border_focus": colors["blue"],
     "border_normal": colors["surface"],
 }
-layouts = [layout.Columns(**layout_theme), layout.Max(**layout_theme)]
+layouts = theme.bind_layouts(
+    [layout.Columns(**layout_theme), layout.Max(**layout_theme)],
+    border_focus="blue",
+    border_normal="surface",
+)
 
 floating_layout = layout.Floating(
     float_rules=[
@@ -378,85 +517,171 @@ widget_defaults = {
 }
 extension_defaults = widget_defaults.copy()
 
+
+def sep():
+    return theme.build(widget.Sep, {"foreground": "surface"}, padding=10)
+
+
+volume_widget = theme.build(
+    AsyncPollText,
+    {"foreground": "blue", "stale_foreground": "surface"},
+    func=get_vol,
+    scheduler=poll_scheduler,
+    cache=poll_texts,
+    # Safety net only; sink events from volume_events drive real updates
+    update_interval=60,
+    deadline=1,
+    mouse_callbacks={
+        "Button1": lambda: subprocess.Popen(
+            ["python3", os.path.expanduser("~/.local/bin/audio_menu")]
+        )
+    },
+)
+volume_events.on_change = volume_widget.force_update
+media_controller.on_volume = volume_widget.force_update
+
 screens = [
     Screen(
-        top=bar.Bar(
-            [
-                widget.GroupBox(
-                    active=colors["fg"],
-                    inactive=colors["surface"],
-                    highlight_method="block",
-                    this_current_screen_border=colors["blue"],
-                    urgent_border=colors["red"],
-                    padding=6,
-                    hide_unused=False,
-                ),
-                widget.Prompt(),
-                widget.WindowName(foreground=colors["mauve"]),
-                widget.Spacer(),
-                widget.GenPollText(
-                    func=get_cpu_usage,
-                    update_interval=1,
-                    mouse_callbacks={"Button1": lambda: open_details("cpu")},
-                    foreground=colors["mauve"],
-                ),
-                widget.Sep(padding=10, foreground=colors["surface"]),
-                widget.GenPollText(
-                    func=get_ram_usage,
-                    update_interval=1,
-                    mouse_callbacks={"Button1": lambda: open_details("ram")},
-                    foreground=colors["blue"],
-                ),
-                widget.Sep(padding=10, foreground=colors["surface"]),
-                widget.GenPollText(
-                    func=get_gpu_usage,
-                    update_interval=2,
-                    mouse_callbacks={"Button1": lambda: open_details("gpu")},
-                    foreground=colors["yellow"],
-                ),
-                widget.Sep(padding=10, foreground=colors["surface"]),
-                widget.GenPollText(
-                    func=get_net,
-                    update_interval=1,
-                    mouse_callbacks={"Button1": lambda: open_details("net")},
-                    foreground=colors["green"],
-                ),
-                widget.Sep(padding=10, foreground=colors["surface"]),
-                widget.GenPollText(
-                    func=get_vol,
-                    update_interval=1,
-                    foreground=colors["blue"],
-                    mouse_callbacks={
-                        "Button1": lambda: subprocess.Popen(
-                            ["python3", os.path.expanduser("~/.local/bin/audio_menu")]
-                        )
-                    },
-                ),
-                widget.Sep(padding=10, foreground=colors["surface"]),
-                widget.Clock(format="%a %d %b  %H:%M", foreground=colors["blue"]),
-                widget.Sep(padding=10, foreground=colors["surface"]),
-                widget.GenPollText(
-                    func=get_battery, update_interval=10, foreground=colors["green"]
-                ),
-                widget.Sep(padding=10, foreground=colors["surface"]),
-                widget.Systray(),
-                widget.Sep(padding=10, foreground=colors["surface"]),
-                widget.TextBox(
-                    text="⏻",
-                    font="JetBrains Mono",
-                    fontsize=18,
-                    foreground=colors["red"],
-                    padding=10,
-                    mouse_callbacks={
-                        "Button1": lambda: subprocess.Popen(
-                            [os.path.expanduser("~/.local/bin/power_menu")]
-                        )
-                    },
-                ),
-            ],
-            28,
-            background=colors["bg"],
-            margin=[4, 8, 4, 8],
+        top=theme.bind_bar(
+            bar.Bar(
+                [
+                    theme.build(
+                        widget.GroupBox,
+                        {
+                            "active": "fg",
+                            "inactive": "surface",
+                            "this_current_screen_border": "blue",
+                            "urgent_border": "red",
+                        },
+                        highlight_method="block",
+                        padding=6,
+                        hide_unused=False,
+                    ),
+                    theme.build(widget.Prompt, {"foreground": "fg"}),
+                    theme.build(widget.WindowName, {"foreground": "mauve"}),
+                    widget.Spacer(),
+                    theme.build(
+                        AsyncPollText,
+                        {"foreground": "mauve"},
+                        func=get_cpu_usage,
+                        scheduler=poll_scheduler,
+                        pause_modes=GAME_PAUSED,
+                        cache=poll_texts,
+                        inline=True,
+                        update_interval=1,
+                        mouse_callbacks={"Button1": lambda: open_details("cpu")},
+                    ),
+                    theme.build(
+                        Sparkline,
+                        {"graph_color": "mauve"},
+                        ring=metric_history["cpu"],
+                        scheduler=poll_scheduler,
+                        pause_modes=GAME_PAUSED,
+                    ),
+                    sep(),
+                    theme.build(
+                        AsyncPollText,
+                        {"foreground": "blue"},
+                        func=get_ram_usage,
+                        scheduler=poll_scheduler,
+                        pause_modes=GAME_PAUSED,
+                        cache=poll_texts,
+                        inline=True,
+                        update_interval=1,
+                        mouse_callbacks={"Button1": lambda: open_details("ram")},
+                    ),
+                    theme.build(
+                        Sparkline,
+                        {"graph_color": "blue"},
+                        ring=metric_history["ram"],
+                        scheduler=poll_scheduler,
+                        pause_modes=GAME_PAUSED,
+                    ),
+                    sep(),
+                    theme.build(
+                        AsyncPollText,
+                        {"foreground": "yellow"},
+                        func=get_gpu_usage,
+                        scheduler=poll_scheduler,
+                        pause_modes=GAME_PAUSED,
+                        cache=poll_texts,
+                        # The fdinfo backend walks /proc; keep it off the loop
+                        inline=gpu_source is None or gpu_source.inline,
+                        update_interval=2,
+                        mouse_callbacks={"Button1": lambda: open_details("gpu")},
+                    ),
+                    theme.build(
+                        Sparkline,
+                        {"graph_color": "yellow"},
+                        ring=metric_history["gpu"],
+                        scheduler=poll_scheduler,
+                        pause_modes=GAME_PAUSED,
+                    ),
+                    sep(),
+                    theme.build(
+                        AsyncPollText,
+                        {"foreground": "green"},
+                        func=get_net,
+                        scheduler=poll_scheduler,
+                        pause_modes=GAME_PAUSED,
+                        cache=poll_texts,
+                        inline=True,
+                        update_interval=1,
+                        mouse_callbacks={"Button1": lambda: open_details("net")},
+                    ),
+                    theme.build(
+                        Sparkline,
+                        {"graph_color": "green"},
+                        ring=metric_history["net_down"],
+                        scheduler=poll_scheduler,
+                        pause_modes=GAME_PAUSED,
+                        maximum=None,
+                    ),
+                    sep(),
+                    volume_widget,
+                    sep(),
+                    theme.build(
+                        widget.Clock, {"foreground": "blue"}, format="%a %d %b  %H:%M"
+                    ),
+                    sep(),
+                    theme.build(
+                        AsyncPollText,
+                        {"foreground": "green"},
+                        func=get_battery,
+                        scheduler=poll_scheduler,
+                        cache=poll_texts,
+                        inline=True,
+                        update_interval=10,
+                    ),
+                    sep(),
+                    widget.Systray(),
+                    sep(),
+                    Control(
+                        timings=timings,
+                        scheduler=poll_scheduler,
+                        theme=theme,
+                        game_mode=game_mode,
+                        dump_path=PERF_DUMP,
+                        dump_interval=60,
+                    ),
+                    theme.build(
+                        widget.TextBox,
+                        {"foreground": "red"},
+                        text="⏻",
+                        font="JetBrains Mono",
+                        fontsize=18,
+                        padding=10,
+                        mouse_callbacks={
+                            "Button1": lambda: subprocess.Popen(
+                                [os.path.expanduser("~/.local/bin/power_menu")]
+                            )
+                        },
+                    ),
+                ],
+                28,
+                background=colors["bg"],
+                margin=[4, 8, 4, 8],
+            ),
         ),
     ),
 ]
@@ -486,22 +711,21 @@ reconfigure_screens = True
 auto_minimize = False
 wmname = "LG3D"
 
+# The HUD is a long-lived server (ws_hud_server) rather than a process per
+# switch; the client's socket is kept across reload_config
+if "hud" not in globals():
+    hud = HudClient([os.path.expanduser("~/.local/bin/ws_hud_server")])
+
+
 @hook.subscribe.setgroup
+@timed("group_changed")
 def group_changed():
-    global _group_history
     current_group = qtile.current_group.name
-    
-    # MRU Stack Logic for History
-    if not _group_history or _group_history[0] != current_group:
-        if current_group in _group_history:
-            _group_history.remove(current_group)
-        _group_history.insert(0, current_group)
-        
-        # Cap history at 20 entries
-        if len(_group_history) > 20:
-            _group_history.pop()
-
-    # Launch HUD (Only one call needed)
-    hud_path = os.path.expanduser("~/.local/bin/ws_hud")
-    if os.path.exists(hud_path):
-        subprocess.Popen([hud_path, current_group])
+    group_index.touch(current_group)
+    group_index.maybe_save(time.monotonic())
+
+    if game_mode.active:
+        game_mode.huds_skipped += 1
+        return
+    # One datagram to the HUD server; it debounces fast switching itself
+    hud.show(current_group)
@@ -0,0 +1,116 @@
+"""Zero-width widget that exposes config-level commands over Qtile IPC.
+
+Qtile has no way to add commands to the root object from a config, but
+every widget is a command object. Putting one invisible Control widget in
+the bar makes these reachable as, e.g.:
+
+    qtile cmd-obj -o widget control -f perf_stats
+    qtile cmd-obj -o widget control -f set_theme -a '{"bg": "#101010"}'
+    qtile cmd-obj -o widget control -f gamemode -a on
+"""
+
+import json
+import time
+
+from libqtile.command.base import expose_command
+from libqtile.widget import base
+
+from polling import AsyncPollText
+
+
+class Control(base._Widget):
+    defaults = [
+        ("timings", None, "perf.Timings to report"),
+        ("scheduler", None, "scheduler.PollScheduler to report"),
+        ("dump_path", None, "Where perf_dump() writes when no path is given"),
+        ("dump_interval", None, "Seconds between automatic dumps to dump_path"),
+        ("theme", None, "theme.Theme that set_theme() recolours"),
+        ("game_mode", None, "gamemode.GameMode that gamemode() switches"),
+    ]
+
+    def __init__(self, **config):
+        base._Widget.__init__(self, 0, **config)
+        self.add_defaults(Control.defaults)
+        self._entry = None
+
+    def timer_setup(self):
+        if self.dump_interval and self.dump_path and self.scheduler is not None:
+            self._entry = self.scheduler.register(self.perf_dump, self.dump_interval)
+
+    def finalize(self):
+        if self._entry is not None:
+            self.scheduler.unregister(self._entry)
+            self._entry = None
+        base._Widget.finalize(self)
+
+    def draw(self):
+        pass
+
+    def _perf(self):
+        data = self.timings.summary() if self.timings is not None else {}
+        if self.scheduler is not None:
+            data["scheduler"] = self.scheduler.stats()
+        data["polls_in_flight"] = AsyncPollText.total_in_flight
+        if self.game_mode is not None:
+            data["gamemode"] = self.game_mode.report()
+        return data
+
+    @expose_command()
+    def perf_stats(self):
+        """Counts and p50/p95/p99 latencies for every timed callback."""
+        return self._perf()
+
+    @expose_command()
+    def perf_reset(self):
+        if self.timings is not None:
+            self.timings.reset()
+
+    @expose_command()
+    def perf_dump(self, path=None):
+        """Write perf_stats() as JSON and return the path written."""
+        path = path or self.dump_path
+        if path is None or self.timings is None:
+            return None
+        extra = self._perf()
+        extra.pop("callbacks", None)
+        extra.pop("since", None)
+        return self.timings.dump(path, extra)
+
+    @expose_command()
+    def set_theme(self, colors):
+        """Recolour the bar, GroupBox and layout borders in place.
+
+        `colors` uses the qtile_theme.json schema, as a dict or a JSON
+        string (what `qtile cmd-obj -a` passes). Roles left out keep their
+        current colour. Returns {"status": "ok", "changed": [roles]}, or
+        {"status": "error", "error": reason} if nothing was recoloured, so
+        callers can tell when they still need reload_config.
+        """
+        if self.theme is None:
+            return {"status": "error", "error": "no theme bound"}
+        try:
+            if isinstance(colors, str):
+                colors = json.loads(colors)
+            start = time.perf_counter_ns()
+            changed = self.theme.apply(colors, self.qtile)
+        except (ValueError, TypeError, AttributeError) as e:
+            return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        if self.timings is not None:
+            self.timings.record("set_theme", time.perf_counter_ns() - start)
+        return {"status": "ok", "changed": changed}
+
+    @expose_command()
+    def gamemode(self, state="toggle"):
+        """Switch game mode: "on", "off", "toggle" or "status".
+
+        Returns what it paused and an estimate of the CPU time saved.
+        """
+        if self.game_mode is None:
+            return None
+        if state == "status":
+            return self.game_mode.report()
+        if state == "toggle":
+            return self.game_mode.toggle()
+        if state not in ("on", "off"):
+            raise ValueError(f"unknown game mode state {state!r}")
+        return self.game_mode.set(state == "on")
@@ -0,0 +1,219 @@
+"""Game mode: one switch for everything that competes with a game for CPU.
+
+~/.local/bin/gamemode used to only touch /tmp/qtile_gamemode, which the
+scheduler noticed up to five seconds later, while the HUD and animated
+wallpapers carried on. GameMode is toggled over IPC (the Control widget's
+gamemode command) and, while it's on:
+
+  * the scheduler's "gamemode" mode is active right away: widgets
+    registered with pause_modes=("gamemode",) aren't updated at all and
+    the rest poll less often
+  * the config skips the workspace HUD (see `huds_skipped`)
+  * animated wallpaper players (xwinwrap and everything under it) get
+    SIGSTOP, and SIGCONT when it's turned off
+  * `on_change` callbacks run, e.g. to stop the GPU stream
+
+report() estimates the CPU time this saved. A stopped player is charged
+its lifetime average rate (they run flat out the whole time), and the
+Qtile process (plus reaped children) its rate since game mode was last
+off minus its rate while on.
+
+The state file is still written, for scripts outside Qtile (a wallpaper
+changer starting a new player mid-game can check it), but nothing here
+polls it.
+"""
+
+import logging
+import os
+import resource
+import signal
+import time
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "/tmp/qtile_gamemode"
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def _stat(pid):
+    """(comm, ppid, cpu_ticks, start_ticks) from /proc/<pid>/stat."""
+    with open(f"/proc/{pid}/stat") as f:
+        data = f.read()
+    # comm may contain spaces and parentheses; it ends at the last ')'
+    comm = data[data.index("(") + 1 : data.rindex(")")]
+    fields = data[data.rindex(")") + 2 :].split()
+    return comm, int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[19])
+
+
+def _uptime_ticks():
+    with open("/proc/uptime") as f:
+        return float(f.read().split()[0]) * CLK_TCK
+
+
+def _self_cpu():
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def find_players(names):
+    """Pids of processes called one of `names`, and all their descendants."""
+    children = {}
+    roots = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            comm, ppid, _, _ = _stat(entry)
+        except (OSError, ValueError, IndexError):
+            continue
+        pid = int(entry)
+        children.setdefault(ppid, []).append(pid)
+        if comm in names:
+            roots.append(pid)
+    found = []
+    stack = list(roots)
+    while stack:
+        pid = stack.pop()
+        if pid in found:
+            continue
+        found.append(pid)
+        stack.extend(children.get(pid, ()))
+    return found
+
+
+class GameMode:
+    def __init__(
+        self,
+        scheduler=None,
+        notifier=None,
+        players=("xwinwrap", "mpvpaper"),
+        state_file=STATE_FILE,
+    ):
+        self.scheduler = scheduler
+        self.notifier = notifier
+        self.players = players
+        self.state_file = state_file
+        # Called with the new state after every change
+        self.on_change = []
+
+        self.active = False
+        self.huds_skipped = 0
+        self.reclaimed_s = 0.0  # Sessions that have ended
+        self._since = None
+        self._paused = {}  # pid -> CPU seconds per second before it was stopped
+        self._skipped_at_start = 0
+        self._normal_at = (time.monotonic(), _self_cpu())
+        self._self_rate = 0.0
+        self._self_cpu_at_start = 0.0
+
+    # ─── Switching ────────────────────────────────────────────────────────────
+
+    def set(self, on, notify=True):
+        """Turn game mode on or off; returns report()."""
+        if on == self.active:
+            return self.report()
+        now = time.monotonic()
+        if on:
+            started, cpu = self._normal_at
+            self._self_cpu_at_start = _self_cpu()
+            self._self_rate = (self._self_cpu_at_start - cpu) / max(now - started, 1e-9)
+            self._since = now
+            self._skipped_at_start = self.scheduler.skipped if self.scheduler else 0
+            self._pause_players()
+        else:
+            self._resume_players()
+        self.active = on
+        self._write_state()
+        if self.scheduler is not None:
+            self.scheduler.refresh_modes()
+        for callback in self.on_change:
+            try:
+                callback(on)
+            except Exception:
+                logger.exception("game mode callback failed")
+
+        report = self.report()
+        if not on:
+            self.reclaimed_s += report["session"]["reclaimed_s"]
+            report["reclaimed_total_s"] = self.reclaimed_s
+            self._since = None
+            self._paused.clear()
+            self._normal_at = (now, _self_cpu())
+        if notify:
+            self._notify(on, report)
+        return report
+
+    def toggle(self):
+        return self.set(not self.active)
+
+    def _write_state(self):
+        try:
+            if self.active:
+                with open(self.state_file, "w") as f:
+                    f.write("ON")
+            else:
+                os.remove(self.state_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("game mode state file: %s", e)
+
+    def _notify(self, on, report):
+        if self.notifier is None:
+            return
+        if on:
+            players = len(self._paused)
+            body = "ON - HUD and bar polls paused"
+            if players:
+                body += f", {players} wallpaper process{'es' if players > 1 else ''} stopped"
+        else:
+            body = f"OFF - saved {report['session']['reclaimed_s']:.1f}s of CPU"
+        self.notifier.notify("Game Mode", body, "gamemode", 3000)
+
+    # ─── Wallpaper players ────────────────────────────────────────────────────
+
+    def _pause_players(self):
+        uptime = _uptime_ticks()
+        for pid in find_players(self.players):
+            try:
+                _, _, cpu, start = _stat(pid)
+                os.kill(pid, signal.SIGSTOP)
+            except (OSError, ValueError, IndexError):
+                continue
+            self._paused[pid] = cpu / max(uptime - start, 1)
+
+    def _resume_players(self):
+        for pid in self._paused:
+            try:
+                os.kill(pid, signal.SIGCONT)
+            except ProcessLookupError:
+                pass
+
+    # ─── Report ───────────────────────────────────────────────────────────────
+
+    def report(self):
+        data = {
+            "active": self.active,
+            "huds_skipped": self.huds_skipped,
+            "reclaimed_total_s": self.reclaimed_s,
+        }
+        if self._since is None:
+            return data
+        elapsed = time.monotonic() - self._since
+        wallpaper = sum(self._paused.values()) * elapsed
+        self_rate = (_self_cpu() - self._self_cpu_at_start) / max(elapsed, 1e-9)
+        qtile = max(0.0, self._self_rate - self_rate) * elapsed
+        skipped = self.scheduler.skipped - self._skipped_at_start if self.scheduler else 0
+        data["session"] = {
+            "seconds": elapsed,
+            "wallpaper_pids": sorted(self._paused),
+            "wallpaper_cpu_s": wallpaper,
+            "qtile_cpu_s": qtile,
+            "qtile_cpu_percent": {"before": self._self_rate * 100, "during": self_rate * 100},
+            "polls_skipped": skipped,
+            "reclaimed_s": wallpaper + qtile,
+        }
+        return data
@@ -0,0 +1,300 @@
+"""Long-lived GPU telemetry for the bar.
+
+get_gpu used to popen `nvidia-smi --query-gpu=...` every 2 s. GpuSource
+instead wraps one of three backends that stay alive between ticks:
+
+  * NvidiaSmiBackend  one `nvidia-smi --loop-ms` child, parsed line by line
+  * SysfsBackend      amdgpu's gpu_busy_percent / mem_info_* read via pread
+  * DrmFdinfoBackend  i915 (and other drivers exposing drm-engine-* in
+                      fdinfo), utilisation from engine busy-time deltas
+
+Each backend takes its binary / sysfs / proc root as a parameter so it can
+be pointed at a fake tree (see projects/bench/gpu_harness.py).
+"""
+
+import glob
+import os
+import shutil
+import time
+from collections import namedtuple
+
+from sampler import render_bar
+from sysmon_stream import LineStream
+
+# util in %, memory in MiB, temp in °C; any field may be None if unknown
+GpuSample = namedtuple("GpuSample", "util mem_used mem_total temp")
+
+
+def _number(text):
+    text = text.strip()
+    if not text or text.startswith("["):  # nvidia-smi's "[N/A]"
+        return None
+    return int(float(text))
+
+
+# ─── NVIDIA ───────────────────────────────────────────────────────────────────
+
+
+class NvidiaSmiBackend(LineStream):
+    name = "nvidia"
+    inline = True
+    QUERY = "utilization.gpu,memory.used,memory.total,temperature.gpu"
+
+    def __init__(self, binary="nvidia-smi", interval=2, index=0, restart_delay=10):
+        super().__init__(restart_delay)
+        self.binary = binary
+        self.interval = interval
+        self.index = index
+
+    @classmethod
+    def find(cls, binary="nvidia-smi", **kwargs):
+        path = shutil.which(binary)
+        return cls(path, **kwargs) if path else None
+
+    def argv(self):
+        return [
+            self.binary,
+            f"--query-gpu={self.QUERY}",
+            "--format=csv,noheader,nounits",
+            f"--loop-ms={int(self.interval * 1000)}",
+            f"--id={self.index}",
+        ]
+
+    def parse(self, line):
+        fields = line.decode(errors="replace").split(",")
+        if len(fields) != 4:
+            raise ValueError(f"unexpected nvidia-smi line: {line!r}")
+        return GpuSample(*(_number(f) for f in fields))
+
+    def read(self):
+        # A sample older than a few intervals means the child is wedged
+        if self.latest is None or self.age() > self.interval * 3:
+            return None
+        return self.latest
+
+
+# ─── AMD (sysfs) ──────────────────────────────────────────────────────────────
+
+
+class SysfsBackend:
+    name = "sysfs"
+    inline = True
+
+    def __init__(self, device_dir):
+        self.device_dir = device_dir
+        self._fds = {}
+        temps = sorted(glob.glob(os.path.join(device_dir, "hwmon/hwmon*/temp1_input")))
+        self._temp_path = temps[0] if temps else None
+
+    @classmethod
+    def find(cls, sysfs_root="/sys"):
+        pattern = os.path.join(sysfs_root, "class/drm/card[0-9]*/device/gpu_busy_percent")
+        matches = sorted(glob.glob(pattern))
+        return cls(os.path.dirname(matches[0])) if matches else None
+
+    def _read_int(self, path):
+        fd = self._fds.get(path)
+        if fd is None:
+            fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+            self._fds[path] = fd
+        return int(os.pread(fd, 64, 0))
+
+    def _optional(self, path, scale):
+        if path is None:
+            return None
+        try:
+            return self._read_int(path) // scale
+        except (OSError, ValueError):
+            return None
+
+    def start(self, loop=None):
+        pass
+
+    def ensure_started(self, qtile):
+        pass
+
+    def stop(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+    def read(self):
+        try:
+            util = self._read_int(os.path.join(self.device_dir, "gpu_busy_percent"))
+        except (OSError, ValueError):
+            return None
+        mib = 1024 * 1024
+        return GpuSample(
+            util,
+            self._optional(os.path.join(self.device_dir, "mem_info_vram_used"), mib),
+            self._optional(os.path.join(self.device_dir, "mem_info_vram_total"), mib),
+            self._optional(self._temp_path, 1000),
+        )
+
+
+# ─── Intel & friends (DRM fdinfo) ─────────────────────────────────────────────
+
+
+class DrmFdinfoBackend:
+    """Utilisation from the drm-engine-<name>: <ns> keys in /proc/*/fdinfo.
+
+    Walking every process's fds is the expensive part, so the set of DRM
+    fdinfo files is only rebuilt every `rescan_every` reads; in between
+    just the known files are re-read. Clients are de-duplicated by
+    drm-client-id (fds shared across fork/dup report the same client).
+    The busiest engine's share of wall time is reported.
+
+    Even between rescans a read opens a file per DRM client, so this
+    backend is not cheap enough to read on the event loop (inline = False).
+    """
+
+    name = "fdinfo"
+    inline = False
+    DRIVERS = ("i915",)
+
+    def __init__(self, proc_root="/proc", rescan_every=5, clock=time.monotonic_ns):
+        self.proc_root = proc_root
+        self.rescan_every = rescan_every
+        self.clock = clock
+        self._paths = []
+        self._reads = 0
+        self._prev = {}
+        self._prev_time = None
+
+    @classmethod
+    def find(cls, sysfs_root="/sys", proc_root="/proc", **kwargs):
+        for card in sorted(glob.glob(os.path.join(sysfs_root, "class/drm/card[0-9]*"))):
+            driver = os.path.join(card, "device/driver")
+            if os.path.basename(os.path.realpath(driver)) in cls.DRIVERS:
+                return cls(proc_root, **kwargs)
+        return None
+
+    def start(self, loop=None):
+        pass
+
+    def ensure_started(self, qtile):
+        pass
+
+    def stop(self):
+        pass
+
+    def _scan(self):
+        paths = []
+        for pid in os.listdir(self.proc_root):
+            if not pid.isdigit():
+                continue
+            fd_dir = os.path.join(self.proc_root, pid, "fd")
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                continue
+            for fd in fds:
+                try:
+                    target = os.readlink(os.path.join(fd_dir, fd))
+                except OSError:
+                    continue
+                if target.startswith("/dev/dri/"):
+                    paths.append(os.path.join(self.proc_root, pid, "fdinfo", fd))
+        return paths
+
+    def _counters(self):
+        counters = {}
+        alive = []
+        for path in self._paths:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            alive.append(path)
+            client = None
+            engines = []
+            for line in data.splitlines():
+                key, _, value = line.partition(b":")
+                if key == b"drm-client-id":
+                    client = value.strip()
+                elif key.startswith(b"drm-engine-") and value.endswith(b"ns"):
+                    engines.append((key[11:], int(value[:-2])))
+            if client is None:
+                continue
+            for engine, ns in engines:
+                counters[(client, engine)] = ns
+        self._paths = alive
+        return counters
+
+    def read(self):
+        if self._reads % self.rescan_every == 0:
+            self._paths = self._scan()
+        self._reads += 1
+
+        now = self.clock()
+        counters = self._counters()
+        prev, prev_time = self._prev, self._prev_time
+        self._prev, self._prev_time = counters, now
+        if prev_time is None or now <= prev_time:
+            return None
+
+        busy = {}
+        for key, ns in counters.items():
+            # New clients have no baseline yet; they count from next read
+            delta = ns - prev.get(key, ns)
+            if delta > 0:
+                busy[key[1]] = busy.get(key[1], 0) + delta
+        util = max(busy.values(), default=0) * 100 // (now - prev_time)
+        return GpuSample(min(util, 100), None, None, None)
+
+
+# ─── Source ───────────────────────────────────────────────────────────────────
+
+
+class GpuSource:
+    """Cached front end over whichever backend this machine has."""
+
+    def __init__(self, backend, max_age=1.0, history=None):
+        self.backend = backend
+        self.max_age = max_age
+        self.history = history
+        self._sample = None
+        self._sampled = 0.0
+
+    @classmethod
+    def detect(
+        cls, sysfs_root="/sys", proc_root="/proc", nvidia_smi="nvidia-smi", interval=2, history=None
+    ):
+        """Prefer the discrete NVIDIA card, then amdgpu, then i915."""
+        backend = (
+            NvidiaSmiBackend.find(nvidia_smi, interval=interval)
+            or SysfsBackend.find(sysfs_root)
+            or DrmFdinfoBackend.find(sysfs_root, proc_root)
+        )
+        return cls(backend, history=history) if backend else None
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    @property
+    def inline(self):
+        """Whether text() is cheap enough to call on the event loop."""
+        return self.backend.inline
+
+    def ensure_started(self, qtile):
+        self.backend.ensure_started(qtile)
+
+    def stop(self):
+        self.backend.stop()
+
+    def sample(self):
+        now = time.monotonic()
+        if now - self._sampled >= self.max_age:
+            self._sample = self.backend.read()
+            self._sampled = now
+            if self.history is not None and self._sample is not None:
+                self.history.record("gpu", self._sample.util or 0)
+        return self._sample
+
+    def text(self):
+        sample = self.sample()
+        if sample is None or sample.util is None:
+            return "GPU [Error]"
+        return render_bar(sample.util, "GPU")
@@ -0,0 +1,152 @@
+"""Incremental group/window index, kept up to date by Qtile hooks.
+
+The workspace switcher, Mod+Tab and startup restore used to scan
+qtile.windows_map or every group's window list, and the MRU history was a
+list reshuffled with remove()/insert(0). GroupIndex instead tracks:
+
+  * counts        group name -> number of windows, adjusted per hook event
+  * window_group  wid -> group name, so a move or close knows what to undo
+  * mru           OrderedDict of group names, most recent first, capped at
+                  mru_size; touching a group is one move_to_end()
+
+Every hook-driven operation is O(1); nothing walks the window list. MRU order and
+which windows were on which group are saved to
+$XDG_CACHE_HOME/qtile/group_index.json. After a restart a dynamic workspace
+comes back only if one of its windows is still managed, and nothing is
+restored from a different X session.
+"""
+
+import json
+import os
+from collections import OrderedDict
+
+MRU_SIZE = 20
+
+
+def default_path():
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache, "qtile", "group_index.json")
+
+
+def session_id():
+    """Window ids only mean something within one X session."""
+    return f"{os.environ.get('XDG_SESSION_ID', '')}:{os.environ.get('DISPLAY', '')}"
+
+
+class GroupIndex:
+    def __init__(self, path=None, mru_size=MRU_SIZE):
+        self.path = path or default_path()
+        self.mru_size = mru_size
+        self.counts = {}
+        self.window_group = {}
+        self.mru = OrderedDict()
+        # Group name -> wids on it when last saved, for restore at startup
+        self.saved_groups = {}
+        self._dirty = False
+        self._saved_at = 0.0
+
+    # ─── Windows ──────────────────────────────────────────────────────────────
+
+    def window_added(self, wid, group):
+        """A window was managed on, or moved to, `group` (None: no group)."""
+        old = self.window_group.get(wid)
+        if old == group:
+            return
+        if old is not None:
+            self._decrement(old)
+        if group is None:
+            self.window_group.pop(wid, None)
+            return
+        self.window_group[wid] = group
+        self.counts[group] = self.counts.get(group, 0) + 1
+        self._dirty = True
+
+    def window_removed(self, wid):
+        group = self.window_group.pop(wid, None)
+        if group is not None:
+            self._decrement(group)
+
+    def _decrement(self, group):
+        n = self.counts.get(group, 0) - 1
+        if n > 0:
+            self.counts[group] = n
+        else:
+            self.counts.pop(group, None)
+        self._dirty = True
+
+    def rebuild(self, windows):
+        """Recount from scratch (only needed if the index starts mid-session)."""
+        self.counts.clear()
+        self.window_group.clear()
+        for window in windows:
+            group = getattr(window, "group", None)
+            if group is not None:
+                self.window_added(window.wid, group.name)
+
+    def count(self, group):
+        return self.counts.get(group, 0)
+
+    # ─── Groups ───────────────────────────────────────────────────────────────
+
+    def touch(self, group):
+        """Mark `group` as the most recently visited."""
+        if self.mru and next(iter(self.mru)) == group:
+            return
+        self.mru[group] = None
+        self.mru.move_to_end(group, last=False)
+        if len(self.mru) > self.mru_size:
+            self.mru.popitem()
+        self._dirty = True
+
+    def previous(self):
+        """The group visited before the current one, or None."""
+        it = iter(self.mru)
+        next(it, None)
+        return next(it, None)
+
+    def group_removed(self, group):
+        self.mru.pop(group, None)
+        self.counts.pop(group, None)
+        self._dirty = True
+
+    # ─── Persistence ──────────────────────────────────────────────────────────
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("session") != session_id():
+            return
+        self.mru = OrderedDict.fromkeys(data.get("mru", [])[: self.mru_size])
+        groups = data.get("groups")
+        self.saved_groups = groups if isinstance(groups, dict) else {}
+
+    def restorable(self, windows):
+        """Saved groups that a window in `windows` (wid -> window) was on."""
+        return [
+            name for name, wids in self.saved_groups.items()
+            if any(wid in windows for wid in wids)
+        ]
+
+    def save(self):
+        groups = {}
+        for wid, group in self.window_group.items():
+            groups.setdefault(group, []).append(wid)
+        data = {"session": session_id(), "mru": list(self.mru), "groups": groups}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def maybe_save(self, now, min_interval=30.0):
+        """Save if anything changed and the last save is older than min_interval."""
+        if self._dirty and now - self._saved_at >= min_interval:
+            self._saved_at = now
+            try:
+                self.save()
+            except OSError:
+                pass
@@ -0,0 +1,132 @@
+"""Fixed-capacity metric history shared by the bar and the popups.
+
+Every metric gets one Ring backed by array('f'): appends are O(1) and
+never allocate, and memory is exactly 4 bytes * capacity per metric,
+decided up front. A second array('d') Ring beside it holds each sample's
+wall-clock time (8 bytes * capacity), since metrics aren't sampled at one
+fixed rate: the GPU reads every 2 s and the scheduler stretches intervals
+when idle or on battery. Nothing in here imports libqtile, so
+out-of-process readers (sys_popup) can use load_history() on the files
+written by HistoryStore.export().
+"""
+
+import os
+import time
+from array import array
+
+EXPORT_DIR = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR", "/tmp"), "qtile-history"
+)
+
+
+class Ring:
+    __slots__ = ("capacity", "data", "head", "size")
+
+    def __init__(self, capacity, typecode="f"):
+        self.capacity = capacity
+        self.data = array(typecode, bytes(array(typecode).itemsize * capacity))
+        self.head = 0  # next write position
+        self.size = 0
+
+    def append(self, value):
+        self.data[self.head] = value
+        self.head += 1
+        if self.head == self.capacity:
+            self.head = 0
+        if self.size < self.capacity:
+            self.size += 1
+
+    def latest(self, default=0.0):
+        if not self.size:
+            return default
+        return self.data[self.head - 1]
+
+    def start(self, n):
+        """Index of the oldest of the last `n` samples (n is clamped to size)."""
+        n = min(n, self.size)
+        return (self.head - n) % self.capacity, n
+
+    def max_last(self, n):
+        """Largest of the last `n` samples, without building a list."""
+        index, n = self.start(n)
+        data, capacity = self.data, self.capacity
+        best = 0.0
+        for _ in range(n):
+            value = data[index]
+            if value > best:
+                best = value
+            index += 1
+            if index == capacity:
+                index = 0
+        return best
+
+    def snapshot(self):
+        """Chronological copy of the whole history (allocates; not for ticks)."""
+        index, n = self.start(self.size)
+        if index + n <= self.capacity:
+            return self.data[index : index + n]
+        return self.data[index:] + self.data[: index + n - self.capacity]
+
+    @property
+    def nbytes(self):
+        return self.data.itemsize * self.capacity
+
+
+class HistoryStore:
+    """One Ring per metric name (plus one of timestamps), all the same capacity."""
+
+    def __init__(self, metrics, capacity=600):
+        self.capacity = capacity
+        self.rings = {name: Ring(capacity) for name in metrics}
+        self.stamps = {name: Ring(capacity, "d") for name in metrics}
+
+    def __getitem__(self, name):
+        return self.rings[name]
+
+    def record(self, name, value, when=None):
+        self.rings[name].append(value)
+        self.stamps[name].append(time.time() if when is None else when)
+
+    @property
+    def nbytes(self):
+        return sum(ring.nbytes for ring in self.rings.values()) + sum(
+            ring.nbytes for ring in self.stamps.values()
+        )
+
+    def export(self, name, directory=EXPORT_DIR):
+        """Write one metric's history; returns (values_path, times_path).
+
+        Values are raw float32 ({name}.f32) and the matching sample times
+        raw float64 Unix seconds ({name}.t64), in the same order. Each is
+        written to a temp file and renamed, so a reader never sees a
+        half-written file.
+        """
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        paths = []
+        for ring, suffix in ((self.rings[name], "f32"), (self.stamps[name], "t64")):
+            path = os.path.join(directory, f"{name}.{suffix}")
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                ring.snapshot().tofile(f)
+            os.replace(tmp, path)
+            paths.append(path)
+        return tuple(paths)
+
+
+def load_history(path, times_path=None):
+    """Read files written by HistoryStore.export().
+
+    Returns array('f') of values, or (times, values) with times as
+    array('d') of Unix seconds when `times_path` is given.
+    """
+    data = array("f")
+    with open(path, "rb") as f:
+        data.frombytes(f.read())
+    if times_path is None:
+        return data
+    times = array("d")
+    with open(times_path, "rb") as f:
+        times.frombytes(f.read())
+    # A sample recorded between the two renames shows up in only one file
+    n = min(len(times), len(data))
+    return times[len(times) - n :], data[len(data) - n :]
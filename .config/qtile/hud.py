@@ -0,0 +1,62 @@
+"""Client for the long-lived workspace HUD (ui_scripts/ws_hud_server.py).
+
+Showing the HUD is a single non-blocking sendto() on a Unix datagram
+socket; the server debounces bursts and draws only the latest group. If
+the server isn't running the message is dropped and the server is started
+(with that message), at most once every `respawn_delay` seconds.
+"""
+
+import os
+import socket
+import subprocess
+import time
+
+
+def socket_path():
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR") or "/tmp", "ws_hud.sock")
+
+
+class HudClient:
+    def __init__(self, command, path=None, respawn_delay=5.0):
+        self.command = command
+        self.path = path or socket_path()
+        self.respawn_delay = respawn_delay
+        self.sent = 0
+        self.dropped = 0
+        self._spawned_at = None
+        self._sock = socket.socket(
+            socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC
+        )
+
+    def show(self, text):
+        """Ask the server to show `text`; never blocks. Returns True if sent."""
+        try:
+            self._sock.sendto(text.encode(), self.path)
+        except BlockingIOError:
+            # The server's queue is full, so it's behind anyway
+            self.dropped += 1
+            return False
+        except (FileNotFoundError, ConnectionRefusedError):
+            self.dropped += 1
+            self._start(text)
+            return False
+        self.sent += 1
+        return True
+
+    def _start(self, text):
+        now = time.monotonic()
+        if self._spawned_at is not None and now - self._spawned_at < self.respawn_delay:
+            return
+        if not os.path.exists(self.command[0]):
+            return
+        self._spawned_at = now
+        subprocess.Popen(
+            [*self.command, "--socket", self.path, "--show", text],
+            start_new_session=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def close(self):
+        self._sock.close()
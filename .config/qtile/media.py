@@ -0,0 +1,314 @@
+"""Volume and media keys without forking.
+
+Every XF86Audio* key used to run `bash -c 'pactl ... && notify-send ...'`
+(the media keys also `sleep 0.1` and run `playerctl metadata`), so holding
+volume-up started a process storm. MediaController instead keeps:
+
+  * one audio connection: libpulse through pulsectl when it's installed
+    (works with pipewire-pulse too), calls confined to one worker thread;
+    otherwise one `pactl` per *batch* of key presses
+  * the config's session bus connection (dbus_fast, already a Qtile
+    dependency) for MPRIS, and its Notifier (ui_scripts/notifications.py)
+    for notifications replaced in place per tag; without dbus_fast it
+    falls back to playerctl / notify-send
+
+Key presses only record intent and return. One flush task applies
+everything that piled up since the previous round trip (five volume-up
+presses become a single +25%), then shows one notification.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import re
+
+from polling import run_command
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pulsectl
+
+    has_pulsectl = True
+except ImportError:
+    has_pulsectl = False
+
+MPRIS_PREFIX = "org.mpris.MediaPlayer2."
+MPRIS_PATH = "/org/mpris/MediaPlayer2"
+PLAYER_IFACE = "org.mpris.MediaPlayer2.Player"
+PROPS_IFACE = "org.freedesktop.DBus.Properties"
+
+
+# ─── Audio ────────────────────────────────────────────────────────────────────
+
+
+class PulseAudio:
+    """Default-sink volume over one persistent libpulse connection.
+
+    pulsectl is blocking and not thread-safe, so every call runs on a
+    single dedicated thread and the Qtile loop only awaits the result.
+    """
+
+    def __init__(self, client_name="qtile"):
+        self.client_name = client_name
+        self._pulse = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="pulse"
+        )
+
+    def _sink(self):
+        if self._pulse is None:
+            self._pulse = pulsectl.Pulse(self.client_name)
+        name = self._pulse.server_info().default_sink_name
+        return self._pulse.get_sink_by_name(name)
+
+    def _run(self, func):
+        def call():
+            try:
+                return func()
+            except pulsectl.PulseError as e:
+                # Server restarted: reconnect on the next call
+                if self._pulse is not None:
+                    self._pulse.close()
+                    self._pulse = None
+                raise OSError(str(e)) from e
+
+        return asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    def _state(self, sink):
+        return round(self._pulse.volume_get_all_chans(sink) * 100), bool(sink.mute)
+
+    async def volume(self):
+        """(percent, muted) of the default sink; muted may be None if unknown."""
+        return await self._run(lambda: self._state(self._sink()))
+
+    async def change_volume(self, delta):
+        def change():
+            sink = self._sink()
+            self._pulse.volume_change_all_chans(sink, delta / 100)
+            return self._state(self._sink())
+
+        return await self._run(change)
+
+    async def toggle_mute(self):
+        def toggle():
+            sink = self._sink()
+            self._pulse.mute(sink, not sink.mute)
+            return self._state(self._sink())
+
+        return await self._run(toggle)
+
+    def close(self):
+        self._executor.submit(lambda: self._pulse and self._pulse.close())
+        self._executor.shutdown(wait=False)
+
+
+class PactlAudio:
+    """Fallback without pulsectl: pactl per call, never per key press.
+
+    Mute state costs another pactl, so it's only looked up after a mute
+    toggle and reported as None (unknown) otherwise.
+    """
+
+    async def _percent(self):
+        out = await run_command(["pactl", "get-sink-volume", "@DEFAULT_SINK@"])
+        match = re.search(r"(\d+)%", out)
+        if match is None:
+            raise OSError("no volume in pactl output")
+        return int(match.group(1))
+
+    async def volume(self):
+        return await self._percent(), None
+
+    async def change_volume(self, delta):
+        await run_command(["pactl", "set-sink-volume", "@DEFAULT_SINK@", f"{delta:+d}%"])
+        return await self.volume()
+
+    async def toggle_mute(self):
+        await run_command(["pactl", "set-sink-mute", "@DEFAULT_SINK@", "toggle"])
+        mute = await run_command(["pactl", "get-sink-mute", "@DEFAULT_SINK@"])
+        return await self._percent(), "yes" in mute
+
+    def close(self):
+        pass
+
+
+def audio_backend():
+    return PulseAudio() if has_pulsectl else PactlAudio()
+
+
+# ─── MPRIS ────────────────────────────────────────────────────────────────────
+
+
+class Mpris:
+    """Controls the first MPRIS player on the session bus."""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self._player = None
+        self._metadata_changed = asyncio.Event()
+        self._subscribed = False
+
+    async def _find_player(self):
+        (names,) = await self.bus.call(
+            "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", "ListNames"
+        )
+        players = sorted(name for name in names if name.startswith(MPRIS_PREFIX))
+        if not players:
+            raise OSError("no MPRIS player")
+        return players[0]
+
+    def _on_message(self, message):
+        if (
+            message.member == "PropertiesChanged"
+            and message.path == MPRIS_PATH
+            and message.body
+            and message.body[0] == PLAYER_IFACE
+            and "Metadata" in message.body[1]
+        ):
+            self._metadata_changed.set()
+
+    async def _call(self, member, signature="", body=()):
+        if not self._subscribed:
+            # Only marked once it worked, so a failed subscribe is retried
+            await self.bus.subscribe(
+                f"type='signal',interface='{PROPS_IFACE}',member='PropertiesChanged',"
+                f"path='{MPRIS_PATH}'",
+                self._on_message,
+            )
+            self._subscribed = True
+        for attempt in range(2):
+            if self._player is None:
+                self._player = await self._find_player()
+            try:
+                return await self.bus.call(
+                    self._player, MPRIS_PATH, *member.rsplit(".", 1), signature, body
+                )
+            except OSError:
+                # The player may have quit; look again once
+                self._player = None
+                if attempt:
+                    raise
+
+    async def command(self, member, wait_for_track=False):
+        """PlayPause / Next / Previous; returns the (new) track title."""
+        self._metadata_changed.clear()
+        await self._call(f"{PLAYER_IFACE}.{member}")
+        if wait_for_track:
+            # Instead of a blind sleep: wait for the player to announce the
+            # new track, up to a limit
+            try:
+                await asyncio.wait_for(self._metadata_changed.wait(), 0.5)
+            except asyncio.TimeoutError:
+                pass
+        (metadata,) = await self._call(f"{PROPS_IFACE}.Get", "ss", [PLAYER_IFACE, "Metadata"])
+        title = metadata.value.get("xesam:title")
+        return title.value if title is not None else ""
+
+
+class Playerctl:
+    """Fallback without dbus_fast."""
+
+    _COMMANDS = {"PlayPause": "play-pause", "Next": "next", "Previous": "previous"}
+
+    async def command(self, member, wait_for_track=False):
+        await run_command(["playerctl", self._COMMANDS[member]])
+        if wait_for_track:
+            await asyncio.sleep(0.1)
+        return (await run_command(["playerctl", "metadata", "title"])).strip()
+
+
+# ─── Controller ───────────────────────────────────────────────────────────────
+
+
+class MediaController:
+    _MEDIA = {
+        "PlayPause": ("Play/Pause", False),
+        "Next": ("Next Track", True),
+        "Previous": ("Previous Track", True),
+    }
+
+    def __init__(self, audio, media, notifier, on_volume=None):
+        self.audio = audio
+        self.media = media
+        self.notifier = notifier
+        # Called after each applied volume batch, e.g. to refresh the widget
+        self.on_volume = on_volume
+
+        self.presses = 0
+        self.batches = 0
+        self._delta = 0
+        self._mute = False
+        self._commands = []
+        self._volume_task = None
+        self._media_task = None
+
+    @classmethod
+    def create(cls, bus, notifier, on_volume=None):
+        """`bus` is a SessionBus, or None without dbus_fast."""
+        media = Mpris(bus) if bus is not None else Playerctl()
+        return cls(audio_backend(), media, notifier, on_volume)
+
+    # Key handlers: record the press and return immediately
+
+    def change_volume(self, delta):
+        self.presses += 1
+        self._delta += delta
+        self._volume_task = self._kick(self._volume_task, self._flush_volume)
+
+    def toggle_mute(self):
+        self.presses += 1
+        self._mute = not self._mute
+        self._volume_task = self._kick(self._volume_task, self._flush_volume)
+
+    def media_command(self, member):
+        self.presses += 1
+        self._commands.append(member)
+        self._media_task = self._kick(self._media_task, self._flush_media)
+
+    def _kick(self, task, flush):
+        # A running flush picks up presses that arrive while it awaits
+        if task is not None and not task.done():
+            return task
+        return asyncio.get_running_loop().create_task(flush())
+
+    async def _flush_volume(self):
+        state = None
+        try:
+            while self._delta or self._mute:
+                delta, self._delta = self._delta, 0
+                mute, self._mute = self._mute, False
+                self.batches += 1
+                if delta:
+                    state = await self.audio.change_volume(delta)
+                if mute:
+                    state = await self.audio.toggle_mute()
+        except OSError as e:
+            logger.warning("volume change failed: %s", e)
+            self._delta, self._mute = 0, False
+        if state is None:
+            return
+        percent, muted = state
+        if self.on_volume is not None:
+            self.on_volume()
+        self.notifier.notify(
+            "Volume", "Muted" if muted else f"{percent}%", "vol", 1000, value=percent
+        )
+
+    async def _flush_media(self):
+        summary = title = None
+        while self._commands:
+            member = self._commands.pop(0)
+            summary, wait = self._MEDIA[member]
+            self.batches += 1
+            try:
+                title = await self.media.command(member, wait_for_track=wait)
+            except OSError as e:
+                logger.warning("%s failed: %s", member, e)
+                return
+        if summary is not None:
+            self.notifier.notify(summary, title or "", "media", 2000)
+
+    def close(self):
+        # The bus and notifier belong to the config, which closes them
+        self.audio.close()
@@ -0,0 +1,138 @@
+"""Lightweight timing for config hooks, keybinding functions and polls.
+
+Wrap a callback with `timings.timed("name")` and every call records its
+latency into a fixed-size log-scale histogram: 4 buckets per power of
+two from 1 µs to ~2 min, 120 counters per callback no matter how long
+Qtile runs. Percentiles are read off the buckets (±10%), which is plenty
+to tell which callback is making the desktop sluggish.
+"""
+
+import functools
+import inspect
+import json
+import math
+import os
+import time
+from array import array
+
+_BUCKETS_PER_OCTAVE = 4
+_NUM_BUCKETS = 120
+
+
+def _bucket(ns):
+    us = ns / 1000
+    if us <= 1:
+        return 0
+    return min(_NUM_BUCKETS - 1, int(math.log2(us) * _BUCKETS_PER_OCTAVE))
+
+
+def _bucket_upper_ms(index):
+    return 2 ** ((index + 1) / _BUCKETS_PER_OCTAVE) / 1000
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.buckets = array("I", bytes(4 * _NUM_BUCKETS))
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        self.buckets[_bucket(ns)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * p / 100)
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(_bucket_upper_ms(index), self.max_ns / 1e6)
+        return self.max_ns / 1e6
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "mean_ms": round(self.total_ns / self.count / 1e6, 4) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 4),
+            "p95_ms": round(self.percentile(95), 4),
+            "p99_ms": round(self.percentile(99), 4),
+            "max_ms": round(self.max_ns / 1e6, 4),
+        }
+
+
+class Timings:
+    def __init__(self):
+        self.histograms = {}
+        self.started = time.time()
+
+    def record(self, name, ns):
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+        hist.add(ns)
+
+    def timed(self, name):
+        """Decorator recording the wall time of every call under `name`.
+
+        Coroutine functions are timed until they complete, so for polls
+        that await a subprocess this includes the wait.
+        """
+
+        def decorate(func):
+            if inspect.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter_ns()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.record(name, time.perf_counter_ns() - start)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter_ns() - start)
+
+            return wrapper
+
+        return decorate
+
+    def reset(self):
+        self.histograms.clear()
+        self.started = time.time()
+
+    def summary(self):
+        """Per-callback stats, most expensive (by total time) first."""
+        rows = sorted(
+            self.histograms.items(), key=lambda item: item[1].total_ns, reverse=True
+        )
+        return {
+            "since": self.started,
+            "callbacks": {name: hist.summary() for name, hist in rows},
+        }
+
+    def dump(self, path, extra=None):
+        """Atomically write summary() (plus `extra`) as JSON to `path`."""
+        data = self.summary()
+        if extra:
+            data.update(extra)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+        return path
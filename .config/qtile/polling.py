@@ -0,0 +1,218 @@
+"""Deadline-bounded poll widget that never blocks the Qtile event loop.
+
+AsyncPollText is a drop-in for GenPollText. `func` may be:
+
+  * a coroutine function  -> awaited on the loop, cancelled at the deadline
+  * a plain callable      -> run in the default executor (or inline on the
+                             loop with inline=True, for cheap in-process
+                             readers like the Sampler)
+
+When a poll misses its deadline or raises, the widget keeps showing the
+last good value marked stale. A poll that is still running (a hung
+pactl, a stuck executor thread) counts as in flight, and no new poll is
+started for that widget until it finishes, so a slow source can't pile up.
+"""
+
+import asyncio
+import inspect
+import logging
+
+from libqtile.widget import base
+
+logger = logging.getLogger(__name__)
+
+
+async def run_command(argv, timeout=None, input=None):
+    """Run argv as an asyncio subprocess and return its stdout as text.
+
+    `input` (text) is written to the child's stdin. The child is killed if
+    the awaiting task is cancelled (which is what AsyncPollText does at the
+    deadline), so nothing is left behind.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *argv,
+        stdin=asyncio.subprocess.DEVNULL if input is None else asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        out, _ = await asyncio.wait_for(
+            proc.communicate(None if input is None else input.encode()), timeout
+        )
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    if proc.returncode != 0:
+        raise OSError(f"{argv[0]} exited with {proc.returncode}")
+    return out.decode()
+
+
+class AsyncPollText(base._TextBox):
+    """A text widget whose text is updated from an async-friendly poll."""
+
+    # Polls currently running across every AsyncPollText, for diagnostics
+    total_in_flight = 0
+
+    defaults = [
+        ("func", None, "Coroutine function or callable returning the text"),
+        ("update_interval", 1, "Seconds between polls"),
+        ("deadline", 1.5, "Seconds a poll may take before it is marked stale"),
+        ("inline", False, "Call a plain func directly on the loop (must be fast)"),
+        ("max_in_flight", 1, "Polls allowed to run at once for this widget"),
+        ("stale_format", "{text} ?", "Format for the last good text when stale"),
+        ("stale_foreground", None, "Foreground colour while stale (None keeps it)"),
+        ("error_text", "--", "Text shown if no poll has ever succeeded"),
+        ("scheduler", None, "scheduler.PollScheduler to share instead of a private timer"),
+        ("pause_modes", (), "Scheduler modes (e.g. gamemode) during which this isn't updated"),
+        ("cache", None, "Dict keeping the last good text across reload_config"),
+    ]
+
+    def __init__(self, text="", **config):
+        base._TextBox.__init__(self, text, **config)
+        self.add_defaults(AsyncPollText.defaults)
+        self.in_flight = 0
+        self.skipped = 0
+        self.last_good = None
+        self.stale = False
+        self._normal_foreground = None
+        self._tasks = set()
+        self._rerun = False
+        self._entry = None
+        if self.cache is not None and self.func is not None:
+            self.last_good = self.cache.get(self._cache_key())
+            if self.last_good is not None:
+                self.text = self.last_good
+
+    def _cache_key(self):
+        return getattr(self.func, "__qualname__", None) or self.name
+
+    def _configure(self, qtile, bar):
+        base._TextBox._configure(self, qtile, bar)
+        self._normal_foreground = self.foreground
+
+    def timer_setup(self):
+        if self.scheduler is not None and self.update_interval is not None:
+            self._entry = self.scheduler.register(
+                self.force_update, self.update_interval, self.pause_modes
+            )
+            self.force_update()
+        else:
+            self.tick()
+
+    def tick(self):
+        if self.update_interval is not None:
+            self.timeout_add(self.update_interval, self.tick)
+        self.force_update()
+
+    def force_update(self):
+        """Start a poll now unless this widget already has too many running."""
+        if self.func is None:
+            return
+        if self.in_flight >= self.max_in_flight:
+            # Remember the request so the result isn't older than the trigger
+            self.skipped += 1
+            self._rerun = True
+            return
+        self._rerun = False
+
+        if self.inline and not inspect.iscoroutinefunction(self.func):
+            try:
+                self._set_result(self.func())
+            except Exception:
+                logger.exception("%s: poll failed", self.name)
+                self._set_stale()
+            return
+
+        self._enter()
+        task = asyncio.get_running_loop().create_task(self._poll())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def finalize(self):
+        if self._entry is not None:
+            self.scheduler.unregister(self._entry)
+            self._entry = None
+        # A cancelled poll's _leave() mustn't start another one
+        self._rerun = False
+        for task in list(self._tasks):
+            task.cancel()
+        base._TextBox.finalize(self)
+
+    def recolor(self, foreground=None, stale_foreground=None):
+        """Change colours in place (theme switch) without losing the current text."""
+        if stale_foreground is not None:
+            self.stale_foreground = stale_foreground
+        if foreground is not None:
+            self._normal_foreground = foreground
+        if self.stale and self.stale_foreground is not None:
+            self.foreground = self.stale_foreground
+        elif self._normal_foreground is not None:
+            self.foreground = self._normal_foreground
+
+    def _enter(self):
+        self.in_flight += 1
+        AsyncPollText.total_in_flight += 1
+
+    def _leave(self, *_):
+        self.in_flight -= 1
+        AsyncPollText.total_in_flight -= 1
+        if self._rerun and self.in_flight < self.max_in_flight:
+            self.qtile.call_soon(self.force_update)
+
+    async def _poll(self):
+        if inspect.iscoroutinefunction(self.func):
+            try:
+                result = await asyncio.wait_for(self.func(), self.deadline)
+            except asyncio.TimeoutError:
+                logger.warning("%s: poll exceeded %ss", self.name, self.deadline)
+                self._set_stale()
+            except Exception:
+                logger.exception("%s: poll failed", self.name)
+                self._set_stale()
+            else:
+                self._set_result(result)
+            finally:
+                self._leave()
+            return
+
+        # Executor threads can't be cancelled, so the poll stays in flight
+        # until the thread actually returns, even after we stop waiting.
+        future = asyncio.get_running_loop().run_in_executor(None, self.func)
+        future.add_done_callback(self._leave)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), self.deadline)
+        except asyncio.TimeoutError:
+            logger.warning("%s: poll exceeded %ss", self.name, self.deadline)
+            self._set_stale()
+        except Exception:
+            logger.exception("%s: poll failed", self.name)
+            self._set_stale()
+        else:
+            self._set_result(result)
+
+    def _set_result(self, text):
+        if text is None:
+            self._set_stale()
+            return
+        self.last_good = text
+        self.stale = False
+        if self.cache is not None:
+            self.cache[self._cache_key()] = text
+        self._show(text, self._normal_foreground)
+
+    def _set_stale(self):
+        self.stale = True
+        if self.last_good is None:
+            self._show(self.error_text, self.stale_foreground)
+            return
+        self._show(self.stale_format.format(text=self.last_good), self.stale_foreground)
+
+    def _show(self, text, foreground):
+        if foreground is not None and foreground != self.foreground:
+            self.foreground = foreground
+            if text == self.text:
+                self.draw()
+                return
+        self.update(text)
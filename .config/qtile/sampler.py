@@ -0,0 +1,323 @@
+"""In-process replacement for the one-shot `sysmon cpu|ram|bat` calls.
+
+The bar used to fork ~/.local/bin/sysmon on every GenPollText tick. The
+Sampler below keeps the relevant /proc and sysfs files open and re-reads
+them with pread(), so a bar refresh is a couple of syscalls instead of a
+fork+exec. Output strings match sysmon's exactly.
+"""
+
+import os
+import time
+from array import array
+
+PROC_STAT = "/proc/stat"
+PROC_MEMINFO = "/proc/meminfo"
+PROC_NET_DEV = "/proc/net/dev"
+PROC_NET_ROUTE = "/proc/net/route"
+SYS_CLASS_NET = "/sys/class/net"
+BATTERY_DIR = "/sys/class/power_supply/BAT0"
+
+_READ_SIZE = 16384
+# Only the aggregate line is parsed, and /proc/stat starts with it
+_STAT_READ_SIZE = 512
+
+# user nice system idle iowait irq softirq steal (guest is already in user)
+_CPU_FIELDS = 8
+_IDLE, _IOWAIT = 3, 4
+
+_WRAP_32 = 1 << 32
+# Bytes/s no link this bar watches gets near (10 Gbit/s); a counter that
+# "wrapped" faster than this was reset instead
+_MAX_RATE = 10e9 / 8
+
+
+def render_bar(percent, prefix, width=5):
+    """Same 5-cell bar sysmon's print_bar() prints, e.g. 'CPU [██░░░]'."""
+    filled = max(0, min(width, (int(percent) * width) // 100))
+    return f"{prefix} [{'█' * filled}{'░' * (width - filled)}]"
+
+
+class CpuSampler:
+    """Delta-based /proc/stat reader covering the whole poll interval.
+
+    It keeps the previous aggregate counters and diffs against them, so
+    there is no sleep and no 100 ms window.
+    """
+
+    def __init__(self):
+        self._prev = None
+
+    def update(self, data):
+        """Feed a /proc/stat snapshot and return busy % since the last one.
+
+        The first call has no baseline and returns 0.
+        """
+        line = data.split(b"\n", 1)[0]
+        if not line.startswith(b"cpu "):
+            raise ValueError("no cpu line in /proc/stat")
+        fields = [int(x) for x in line.split()[1 : _CPU_FIELDS + 1]]
+        prev, self._prev = self._prev, fields
+        if prev is None or len(prev) != len(fields):
+            return 0
+        # Counters like iowait can step backwards; clamp at zero
+        deltas = [max(0, new - old) for new, old in zip(fields, prev)]
+        total = sum(deltas)
+        if total <= 0:
+            return 0
+        idle = sum(deltas[_IDLE : _IOWAIT + 1])
+        return (total - idle) * 100 // total
+
+
+class NetSampler:
+    """Per-interface throughput from /proc/net/dev with EWMA smoothing.
+
+    Interfaces get a fixed slot (up to `max_ifaces`) in flat arrays of
+    counters and smoothed rates, so a tick is one read plus arithmetic.
+    Loopback and virtual interfaces (no backing device in sysfs: bridges,
+    veth, docker, ifb, ...) are skipped. `half_life` is how many seconds
+    it takes an old rate to lose half its weight.
+    """
+
+    def __init__(self, half_life=2.0, max_ifaces=16, sys_class_net=SYS_CLASS_NET):
+        self.half_life = half_life
+        self.max_ifaces = max_ifaces
+        self.sys_class_net = sys_class_net
+
+        self.names = []
+        self._slots = {}
+        self._physical = {}
+        # [rx, tx] per slot
+        self._counters = array("Q", bytes(8 * 2 * max_ifaces))
+        self._rates = array("d", bytes(8 * 2 * max_ifaces))
+        self._primed = array("B", bytes(max_ifaces))
+        self._last_time = None
+
+    def _is_physical(self, name):
+        physical = self._physical.get(name)
+        if physical is None:
+            physical = name != "lo" and os.path.exists(
+                os.path.join(self.sys_class_net, name, "device")
+            )
+            self._physical[name] = physical
+        return physical
+
+    def _slot(self, name):
+        slot = self._slots.get(name)
+        if slot is None and len(self.names) < self.max_ifaces:
+            slot = len(self.names)
+            self.names.append(name)
+            self._slots[name] = slot
+        return slot
+
+    @staticmethod
+    def _delta(new, old, dt):
+        if new >= old:
+            return new - old
+        # 32-bit driver counters wrap; anything else is a reset (re-plugged
+        # USB adapter, driver reload) and contributes nothing. A reset from
+        # high up can look like a wrap, so only take it if the traffic it
+        # implies over `dt` is possible.
+        if _WRAP_32 // 2 < old < _WRAP_32:
+            delta = new + _WRAP_32 - old
+            if delta <= _MAX_RATE * dt:
+                return delta
+        return 0
+
+    def update(self, data, now):
+        """Feed a /proc/net/dev snapshot taken at monotonic time `now`."""
+        dt = None if self._last_time is None else now - self._last_time
+        self._last_time = now
+        alpha = None
+        if dt is not None and dt > 0:
+            alpha = 1.0 - 0.5 ** (dt / self.half_life)
+
+        counters, rates, primed = self._counters, self._rates, self._primed
+        for line in data.split(b"\n")[2:]:
+            name, sep, rest = line.partition(b":")
+            if not sep:
+                continue
+            name = name.strip().decode()
+            if not self._is_physical(name):
+                continue
+            slot = self._slot(name)
+            if slot is None:
+                continue
+            fields = rest.split()
+            rx, tx = int(fields[0]), int(fields[8])
+            i = slot * 2
+
+            if primed[slot] and alpha is not None:
+                for j, value in ((i, rx), (i + 1, tx)):
+                    instant = self._delta(value, counters[j], dt) / dt
+                    if primed[slot] == 1:
+                        # First real measurement seeds the average
+                        rates[j] = instant
+                    else:
+                        rates[j] += alpha * (instant - rates[j])
+                primed[slot] = 2
+            elif not primed[slot]:
+                primed[slot] = 1
+            counters[i], counters[i + 1] = rx, tx
+
+    def rates(self, name):
+        """Smoothed (down, up) in bytes/s, or (0, 0) for unknown interfaces."""
+        slot = self._slots.get(name)
+        if slot is None:
+            return 0.0, 0.0
+        return self._rates[slot * 2], self._rates[slot * 2 + 1]
+
+    def busiest(self):
+        best, best_rate = None, -1.0
+        for slot, name in enumerate(self.names):
+            rate = self._rates[slot * 2] + self._rates[slot * 2 + 1]
+            if rate > best_rate:
+                best, best_rate = name, rate
+        return best
+
+
+class Sampler:
+    """Shared metrics source for the bar widgets.
+
+    File descriptors are opened lazily and kept for the life of the
+    object; each read is a single pread() at offset 0, which makes procfs
+    and sysfs regenerate the contents. Results are cached for `max_age`
+    seconds so several widgets polling in the same tick share one read.
+    """
+
+    def __init__(self, max_age=0.5, battery_dir=BATTERY_DIR, net_half_life=2.0, history=None):
+        self.max_age = max_age
+        self.battery_dir = battery_dir
+        # Optional history.HistoryStore; fed once per fresh (uncached) read
+        self.history = history
+        self._fds = {}
+        self._cache = {}
+
+        self._cpu = CpuSampler()
+        self.net = NetSampler(half_life=net_half_life)
+
+    # ─── File Handling ────────────────────────────────────────────────────────
+
+    def _read(self, path, size=_READ_SIZE):
+        fd = self._fds.get(path)
+        if fd is None:
+            fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+            self._fds[path] = fd
+        try:
+            return os.pread(fd, size, 0)
+        except OSError:
+            # The file went away (e.g. battery unplugged); reopen next time
+            self._fds.pop(path, None)
+            os.close(fd)
+            raise
+
+    def close(self):
+        for fd in self._fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds.clear()
+
+    def _cached(self, key, compute):
+        now = time.monotonic()
+        hit = self._cache.get(key)
+        if hit is not None and now - hit[0] < self.max_age:
+            return hit[1]
+        value = compute()
+        self._cache[key] = (now, value)
+        return value
+
+    def _record(self, name, value):
+        if self.history is not None:
+            self.history.record(name, value)
+
+    # ─── Metrics ──────────────────────────────────────────────────────────────
+
+    def cpu_percent(self):
+        """Busy % (iowait counts as idle) since the previous fresh read."""
+        def compute():
+            percent = self._cpu.update(self._read(PROC_STAT, _STAT_READ_SIZE))
+            self._record("cpu", percent)
+            return percent
+
+        return self._cached("cpu_percent", compute)
+
+    def ram_percent(self):
+        total = available = 0
+        for line in self._read(PROC_MEMINFO).splitlines():
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1])
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1])
+                break
+        if total <= 0:
+            raise ValueError("MemTotal missing from /proc/meminfo")
+        return (total - available) * 100 // total
+
+    def uplink(self):
+        """Interface carrying the default route, else the busiest one."""
+        for line in self._read(PROC_NET_ROUTE).split(b"\n")[1:]:
+            fields = line.split()
+            if len(fields) > 1 and fields[1] == b"00000000":
+                name = fields[0].decode()
+                if name in self.net.names:
+                    return name
+        return self.net.busiest()
+
+    def net_rates(self):
+        """Smoothed (down, up) bytes/s on the active uplink."""
+        def compute():
+            self.net.update(self._read(PROC_NET_DEV), time.monotonic())
+            down, up = self.net.rates(self.uplink())
+            self._record("net_down", down)
+            self._record("net_up", up)
+            return down, up
+
+        return self._cached("net", compute)
+
+    def battery(self):
+        """Return (capacity, status) for BAT0."""
+        capacity = int(self._read(os.path.join(self.battery_dir, "capacity")))
+        status = self._read(os.path.join(self.battery_dir, "status")).strip()
+        return capacity, status.decode()
+
+    # ─── Bar Text ─────────────────────────────────────────────────────────────
+
+    def cpu_text(self):
+        def compute():
+            try:
+                return render_bar(self.cpu_percent(), "CPU")
+            except (OSError, ValueError):
+                return "CPU [Error]"
+
+        return self._cached("cpu", compute)
+
+    def ram_text(self):
+        def compute():
+            try:
+                percent = self.ram_percent()
+            except (OSError, ValueError):
+                return "RAM [Error]"
+            self._record("ram", percent)
+            return render_bar(percent, "RAM")
+
+        return self._cached("ram", compute)
+
+    def net_text(self):
+        try:
+            down, up = self.net_rates()
+        except (OSError, ValueError, IndexError):
+            return "↓ --K ↑ --K"
+        return f"↓ {down / 1024:.1f}K ↑ {up / 1024:.1f}K"
+
+    def battery_text(self):
+        def compute():
+            try:
+                capacity, status = self.battery()
+            except (OSError, ValueError):
+                return "BAT --%"
+            if status == "Charging":
+                return f"⚡ {capacity}%"
+            return f"BAT {capacity}%"
+
+        return self._cached("bat", compute)
@@ -0,0 +1,242 @@
+"""One coalesced timer for every periodic bar update.
+
+Each widget used to own a timer, so the process woke up separately for
+each of them. PollScheduler runs on a fixed tick grid instead: every
+registered callback has a period of N ticks, all callbacks due on the
+same tick fire in one wakeup, and ticks where nothing is due are skipped
+entirely.
+
+Periods stretch while a "mode" is active (game mode, on battery, idle
+screen); the slowest active mode wins. Callbacks registered with
+`pause_modes` are not called at all while one of those modes is active.
+Modes are re-checked every `check_interval` seconds, not on every tick, or
+right away through refresh_modes() when the caller knows one changed.
+"""
+
+import asyncio
+import logging
+import resource
+import time
+
+logger = logging.getLogger(__name__)
+
+# xcffib.screensaver is only needed for the idle mode; it's imported on the
+# first check rather than on every reload_config
+_screensaver = None
+
+
+class _Entry:
+    __slots__ = ("callback", "interval", "period", "pause_modes", "paused")
+
+    def __init__(self, callback, interval, pause_modes=()):
+        self.callback = callback
+        self.interval = interval
+        self.period = 1
+        self.pause_modes = frozenset(pause_modes)
+        self.paused = False
+
+
+class PollScheduler:
+    def __init__(self, tick=1.0, check_interval=5.0):
+        self.tick = tick
+        self.check_interval = check_interval
+        self.factor = 1.0
+        self.active_modes = ()
+
+        self.wakeups = 0
+        self.fired = 0
+        self.skipped = 0
+
+        self._entries = []
+        self._modes = {}
+        self._loop = None
+        self._handle = None
+        self._origin = 0.0
+        self._n = 0
+        self._last_n = -1
+        self._last_check = None
+        self._started_at = None
+        self._cpu_at_start = 0.0
+
+    # ─── Registration ─────────────────────────────────────────────────────────
+
+    def register(self, callback, interval, pause_modes=()):
+        """Call `callback` every `interval` seconds (rounded to the tick).
+
+        Must be called on the loop thread. Returns a handle for
+        unregister().
+        """
+        entry = _Entry(callback, interval, pause_modes)
+        entry.period = self._period(interval)
+        entry.paused = not entry.pause_modes.isdisjoint(self.active_modes)
+        self._entries.append(entry)
+        if self._loop is None:
+            self.start()
+        else:
+            # The pending wakeup may be later than this entry's first due
+            # tick
+            if self._handle is not None:
+                self._rewind()
+            self._reschedule()
+        return entry
+
+    def unregister(self, entry):
+        try:
+            self._entries.remove(entry)
+        except ValueError:
+            pass
+
+    def set_mode(self, name, predicate, factor):
+        """While predicate() is true, stretch every interval by `factor`.
+
+        Re-registering a name replaces it, so this is safe to call from a
+        config that gets reloaded.
+        """
+        self._modes[name] = (predicate, factor)
+        self._last_check = None
+
+    def refresh_modes(self):
+        """Re-check the modes now instead of at the next check_interval."""
+        self._update_modes(time.monotonic())
+        if self._handle is not None:
+            # Periods may have shrunk
+            self._rewind()
+            self._reschedule()
+
+    def _period(self, interval):
+        return max(1, round(interval * self.factor / self.tick))
+
+    # ─── Loop ─────────────────────────────────────────────────────────────────
+
+    def start(self, loop=None):
+        if self._handle is not None:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._origin = self._loop.time()
+        self._n = 0
+        self._last_n = -1
+        self._started_at = time.monotonic()
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        self._cpu_at_start = usage.ru_utime + usage.ru_stime
+        self._handle = self._loop.call_soon(self._wake)
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._loop = None
+
+    def _update_modes(self, now):
+        self._last_check = now
+        active = []
+        factor = 1.0
+        for name, (predicate, mode_factor) in self._modes.items():
+            try:
+                on = predicate()
+            except Exception:
+                logger.exception("scheduler mode %s failed", name)
+                on = False
+            if on:
+                active.append(name)
+                factor = max(factor, mode_factor)
+        if tuple(active) != self.active_modes:
+            for entry in self._entries:
+                entry.paused = not entry.pause_modes.isdisjoint(active)
+        self.active_modes = tuple(active)
+        if factor != self.factor:
+            logger.info("poll intervals x%s (%s)", factor, ", ".join(active) or "normal")
+            self.factor = factor
+            for entry in self._entries:
+                entry.period = self._period(entry.interval)
+
+    def _wake(self):
+        self._handle = None
+        self.wakeups += 1
+        now = time.monotonic()
+        if self._last_check is None or now - self._last_check >= self.check_interval:
+            self._update_modes(now)
+
+        # Paused entries don't cause wakeups; count the polls they would
+        # have made at their normal interval since the previous one
+        prev, self._last_n = self._last_n, self._n
+        for entry in list(self._entries):
+            if entry.paused:
+                normal = max(1, round(entry.interval / self.tick))
+                self.skipped += max(0, self._n // normal - prev // normal)
+                continue
+            if self._n % entry.period == 0:
+                self.fired += 1
+                try:
+                    entry.callback()
+                except Exception:
+                    logger.exception("scheduled poll failed")
+        self._reschedule()
+
+    def _reschedule(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if not self._entries:
+            return
+        n = self._n
+        # Jump straight to the next tick on which anything is due, but wake
+        # at least often enough to notice mode changes
+        steps = min(
+            (entry.period - (n % entry.period) for entry in self._entries if not entry.paused),
+            default=self._steps_until_check(),
+        )
+        steps = min(steps, self._steps_until_check())
+        self._n = n + steps
+        self._handle = self._loop.call_at(self._origin + self._n * self.tick, self._wake)
+
+    def _rewind(self):
+        # Recompute the pending wakeup from the last tick that was processed,
+        # or from the current one if that was a while ago so the ticks in
+        # between aren't replayed back to back. Never from the pending one
+        # or later: nothing was due before it, but it may be due itself.
+        now_n = int((self._loop.time() - self._origin) / self.tick)
+        self._n = max(self._last_n, min(self._n - 1, now_n))
+
+    def _steps_until_check(self):
+        # Wake at least often enough to notice mode changes
+        return max(1, round(self.check_interval / self.tick))
+
+    # ─── Diagnostics ──────────────────────────────────────────────────────────
+
+    def stats(self):
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        cpu = usage.ru_utime + usage.ru_stime - self._cpu_at_start
+        return {
+            "tick": self.tick,
+            "factor": self.factor,
+            "modes": list(self.active_modes),
+            "callbacks": len(self._entries),
+            "wakeups": self.wakeups,
+            "fired": self.fired,
+            "skipped": self.skipped,
+            "wakeups_per_s": self.wakeups / elapsed if elapsed else 0.0,
+            "cpu_s": cpu,
+            "cpu_percent": cpu * 100 / elapsed if elapsed else 0.0,
+        }
+
+
+def x_idle_seconds(qtile):
+    """Seconds since the last X input event, or 0 if it can't be told."""
+    global _screensaver
+    if _screensaver is None:
+        try:
+            import xcffib.screensaver
+
+            _screensaver = xcffib.screensaver
+        except ImportError:
+            _screensaver = False
+    if not _screensaver:
+        return 0.0
+    try:
+        conn = qtile.core.conn
+        ext = conn.conn(_screensaver.key)
+        reply = ext.QueryInfo(conn.default_screen.root.wid).reply()
+    except Exception:
+        return 0.0
+    return reply.ms_since_user_input / 1000
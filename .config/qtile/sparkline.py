@@ -0,0 +1,76 @@
+"""Bar sparkline drawn straight from a history Ring.
+
+Each redraw walks only the last `samples` slots of the ring with cairo
+rectangles: no text layout, no lists, no strings, and the cost depends
+on the widget width rather than on how much history is kept.
+"""
+
+from libqtile import bar
+from libqtile.widget import base
+
+
+class Sparkline(base._Widget):
+    defaults = [
+        ("ring", None, "history.Ring to draw"),
+        ("samples", 12, "Number of most recent samples shown"),
+        ("bar_width", 2, "Width of one sample in pixels"),
+        ("spacing", 1, "Gap between samples in pixels"),
+        ("maximum", 100.0, "Value drawn at full height; None scales to the visible peak"),
+        ("graph_color", "#89b4fa", "Colour of the bars"),
+        ("margin_y", 6, "Vertical margin in pixels"),
+        ("update_interval", 1, "Seconds between redraws; None to only redraw on demand"),
+        ("scheduler", None, "scheduler.PollScheduler to share instead of a private timer"),
+        ("pause_modes", (), "Scheduler modes (e.g. gamemode) during which this isn't updated"),
+    ]
+
+    def __init__(self, **config):
+        base._Widget.__init__(self, bar.CALCULATED, **config)
+        self.add_defaults(Sparkline.defaults)
+        self._entry = None
+
+    def calculate_length(self):
+        return self.samples * (self.bar_width + self.spacing) + self.spacing
+
+    def timer_setup(self):
+        if self.update_interval is None:
+            return
+        if self.scheduler is not None:
+            self._entry = self.scheduler.register(
+                self.draw, self.update_interval, self.pause_modes
+            )
+        else:
+            self.timeout_add(self.update_interval, self.tick)
+
+    def finalize(self):
+        if self._entry is not None:
+            self.scheduler.unregister(self._entry)
+            self._entry = None
+        base._Widget.finalize(self)
+
+    def tick(self):
+        self.timeout_add(self.update_interval, self.tick)
+        self.draw()
+
+    def draw(self):
+        self.drawer.clear(self.background or self.bar.background)
+        ring = self.ring
+        if ring is not None and ring.size:
+            peak = self.maximum or ring.max_last(self.samples) or 1.0
+            height = self.bar.height - 2 * self.margin_y
+            index, n = ring.start(self.samples)
+            data, capacity = ring.data, ring.capacity
+            step = self.bar_width + self.spacing
+            # Right-align so the newest sample sits against the next widget
+            x = self.spacing + (self.samples - n) * step
+            ctx = self.drawer.ctx
+            self.drawer.set_source_rgb(self.graph_color)
+            for _ in range(n):
+                value = data[index]
+                h = max(1, int(height * min(value, peak) / peak))
+                ctx.rectangle(x, self.margin_y + height - h, self.bar_width, h)
+                x += step
+                index += 1
+                if index == capacity:
+                    index = 0
+            ctx.fill()
+        self.drawer.draw(offsetx=self.offsetx, offsety=self.offsety, width=self.length)
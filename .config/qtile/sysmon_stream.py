@@ -0,0 +1,133 @@
+"""Non-blocking consumers for long-lived line-oriented children.
+
+LineStream runs one child and registers its stdout with the Qtile event
+loop via add_reader(), so widgets only ever look at the last parsed line
+and never wait on the child. The nvidia-smi GPU backend (gpu.py) and the
+pactl subscriber (audio.py) build on it.
+"""
+
+import asyncio
+import logging
+import os
+import subprocess
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LineStream:
+    """Keep a child running and hand each complete stdout line to parse().
+
+    Subclasses implement argv() and parse(); parse() returns the decoded
+    value, or None to ignore the line.
+    """
+
+    def __init__(self, restart_delay=5):
+        self.restart_delay = restart_delay
+        self.latest = None
+        self.updated = 0.0
+        self.lines = 0
+
+        self._proc = None
+        self._loop = None
+        self._buffer = b""
+        self._restart_handle = None
+
+    def argv(self):
+        raise NotImplementedError
+
+    def parse(self, line):
+        raise NotImplementedError
+
+    @property
+    def running(self):
+        return self._proc is not None
+
+    def start(self, loop=None):
+        """Spawn the child and hook its stdout into the event loop.
+
+        Must run on the loop thread; executor-side callers should use
+        ensure_started() instead.
+        """
+        if self._proc is not None:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._restart_handle = None
+        argv = self.argv()
+        try:
+            self._proc = subprocess.Popen(
+                argv,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            logger.exception("could not start %s", argv[0])
+            self._schedule_restart()
+            return
+        fd = self._proc.stdout.fileno()
+        os.set_blocking(fd, False)
+        self._loop.add_reader(fd, self._on_readable)
+
+    def ensure_started(self, qtile):
+        if self._proc is None and self._restart_handle is None:
+            qtile.call_soon_threadsafe(self.start)
+
+    def stop(self):
+        if self._restart_handle is not None:
+            self._restart_handle.cancel()
+            self._restart_handle = None
+        if self._proc is None:
+            return
+        self._loop.remove_reader(self._proc.stdout.fileno())
+        self._proc.terminate()
+        try:
+            self._proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+        self._proc.stdout.close()
+        self._proc = None
+        self._buffer = b""
+
+    def _schedule_restart(self):
+        self._restart_handle = self._loop.call_later(self.restart_delay, self.start)
+
+    def _on_readable(self):
+        try:
+            chunk = os.read(self._proc.stdout.fileno(), 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b""
+
+        if not chunk:
+            # The child exited; reap it and try again later
+            logger.warning("%s closed its output, restarting", self.argv()[0])
+            self.stop()
+            self._schedule_restart()
+            return
+
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        # Only the newest complete line matters if several arrived at once
+        for line in reversed(lines):
+            if not line.strip():
+                continue
+            try:
+                value = self.parse(line)
+            except ValueError:
+                continue
+            if value is None:
+                continue
+            self.latest = value
+            self.updated = time.monotonic()
+            self.lines += 1
+            self.changed()
+            break
+
+    def changed(self):
+        """Called on the loop after `latest` was updated from a new line."""
+
+    def age(self):
+        return time.monotonic() - self.updated
@@ -0,0 +1,110 @@
+"""Recolour the running bar and layouts in place.
+
+Applying new colours used to mean reload_config, which tears down and
+rebuilds every widget, layout and key binding. Instead, every themed
+object is registered with the colour *role* each of its attributes takes
+(GroupBox.active <- "fg", Sparkline.graph_color <- "mauve", ...), and
+apply() writes the new values into the live objects and redraws each bar
+once. Sampler state, histories and running polls are left alone.
+"""
+
+import json
+
+DEFAULT_COLORS = {
+    "bg": "#1e1e2e",
+    "fg": "#cdd6f4",
+    "surface": "#313244",
+    "blue": "#89b4fa",
+    "mauve": "#cba6f7",
+    "red": "#f38ba8",
+    "green": "#a6e3a1",
+    "yellow": "#f9e2af",
+}
+
+
+def load_colors(path):
+    """qtile_theme.json merged over the defaults, so a missing key can't break the bar."""
+    colors = dict(DEFAULT_COLORS)
+    try:
+        with open(path, "r") as f:
+            colors.update(json.load(f))
+    except (FileNotFoundError, ValueError):
+        pass
+    return colors
+
+
+class Theme:
+    def __init__(self, colors):
+        # The dict the config reads from; apply() updates it in place
+        self.colors = colors
+        self._bindings = []
+        self._bars = []
+        self._layouts = []
+        self._layout_roles = {}
+
+    def build(self, cls, roles, *args, **config):
+        """Construct cls with each attr in `roles` set to its colour, and bind it.
+
+            theme.build(widget.Sep, {"foreground": "surface"}, padding=10)
+        """
+        for attr, role in roles.items():
+            config[attr] = self.colors[role]
+        return self.bind(cls(*args, **config), **roles)
+
+    def bind(self, obj, **roles):
+        self._bindings.append((obj, roles))
+        return obj
+
+    def bind_bar(self, bar, role="bg"):
+        """The bar and every widget on it take their background from `role`."""
+        self._bars.append((bar, role))
+        return bar
+
+    def bind_layouts(self, layouts, **roles):
+        """Border colours for the layout templates and every group's copy of them."""
+        self._layouts = layouts
+        self._layout_roles = roles
+        return layouts
+
+    def apply(self, colors, qtile=None):
+        """Recolour everything bound to this theme; returns the roles that changed."""
+        changed = sorted(
+            role for role, value in colors.items() if self.colors.get(role) != value
+        )
+        self.colors.update(colors)
+
+        for obj, roles in self._bindings:
+            values = {attr: self.colors[role] for attr, role in roles.items()}
+            recolor = getattr(obj, "recolor", None)
+            if recolor is not None:
+                recolor(**values)
+            else:
+                for attr, value in values.items():
+                    setattr(obj, attr, value)
+
+        self._apply_layouts(qtile)
+
+        for bar, role in self._bars:
+            background = self.colors[role]
+            bar.background = background
+            for widget in bar.widgets:
+                widget.background = background
+            # Only bars that have been placed on a screen can draw
+            if getattr(bar, "window", None) is not None:
+                bar.draw()
+        return changed
+
+    def _apply_layouts(self, qtile):
+        values = {attr: self.colors[role] for attr, role in self._layout_roles.items()}
+        live = []
+        if qtile is not None:
+            for group in qtile.groups:
+                live.extend(group.layouts)
+        for layout in [*self._layouts, *live]:
+            for attr, value in values.items():
+                if hasattr(layout, attr):
+                    setattr(layout, attr, value)
+        if qtile is not None:
+            for group in qtile.groups:
+                if group.screen is not None:
+                    group.layout_all()
@@ -0,0 +1,377 @@
+"""Desktop notifications without forking notify-send.
+
+Shared by the Qtile config (workspace, volume/media and game mode
+notifications) and theme_sync.py:
+
+  * SessionBus holds one session bus connection (dbus_fast), reconnected
+    after it drops, for anything that talks to the bus
+  * Notifier queues messages and sends them from one flush task. Messages
+    with a tag replace the previous notification for that tag in place
+    (replaces_id plus dunst's x-dunst-stack-tag), and a newer message for
+    a tag that is still queued replaces the queued one, so a burst costs
+    one Notify per tag. Nothing is sent until a daemon owns
+    org.freedesktop.Notifications; a restarted dunst is waited for instead
+    of slept for.
+  * notify() is the one-shot version for short-lived scripts
+
+Without dbus_fast, or without a session bus, it falls back to notify-send.
+"""
+
+import asyncio
+import itertools
+import logging
+import subprocess
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+try:
+    from dbus_fast import BusType, Message, MessageType, Variant
+    from dbus_fast.aio import MessageBus
+
+    has_dbus = True
+except ImportError:
+    has_dbus = False
+
+NOTIFICATIONS = "org.freedesktop.Notifications"
+NOTIFICATIONS_PATH = "/org/freedesktop/Notifications"
+DBUS = "org.freedesktop.DBus"
+DBUS_PATH = "/org/freedesktop/DBus"
+URGENCY = {"low": 0, "normal": 1, "critical": 2}
+# Error replies meaning the daemon went away mid-call; worth one retry
+RETRYABLE = {
+    "org.freedesktop.DBus.Error.ServiceUnknown",
+    "org.freedesktop.DBus.Error.NameHasNoOwner",
+    "org.freedesktop.DBus.Error.NoReply",
+}
+
+
+class BusError(OSError):
+    """An error reply; `name` is the D-Bus error name."""
+
+    def __init__(self, name, text=""):
+        super().__init__(f"{name}: {text}")
+        self.name = name
+
+
+# ─── Session bus ──────────────────────────────────────────────────────────────
+
+
+class SessionBus:
+    """Lazily connected session bus, reconnected after it drops."""
+
+    def __init__(self):
+        self._bus = None
+        self._connecting = None
+        self._handlers = []
+        self._matches = []
+
+    async def get(self):
+        if self._bus is not None and self._bus.connected:
+            return self._bus
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._connect())
+        try:
+            return await asyncio.shield(self._connecting)
+        except Exception as e:
+            # No session bus (or a bad address): callers only handle OSError
+            raise OSError(f"session bus: {e}") from e
+        finally:
+            if self._connecting is not None and self._connecting.done():
+                self._connecting = None
+
+    async def _connect(self):
+        bus = await MessageBus(bus_type=BusType.SESSION).connect()
+        for rule in self._matches:
+            await self._add_match(bus, rule)
+        for handler in self._handlers:
+            bus.add_message_handler(handler)
+        self._bus = bus
+        return bus
+
+    async def _add_match(self, bus, rule):
+        await bus.call(
+            Message(
+                destination=DBUS,
+                path=DBUS_PATH,
+                interface=DBUS,
+                member="AddMatch",
+                signature="s",
+                body=[rule],
+            )
+        )
+
+    async def subscribe(self, rule, handler):
+        """Deliver messages matching `rule` to handler, across reconnects."""
+        self._matches.append(rule)
+        self._handlers.append(handler)
+        if self._bus is not None and self._bus.connected:
+            await self._add_match(self._bus, rule)
+            self._bus.add_message_handler(handler)
+
+    async def call(self, destination, path, interface, member, signature="", body=()):
+        bus = await self.get()
+        reply = await bus.call(
+            Message(
+                destination=destination,
+                path=path,
+                interface=interface,
+                member=member,
+                signature=signature,
+                body=list(body),
+            )
+        )
+        if reply.message_type == MessageType.ERROR:
+            raise BusError(reply.error_name, reply.body[0] if reply.body else "")
+        return reply.body
+
+    async def name_owner(self, name):
+        """Unique name currently owning `name`, or None."""
+        try:
+            (owner,) = await self.call(DBUS, DBUS_PATH, DBUS, "GetNameOwner", "s", [name])
+        except BusError as e:
+            if e.name == "org.freedesktop.DBus.Error.NameHasNoOwner":
+                return None
+            raise
+        return owner
+
+    def close(self):
+        if self._bus is not None:
+            self._bus.disconnect()
+            self._bus = None
+
+
+# ─── Notifications ────────────────────────────────────────────────────────────
+
+
+def _notify_send(tag, summary, body, timeout, value, urgency):
+    argv = ["notify-send"]
+    if timeout >= 0:
+        argv += ["-t", str(timeout)]
+    if tag is not None:
+        argv += ["-h", f"string:x-dunst-stack-tag:{tag}"]
+    if value is not None:
+        argv += ["-h", f"int:value:{int(value)}"]
+    if urgency is not None:
+        argv += ["-u", urgency]
+    subprocess.Popen([*argv, summary, body])
+
+
+class Notifier:
+    """Queued notifications, replaced in place per tag.
+
+    notify() records the message and returns; it has to be called from
+    the event loop. `timeout` is in ms, -1 for the daemon's default. A
+    message is sent once more if the daemon went away mid-call, and
+    dropped if that fails too; any other failure, or no daemon showing up
+    within `wait` seconds, goes out through notify-send instead.
+    """
+
+    def __init__(self, bus=None, app_name="qtile", max_queue=32, recheck=1.0, wait=30.0):
+        self.bus = bus
+        self.app_name = app_name
+        self.max_queue = max_queue
+        # How often to ask the bus again while waiting for a daemon, in
+        # case an owner change was missed across a reconnect
+        self.recheck = recheck
+        self.wait = wait
+        # A daemon that is being replaced (theme_sync restarting dunst):
+        # wait for the next owner instead of sending to this one
+        self.stale_owner = None
+
+        self.sent = 0
+        self.coalesced = 0
+        self._ids = {}
+        self._pending = OrderedDict()
+        self._untagged = itertools.count()
+        self._owner = None
+        self._owner_changed = asyncio.Event()
+        self._watching = False
+        self._task = None
+
+    def notify(self, summary, body="", tag=None, timeout=-1, value=None, urgency=None):
+        key = tag if tag is not None else next(self._untagged)
+        if self._pending.pop(key, None) is not None:
+            self.coalesced += 1
+        self._pending[key] = [tag, summary, body, timeout, value, urgency, 0]
+        while len(self._pending) > self.max_queue:
+            self._pending.popitem(last=False)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def flush(self):
+        """Wait until everything queued so far has been sent or dropped."""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    async def _flush(self):
+        while self._pending:
+            if self.bus is None:
+                self._fallback()
+                return
+            try:
+                await self._wait_for_daemon()
+            except asyncio.TimeoutError:
+                logger.warning("no notification daemon after %.1fs", self.wait)
+                self._fallback()
+                return
+            except OSError as e:
+                logger.warning("notification over the bus failed: %s", e)
+                self._fallback()
+                return
+            batch = list(self._pending.items())
+            self._pending.clear()
+            results = await asyncio.gather(
+                *(self._send(message) for _, message in batch), return_exceptions=True
+            )
+            for (key, message), result in zip(batch, results):
+                if not isinstance(result, BaseException):
+                    continue
+                if not (isinstance(result, BusError) and result.name in RETRYABLE):
+                    if isinstance(result, OSError):
+                        logger.warning("notification %r failed: %s", message[1], result)
+                    else:
+                        logger.error("notification %r failed", message[1], exc_info=result)
+                    _notify_send(*message[:6])
+                    continue
+                logger.warning("notification %r failed: %s", message[1], result)
+                # The daemon went away between the check and the call: wait
+                # for the next one and try once more
+                self._owner = None
+                message[6] += 1
+                if message[6] < 2 and key not in self._pending:
+                    self._pending[key] = message
+
+    async def _send(self, message):
+        tag, summary, body, timeout, value, urgency, _ = message
+        hints = {}
+        if tag is not None:
+            hints["x-dunst-stack-tag"] = Variant("s", tag)
+        if value is not None:
+            hints["value"] = Variant("i", int(value))
+        if urgency is not None:
+            hints["urgency"] = Variant("y", URGENCY[urgency])
+        (notification_id,) = await self.bus.call(
+            NOTIFICATIONS,
+            NOTIFICATIONS_PATH,
+            NOTIFICATIONS,
+            "Notify",
+            "susssasa{sv}i",
+            [self.app_name, self._ids.get(tag, 0), "", summary, body, [], hints, timeout],
+        )
+        if tag is not None:
+            self._ids[tag] = notification_id
+        self.sent += 1
+
+    def _fallback(self):
+        for tag, summary, body, timeout, value, urgency, _ in self._pending.values():
+            _notify_send(tag, summary, body, timeout, value, urgency)
+        self._pending.clear()
+
+    # Daemon tracking
+
+    def _on_message(self, message):
+        if message.member == "NameOwnerChanged" and message.body[0] == NOTIFICATIONS:
+            self._set_owner(message.body[2] or None)
+
+    def _set_owner(self, owner):
+        if owner != self._owner:
+            # Ids belong to the daemon that handed them out
+            self._ids.clear()
+        self._owner = owner
+        self._owner_changed.set()
+
+    async def _wait_for_daemon(self):
+        if not self._watching:
+            await self.bus.subscribe(
+                f"type='signal',sender='{DBUS}',interface='{DBUS}',"
+                f"member='NameOwnerChanged',arg0='{NOTIFICATIONS}'",
+                self._on_message,
+            )
+            self._watching = True
+            self._set_owner(await self.bus.name_owner(NOTIFICATIONS))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait
+        while self._owner is None or self._owner == self.stale_owner:
+            self._owner_changed.clear()
+            left = deadline - loop.time()
+            if left <= 0:
+                raise asyncio.TimeoutError
+            try:
+                await asyncio.wait_for(self._owner_changed.wait(), min(self.recheck, left))
+            except asyncio.TimeoutError:
+                self._set_owner(await self.bus.name_owner(NOTIFICATIONS))
+
+
+# ─── One-shot use from scripts ────────────────────────────────────────────────
+
+
+def daemon_owner():
+    """Unique bus name of the running notification daemon, or None."""
+    if not has_dbus:
+        return None
+
+    async def query():
+        bus = SessionBus()
+        try:
+            return await bus.name_owner(NOTIFICATIONS)
+        finally:
+            bus.close()
+
+    try:
+        return asyncio.run(query())
+    except OSError:
+        return None
+
+
+def wait_for_daemon(stale_owner=None, timeout=5.0):
+    """Block until a daemon other than `stale_owner` owns the notification name.
+
+    Returns its unique bus name, or None after `timeout` seconds or
+    without a bus.
+    """
+    if not has_dbus:
+        return None
+
+    async def wait():
+        bus = SessionBus()
+        notifier = Notifier(bus, wait=timeout)
+        notifier.stale_owner = stale_owner
+        try:
+            await notifier._wait_for_daemon()
+            return notifier._owner
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            bus.close()
+
+    try:
+        return asyncio.run(wait())
+    except OSError:
+        return None
+
+
+def notify(summary, body="", tag=None, timeout=-1, value=None, urgency=None,
+           app_name="notify", wait=5.0, stale_owner=None):
+    """Show one notification, waiting up to `wait` seconds for a daemon.
+
+    Pass the daemon_owner() from before restarting the daemon as
+    `stale_owner` to have the message go to the new one.
+    """
+    if not has_dbus:
+        _notify_send(tag, summary, body, timeout, value, urgency)
+        return
+
+    async def send():
+        bus = SessionBus()
+        notifier = Notifier(bus, app_name)
+        notifier.stale_owner = stale_owner
+        notifier.notify(summary, body, tag, timeout, value, urgency)
+        try:
+            await asyncio.wait_for(notifier.flush(), wait)
+        except asyncio.TimeoutError:
+            logger.warning("no notification daemon after %.1fs, dropped %r", wait, summary)
+        finally:
+            bus.close()
+
+    asyncio.run(send())
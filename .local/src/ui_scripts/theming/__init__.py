@@ -0,0 +1,14 @@
+"""Wallpaper-driven theming, as a library.
+
+  palette  wallpaper -> pywal colours -> qtile_theme roles
+  extract  pywal's colorthief palette in-process (numpy)
+  cache    palettes by wallpaper content, LRU-bounded
+  walfiles pywal's ~/.cache/wal outputs, without running wal
+  render   qtile_theme -> the generated config files
+  apply    pushing it to the running desktop (feh, dunst, Qtile, Spotify)
+  sync     ThemeSync: one wallpaper change, with state kept in memory
+  daemon   a warm ThemeSync behind a Unix socket
+
+theme_sync.py is the command line front end. Nothing is imported here, so
+a client that only talks to the daemon doesn't load the rest.
+"""
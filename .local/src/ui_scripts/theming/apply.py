@@ -0,0 +1,189 @@
+"""Pushing a new theme to the running desktop.
+
+plan() turns the render targets that write_configs() actually changed
+into the reloads they need, and each reload waits for its service to be
+ready (the old process gone, the new dunst on the bus) rather than
+sleeping a fixed time.
+"""
+
+import ast
+import json
+import os
+import select
+import signal
+import subprocess
+import time
+
+from notifications import daemon_owner, notify, wait_for_daemon
+
+FEH = "/usr/bin/feh"
+PAPIRUS_FOLDERS = "/usr/bin/papirus-folders"
+SPOTIFY = "/usr/bin/spotify"
+SPICETIFY = os.path.expanduser("~/.spicetify/spicetify")
+DUNSTRC = os.path.expanduser("~/.config/dunst/dunstrc")
+
+# How long a service gets to stop, or to come up, before moving on
+TIMEOUT = 5.0
+
+_QUIET = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+
+# Render target -> the reload that picks it up; targets missing here
+# (the gtk.css files) are read by apps on their own
+RELOADS = {
+    "dunst": "dunst",
+    "qtile": "qtile",
+    "spicetify": "spotify",
+}
+
+
+def set_wallpaper(wall_path):
+    subprocess.run([FEH, "--bg-fill", wall_path])
+
+
+def update_folders(color):
+    """Recolour the Papirus folder icons (asynchronously; it needs sudo)."""
+    folder_cmd = (
+        f"sudo {PAPIRUS_FOLDERS} -C {color} --theme Papirus-Dark"
+        " && sudo gtk-update-icon-cache -f /usr/share/icons/Papirus-Dark && killall nautilus"
+    )
+    subprocess.Popen(folder_cmd, shell=True, **_QUIET)
+
+
+# ─── Processes ────────────────────────────────────────────────────────────────
+
+
+def pids(name):
+    """Pids of processes whose comm is `name` (what killall matches)."""
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/comm") as f:
+                if f.read().rstrip("\n") == name:
+                    found.append(int(entry))
+        except OSError:
+            continue
+    return found
+
+
+def _wait_exit(pid, timeout):
+    try:
+        fd = os.pidfd_open(pid)
+    except ProcessLookupError:
+        return True
+    try:
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+        return bool(poller.poll(timeout * 1000))
+    finally:
+        os.close(fd)
+
+
+def stop(name, timeout=TIMEOUT):
+    """SIGTERM every `name` process and wait for them to exit (SIGKILL after timeout)."""
+    targets = pids(name)
+    for pid in targets:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + timeout
+    for pid in targets:
+        if not _wait_exit(pid, max(0.0, deadline - time.monotonic())):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+    return bool(targets)
+
+
+# ─── Reloads ──────────────────────────────────────────────────────────────────
+
+
+def plan(written):
+    """The reloads needed after write_configs() wrote `written`, in order."""
+    needed = {RELOADS[name] for name in written if name in RELOADS}
+    return [step for step in RELOADS.values() if step in needed]
+
+
+def restart_dunst(timeout=TIMEOUT):
+    """Restart dunst on the new dunstrc; returns the old daemon's bus name.
+
+    Returns once the new dunst owns the notification name, or after
+    `timeout`.
+    """
+    old_dunst = daemon_owner()
+    stop("dunst", timeout)
+    subprocess.Popen(["dunst", "-conf", DUNSTRC], start_new_session=True, **_QUIET)
+    wait_for_daemon(old_dunst, timeout)
+    return old_dunst
+
+
+def _status(output):
+    """The "status" of the dict set_theme returned, as cmd-obj printed it.
+
+    cmd-obj reports a missing widget or command on stdout, not always via
+    the exit code, so anything but a status dict counts as a failure.
+    """
+    try:
+        result = ast.literal_eval(output.decode())
+    except (ValueError, SyntaxError, UnicodeDecodeError):
+        return None
+    return result.get("status") if isinstance(result, dict) else None
+
+
+def recolor_qtile(theme):
+    """Recolour the running bar in place; reload_config if that isn't possible."""
+    recolor = subprocess.run(
+        [
+            "qtile", "cmd-obj", "-o", "widget", "control",
+            "-f", "set_theme", "-a", json.dumps(theme),
+        ],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+    )
+    if recolor.returncode != 0 or _status(recolor.stdout) != "ok":
+        subprocess.Popen(["qtile", "cmd-obj", "-o", "cmd", "-f", "reload_config"], **_QUIET)
+
+
+def reload_spotify(timeout=TIMEOUT):
+    """Re-apply the spicetify theme, restarting Spotify if it is running."""
+    if stop("spotify", timeout):
+        command = f"{SPICETIFY} apply && {SPOTIFY}"
+    else:
+        command = f"{SPICETIFY} apply"
+    subprocess.Popen(command, shell=True, start_new_session=True, **_QUIET)
+
+
+def notify_updated(wall_name, old_dunst=None):
+    # Queued until a dunst other than old_dunst owns the notification name
+    notify(
+        "Theme Updated", f"Matched colors to {wall_name}",
+        tag="theme", app_name="theme_sync", stale_owner=old_dunst,
+    )
+
+
+def run(steps, theme, wall_name):
+    """Do the planned reloads and notify; returns seconds taken per step.
+
+    The notification goes out before Spotify is restarted, which is the
+    slowest step and the one nobody is looking at.
+    """
+    timings = {}
+    old_dunst = None
+
+    def timed(name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    if "dunst" in steps:
+        old_dunst = timed("dunst", restart_dunst)
+    if "qtile" in steps:
+        timed("qtile", recolor_qtile, theme)
+    timed("notify", notify_updated, wall_name, old_dunst)
+    if "spotify" in steps:
+        timed("spotify", reload_spotify)
+    return timings
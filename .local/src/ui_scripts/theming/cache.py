@@ -0,0 +1,170 @@
+"""Palettes cached by wallpaper content, in a size-bounded LRU.
+
+A wallpaper's key is a hash of its size and its first and last 64 KiB, so
+two different images with the same name don't collide and an edited image
+gets a fresh palette. Hashing is skipped while a path's size and mtime
+still match what was recorded for it.
+
+Everything but the pywal colours lives in one index.json, read once (and
+again only if another process rewrote it). Each entry's pywal colors.json
+is a blob next to it, named by key, so the index stays small.
+Writes go through a temp file and a rename. Least recently used entries
+are evicted past max_entries or max_bytes of blobs.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+MAX_ENTRIES = 64
+MAX_BYTES = 4 * 1024 * 1024
+
+_CHUNK = 64 * 1024
+_VERSION = 1
+
+
+def atomic_write(path, data):
+    """Replace `path` with `data` (str) without ever leaving it half-written.
+
+    A symlinked path has its target replaced, and an existing file keeps
+    its permissions.
+    """
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o644
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def content_key(path, size):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(size.to_bytes(8, "little"))
+    with open(path, "rb") as f:
+        h.update(f.read(_CHUNK))
+        if size > 2 * _CHUNK:
+            f.seek(-_CHUNK, os.SEEK_END)
+            h.update(f.read(_CHUNK))
+        elif size > _CHUNK:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class ThemeCache:
+    def __init__(self, directory, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.index_file = os.path.join(directory, "index.json")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._index = None
+        self._index_mtime = None
+        self._dirty = False
+
+    # ─── Index ────────────────────────────────────────────────────────────────
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.index_file).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._index is not None and mtime == self._index_mtime:
+            return self._index
+        index = None
+        if mtime is not None:
+            try:
+                with open(self.index_file) as f:
+                    index = json.load(f)
+            except ValueError:
+                index = None
+        if not index or index.get("version") != _VERSION:
+            index = {"version": _VERSION, "paths": {}, "entries": {}}
+        self._index = index
+        self._index_mtime = mtime
+        self._dirty = False
+        return index
+
+    def save(self):
+        """Write the index if anything changed since it was read."""
+        if not self._dirty:
+            return
+        atomic_write(self.index_file, json.dumps(self._index))
+        self._index_mtime = os.stat(self.index_file).st_mtime_ns
+        self._dirty = False
+
+    # ─── Lookup ───────────────────────────────────────────────────────────────
+
+    def key(self, wall_path):
+        """The content key for a wallpaper, rehashing only if it changed."""
+        paths = self._load()["paths"]
+        st = os.stat(wall_path)
+        known = paths.get(wall_path)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+        key = content_key(wall_path, st.st_size)
+        paths.pop(wall_path, None)
+        paths[wall_path] = [st.st_size, st.st_mtime_ns, key]
+        # Remembered paths only save a rehash; keep a few per entry
+        while len(paths) > 4 * self.max_entries:
+            del paths[next(iter(paths))]
+        self._dirty = True
+        return key
+
+    def blob(self, key):
+        return os.path.join(self.directory, f"{key}.pywal.json")
+
+    def get(self, key):
+        """The cached entry ({"qtile_theme", "closest_color"}) or None."""
+        entries = self._load()["entries"]
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if not os.path.exists(self.blob(key)):
+            del entries[key]
+            self._dirty = True
+            return None
+        entry["used"] = time.time()
+        self._dirty = True
+        return entry
+
+    def put(self, key, qtile_theme, closest_color, pywal_raw):
+        entries = self._load()["entries"]
+        atomic_write(self.blob(key), pywal_raw)
+        entries[key] = {
+            "qtile_theme": qtile_theme,
+            "closest_color": closest_color,
+            "bytes": len(pywal_raw.encode()),
+            "used": time.time(),
+        }
+        self._dirty = True
+        self._evict(keep=key)
+
+    # ─── Eviction ─────────────────────────────────────────────────────────────
+
+    def _evict(self, keep):
+        entries = self._index["entries"]
+        total = sum(e["bytes"] for e in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["used"]):
+            if len(entries) <= self.max_entries and total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= entries.pop(key)["bytes"]
+            try:
+                os.unlink(self.blob(key))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,96 @@
+"""Keep one ThemeSync warm behind a Unix socket.
+
+Each connection sends one JSON line, {"wallpaper": "/path"}, and gets one
+JSON line back: the sync() result plus "ok", or {"ok": false, "error"}.
+Requests are handled one at a time, so two wallpaper changes can't
+interleave their writes.
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import sys
+
+from .palette import PaletteError
+
+logger = logging.getLogger(__name__)
+
+
+def socket_path():
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR") or "/tmp", "theme_sync.sock")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            reply = {"ok": True, **self.server.syncer.sync(request["wallpaper"])}
+        except PaletteError as e:
+            reply = {"ok": False, "error": str(e)}
+        except Exception as e:
+            logger.exception("theme sync failed")
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+class _Server(socketserver.UnixStreamServer):
+    def __init__(self, path, syncer):
+        self.syncer = syncer
+        super().__init__(path, _Handler)
+
+
+def _claim(path):
+    # A stale socket file from a crash refuses connections and is safe to
+    # replace; a live one means another daemon is running
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+    else:
+        raise OSError("another theme_sync daemon is listening")
+    finally:
+        probe.close()
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def serve(syncer, path=None):
+    """Serve sync requests until interrupted or terminated."""
+    path = path or socket_path()
+    _claim(path)
+    server = _Server(path, syncer)
+    # Leave through the finally below (removing the socket) on SIGTERM too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def request(wall_path, path=None, timeout=120):
+    """Have a running daemon sync `wall_path`; returns its reply.
+
+    Raises FileNotFoundError or ConnectionRefusedError if no daemon is
+    listening, TimeoutError if it doesn't answer within `timeout`.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or socket_path())
+        sock.sendall(json.dumps({"wallpaper": os.path.abspath(wall_path)}).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionResetError("theme_sync daemon closed the connection")
+    return json.loads(line)
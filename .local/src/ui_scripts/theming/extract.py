@@ -0,0 +1,263 @@
+"""pywal's colorthief palette, computed in-process with NumPy.
+
+Same steps as `wal --backend colorthief --saturate 0.6`: take every 10th
+pixel, quantize with colorthief's modified median cut (MMCQ) over a 5-bit
+histogram, asking for one more colour until there are 8, sort them by
+luma, double them up to 16 and apply pywal's dark-scheme adjustments and
+saturation. It samples the same pixels as colorthief and cuts the same
+boxes, so the colours are wal's; the time saved is colorthief's
+pure-Python loops over the pixels, wal's interpreter start-up and its
+cache writes.
+
+Needs numpy and Pillow; has_numpy is False without them and callers fall
+back to running wal.
+"""
+
+import colorsys
+import json
+
+from .palette import PaletteError
+
+try:
+    import numpy as np
+    from PIL import Image
+
+    has_numpy = True
+except ImportError:
+    has_numpy = False
+
+COLOR_COUNT = 8
+SATURATE = 0.6
+
+# colorthief's `quality`: every 10th pixel, in raster order
+_STEP = 10
+_SIGBITS = 5
+_SHIFT = 8 - _SIGBITS
+# Split by population for the first 75% of boxes, then by population x volume
+_BY_POPULATION = 0.75
+_MAX_ITERATIONS = 1000
+# The two axes to sum over to project a box onto each channel
+_OTHER = ((1, 2), (0, 2), (0, 1))
+
+
+# ─── Colour helpers (pywal's, on hex strings) ─────────────────────────────────
+
+
+def _hex(rgb):
+    return "#{:02x}{:02x}{:02x}".format(*rgb)
+
+
+def _rgb(hex_str):
+    hex_str = hex_str.lstrip("#")
+    return tuple(int(hex_str[i : i + 2], 16) for i in (0, 2, 4))
+
+
+def _lighten(color, amount):
+    return _hex([int(c + (255 - c) * amount) for c in _rgb(color)])
+
+
+def _darken(color, amount):
+    return _hex([int(c * (1 - amount)) for c in _rgb(color)])
+
+
+def _saturation(color, amount, add=False):
+    h, l, s = colorsys.rgb_to_hls(*(c / 255.0 for c in _rgb(color)))
+    s = max(-1.0, min(1.0, s + amount)) if add else amount
+    return _hex(int(c * 255.0) for c in colorsys.hls_to_rgb(h, l, s))
+
+
+# ─── Quantization ─────────────────────────────────────────────────────────────
+
+
+def load_histogram(wall_path):
+    """Every 10th pixel of the wallpaper, counted in 5-bit (32, 32, 32) cells.
+
+    Like colorthief, transparent and near-white pixels are left out.
+    """
+    try:
+        with Image.open(wall_path) as img:
+            alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+            img = img.convert("RGBA" if alpha else "RGB")
+            pixels = np.asarray(img).reshape(-1, 4 if alpha else 3)
+    except OSError as e:
+        raise PaletteError(f"Can't read {wall_path}: {e}") from e
+    pixels = np.ascontiguousarray(pixels[::_STEP])
+    if alpha:
+        pixels = np.ascontiguousarray(pixels[pixels[:, 3] >= 125, :3])
+    q = (pixels >> _SHIFT).astype(np.uint16)
+    index = (q[:, 0] << 2 * _SIGBITS) | (q[:, 1] << _SIGBITS) | q[:, 2]
+    size = 1 << _SIGBITS
+    histogram = np.bincount(index, minlength=size**3)
+    # Near-white pixels can only be in the top cell, so only its pixels are checked
+    top = size**3 - 1
+    if histogram[top]:
+        histogram[top] -= np.count_nonzero((pixels[index == top] > 250).all(axis=1))
+    return histogram.reshape(size, size, size)
+
+
+class _Box:
+    """An MMCQ box: inclusive 5-bit bounds per channel over the histogram."""
+
+    __slots__ = ("lo", "hi", "count", "volume")
+
+    def __init__(self, histogram, lo, hi):
+        self.lo = lo
+        self.hi = hi
+        self.count = int(self.view(histogram).sum())
+        self.volume = int(np.prod([h - l + 1 for l, h in zip(lo, hi)]))
+
+    def view(self, histogram):
+        return histogram[tuple(slice(l, h + 1) for l, h in zip(self.lo, self.hi))]
+
+
+class _Queue:
+    """colorthief's PQueue: re-sorted (stably) on the first pop after a push."""
+
+    def __init__(self, key):
+        self.key = key
+        self.items = []
+        self.sorted = False
+
+    def push(self, item):
+        self.items.append(item)
+        self.sorted = False
+
+    def pop(self):
+        if not self.sorted:
+            self.items.sort(key=self.key)
+            self.sorted = True
+        return self.items.pop()
+
+
+def _cut(histogram, box):
+    """colorthief's median_cut_apply: the box split in two, or (box, None)."""
+    if box.count == 1:
+        return box, None
+    widths = [h - l + 1 for l, h in zip(box.lo, box.hi)]
+    axis = widths.index(max(widths))
+    partial = np.cumsum(box.view(histogram).sum(axis=_OTHER[axis]))
+    total = int(partial[-1])
+    first, last = box.lo[axis], box.hi[axis]
+    i = first + int(np.argmax(partial > total / 2))
+    left, right = i - first, last - i
+    if left <= right:
+        cut = min(last - 1, int(i + right / 2))
+    else:
+        cut = max(first, int(i - 1 - left / 2))
+
+    def partial_at(j):
+        return int(partial[j - first]) if first <= j <= last else 0
+
+    # Never leave an empty box on either side
+    while not partial_at(cut):
+        cut += 1
+    while total - partial_at(cut) == 0 and partial_at(cut - 1):
+        cut -= 1
+    hi = list(box.hi)
+    hi[axis] = cut
+    lo = list(box.lo)
+    lo[axis] = cut + 1
+    return _Box(histogram, box.lo, tuple(hi)), _Box(histogram, tuple(lo), box.hi)
+
+
+def _split(histogram, queue, target):
+    boxes = 1
+    for _ in range(_MAX_ITERATIONS):
+        box = queue.pop()
+        if not box.count:
+            queue.push(box)
+            continue
+        first, second = _cut(histogram, box)
+        queue.push(first)
+        if second is not None:
+            queue.push(second)
+            boxes += 1
+        if boxes >= target:
+            return
+
+
+def quantize(histogram, count=COLOR_COUNT):
+    """colorthief's palette of `count` for a load_histogram(): modified
+    median cut (MMCQ), which gives up to count - 1 colours."""
+    size = 1 << _SIGBITS
+    occupied = [np.flatnonzero(histogram.sum(axis=_OTHER[axis])) for axis in range(3)]
+    queue = _Queue(lambda box: box.count)
+    queue.push(_Box(histogram, tuple(int(o[0]) for o in occupied), tuple(int(o[-1]) for o in occupied)))
+    _split(histogram, queue, _BY_POPULATION * count)
+    # Then by population x volume; colorthief counts this phase from 1 again,
+    # which is why it returns one colour short
+    by_volume = _Queue(lambda box: box.count * box.volume)
+    while queue.items:
+        by_volume.push(queue.pop())
+    _split(histogram, by_volume, count - len(by_volume.items))
+
+    centres = (np.arange(size) + 0.5) * (1 << _SHIFT)
+    colors = []
+    while by_volume.items:
+        box = by_volume.pop()
+        cells = box.view(histogram)
+        if box.count:
+            avg = [
+                (cells.sum(axis=_OTHER[axis]) * centres[box.lo[axis] : box.hi[axis] + 1]).sum()
+                / box.count
+                for axis in range(3)
+            ]
+        else:
+            avg = [(1 << _SHIFT) * (l + h + 1) / 2 for l, h in zip(box.lo, box.hi)]
+        colors.append(tuple(int(v) for v in avg))
+    return colors
+
+
+# ─── pywal's adjustments ──────────────────────────────────────────────────────
+
+
+def adjust(colors, saturate=SATURATE):
+    """pywal's colorthief + generic dark adjustments on 8 quantized colours."""
+    cols = sorted((_hex(c) for c in colors), key=lambda c: colorsys.rgb_to_yiq(*_rgb(c)))
+    raw = [*cols, *cols]
+    raw[0] = _darken(cols[0], 0.80)
+
+    if raw[0][1] != "0":
+        raw[0] = _darken(raw[0], 0.40)
+    if "0" in (raw[0][1], raw[0][3], raw[0][5]):
+        raw[0] = _saturation(_lighten(raw[0], 0.03), 0.40)
+    raw[7] = _lighten(raw[0], 0.75)
+    raw[8] = _saturation(_lighten(raw[0], 0.35), 0.10)
+    raw[15] = raw[7]
+
+    return [c if i in (7, 15) else _saturation(c, saturate, add=True) for i, c in enumerate(raw)]
+
+
+def palette(wall_path):
+    """color0..color15 for a wallpaper."""
+    histogram = load_histogram(wall_path)
+    if not histogram.any():
+        raise PaletteError(f"No colours found in {wall_path}")
+    # Like pywal: ask for a bigger palette until there are enough colours
+    for count in range(COLOR_COUNT, COLOR_COUNT + 10):
+        colors = quantize(histogram, count)
+        if len(colors) >= COLOR_COUNT:
+            break
+    else:
+        # A near-flat image has fewer distinct colours than slots (where
+        # wal gives up); repeat them
+        colors = (colors * COLOR_COUNT)[:COLOR_COUNT]
+    return {f"color{i}": c for i, c in enumerate(adjust(colors)[:16])}
+
+
+def colors_json(wall_path):
+    """palette() as the text of pywal's colors.json."""
+    colors = palette(wall_path)
+    return json.dumps(
+        {
+            "wallpaper": wall_path,
+            "alpha": "100",
+            "special": {
+                "background": colors["color0"],
+                "foreground": colors["color15"],
+                "cursor": colors["color15"],
+            },
+            "colors": colors,
+        },
+        indent=4,
+    )
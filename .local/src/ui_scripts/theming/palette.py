@@ -0,0 +1,90 @@
+"""Wallpaper -> pywal's 16 colours -> the qtile_theme roles."""
+
+import json
+import math
+import os
+import subprocess
+
+WAL = os.path.expanduser("~/.local/bin/wal")
+WAL_COLORS = os.path.expanduser("~/.cache/wal/colors.json")
+
+FACTOR = 0.6
+
+PAPIRUS_COLORS = {
+    "red": (244, 67, 54),
+    "pink": (233, 30, 99),
+    "violet": (156, 39, 176),
+    "indigo": (63, 81, 181),
+    "blue": (33, 150, 243),
+    "cyan": (0, 188, 212),
+    "teal": (0, 150, 136),
+    "green": (76, 175, 80),
+    "orange": (255, 152, 0),
+    "brown": (121, 85, 72),
+    "grey": (158, 158, 158),
+    "bluegrey": (96, 125, 139),
+}
+
+
+class PaletteError(RuntimeError):
+    pass
+
+
+def brighten(hex_str, factor=FACTOR):
+    hex_str = hex_str.lstrip("#")
+    r, g, b = tuple(int(hex_str[i : i + 2], 16) for i in (0, 2, 4))
+    r = int(r + (255 - r) * factor)
+    g = int(g + (255 - g) * factor)
+    b = int(b + (255 - b) * factor)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def hex_to_rgb(hex_color):
+    hex_color = hex_color.lstrip("#")
+    return tuple(int(hex_color[i : i + 2], 16) for i in (0, 2, 4))
+
+
+def closest_papirus_color(target_hex):
+    target_rgb = hex_to_rgb(target_hex)
+    closest_name = "blue"
+    min_dist = float("inf")
+
+    for name, rgb in PAPIRUS_COLORS.items():
+        dist = math.dist(target_rgb, rgb)
+        if dist < min_dist:
+            min_dist = dist
+            closest_name = name
+    return closest_name
+
+
+def qtile_theme(wal):
+    """The qtile_theme.json roles from pywal's color0..color15."""
+    return {
+        "bg": wal["color0"],
+        "surface": wal["color8"],
+        "fg": wal["color15"],
+        "red": brighten(wal["color9"]),
+        "green": brighten(wal["color10"]),
+        "yellow": brighten(wal["color11"]),
+        "blue": brighten(wal["color12"]),
+        "mauve": brighten(wal["color13"]),
+    }
+
+
+def run_wal(wall_path):
+    """Generate a palette with pywal; returns its colors.json text.
+
+    Running wal also writes pywal's own cache (~/.cache/wal), which rofi
+    and friends read.
+    """
+    subprocess.run(
+        [WAL, "-i", wall_path, "-q", "--backend", "colorthief", "--saturate", "0.6"],
+        stdin=subprocess.DEVNULL,
+    )
+    try:
+        with open(WAL_COLORS) as f:
+            raw = f.read()
+        json.loads(raw)["colors"]
+    except (OSError, ValueError, KeyError) as e:
+        raise PaletteError("Pywal failed.") from e
+    return raw
@@ -0,0 +1,142 @@
+"""The config files generated from a qtile_theme palette."""
+
+import concurrent.futures
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+from .cache import atomic_write
+
+CONFIG = os.path.expanduser("~/.config")
+
+
+def qtile_theme_json(theme):
+    return json.dumps(theme, indent=4)
+
+
+def dunstrc(theme):
+    return f"""[global]
+font = Sans 10
+corner_radius = 15
+origin = top-right
+offset = 15x15
+width = 300
+height = 100
+frame_width = 2
+separator_color = frame
+padding = 10
+horizontal_padding = 12
+separator_height = 2
+format = "<b>%s</b>\\n%b"
+icon_theme = Papirus-Dark, hicolor
+enable_recursive_icon_lookup = true
+
+[urgency_low]
+background = "{theme['bg']}"
+foreground = "{theme['fg']}"
+frame_color = "{theme['surface']}"
+highlight = "{theme['blue']}"
+timeout = 3
+
+[urgency_normal]
+background = "{theme['bg']}"
+foreground = "{theme['fg']}"
+frame_color = "{theme['surface']}"
+highlight = "{theme['mauve']}"
+timeout = 5
+
+[urgency_critical]
+background = "{theme['bg']}"
+foreground = "{theme['fg']}"
+frame_color = "{theme['red']}"
+highlight = "{theme['red']}"
+timeout = 0
+"""
+
+
+def gtk_css(theme):
+    return f"""
+@define-color accent_color {theme['blue']};
+@define-color sidebar_bg_color {theme['bg']};
+@define-color sidebar_fg_color {theme['fg']};
+@define-color sidebar_backdrop_color {theme['bg']};
+@define-color accent_bg_color {theme['blue']};
+@define-color window_bg_color {theme['bg']};
+@define-color window_fg_color {theme['fg']};
+@define-color view_bg_color {theme['bg']};
+@define-color view_fg_color {theme['fg']};
+@define-color headerbar_bg_color {theme['surface']};
+@define-color headerbar_fg_color {theme['fg']};
+@define-color popover_bg_color {theme['surface']};
+@define-color popover_fg_color {theme['fg']};
+@define-color card_bg_color {theme['surface']};
+@define-color card_fg_color {theme['fg']};
+@define-color dialog_bg_color {theme['bg']};
+@define-color dialog_fg_color {theme['fg']};
+"""
+
+
+def spicetify_ini(theme):
+    c = {role: value.lstrip("#") for role, value in theme.items()}
+    return f"""[Dynamic]
+text               = {c['fg']}
+subtext            = {c['blue']}
+main               = {c['bg']}
+sidebar            = {c['bg']}
+player             = {c['surface']}
+card               = {c['surface']}
+shadow             = {c['bg']}
+selected-row       = {c['surface']}
+button             = {c['blue']}
+button-active      = {c['mauve']}
+button-disabled    = {c['surface']}
+tab-active         = {c['blue']}
+notification       = {c['blue']}
+notification-error = {c['red']}
+misc               = {c['surface']}
+"""
+
+
+# ─── Targets ──────────────────────────────────────────────────────────────────
+
+# A generated file: `render(theme)` gives its content. Names are what
+# write_configs() reports, so callers can tell which consumers to reload.
+Target = namedtuple("Target", "name path render")
+
+TARGETS = [
+    Target("qtile", os.path.join(CONFIG, "qtile_theme.json"), qtile_theme_json),
+    Target("dunst", os.path.join(CONFIG, "dunst/dunstrc"), dunstrc),
+    Target("gtk4", os.path.join(CONFIG, "gtk-4.0/gtk.css"), gtk_css),
+    Target("gtk3", os.path.join(CONFIG, "gtk-3.0/gtk.css"), gtk_css),
+    Target("spicetify", os.path.join(CONFIG, "spicetify/Themes/Dynamic/color.ini"), spicetify_ini),
+]
+
+
+def _digest(data):
+    return hashlib.blake2b(data).digest()
+
+
+def _write_if_changed(path, content):
+    new = content.encode()
+    try:
+        with open(path, "rb") as f:
+            if _digest(f.read()) == _digest(new):
+                return False
+    except FileNotFoundError:
+        pass
+    atomic_write(path, content)
+    return True
+
+
+def write_configs(theme, targets=TARGETS):
+    """Render every target and write those whose content changed.
+
+    Unchanged files are left alone (mtime included), changed ones are
+    replaced atomically, and the writes run concurrently. Returns the
+    names of the targets written.
+    """
+    rendered = [(target.name, target.path, target.render(theme)) for target in targets]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(rendered) or 1) as pool:
+        futures = {name: pool.submit(_write_if_changed, path, content) for name, path, content in rendered}
+    return [name for name, future in futures.items() if future.result()]
@@ -0,0 +1,134 @@
+"""One wallpaper change, start to finish.
+
+ThemeSync keeps what a cold script would re-read on every run (the
+last-applied state and the palette cache index) in memory, so it can be
+used once from the command line or kept warm in the daemon.
+"""
+
+import json
+import os
+import time
+
+from . import apply, extract, palette, render, walfiles
+from .cache import MAX_BYTES, MAX_ENTRIES, ThemeCache, atomic_write
+
+CACHE_DIR = os.path.expanduser("~/.cache/theme_sync")
+
+
+class ThemeSync:
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.state_file = os.path.join(cache_dir, "state.json")
+        self.cache = ThemeCache(cache_dir, max_entries, max_bytes)
+        self._state = None
+        self._state_mtime = None
+
+    # ─── State ────────────────────────────────────────────────────────────────
+
+    def state(self):
+        """The last applied wallpaper (name and content key) and folder colour.
+
+        Re-read only if the file changed, e.g. because a one-off run
+        without the daemon wrote it.
+        """
+        try:
+            mtime = os.stat(self.state_file).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._state is None or mtime != self._state_mtime:
+            self._state = {"wallpaper": None, "key": None, "folder_color": None}
+            if mtime is not None:
+                with open(self.state_file) as f:
+                    self._state = json.load(f)
+            self._state_mtime = mtime
+        return self._state
+
+    def _save_state(self, state):
+        atomic_write(self.state_file, json.dumps(state))
+        self._state = state
+        self._state_mtime = os.stat(self.state_file).st_mtime_ns
+
+    # ─── Palettes ─────────────────────────────────────────────────────────────
+
+    def palette(self, wall_path, key):
+        """(qtile_theme, closest_color) for a wallpaper, generating it if needed.
+
+        Either way pywal's own cache ends up matching the wallpaper.
+        """
+        entry = self.cache.get(key)
+        if entry is not None:
+            with open(self.cache.blob(key)) as f:
+                walfiles.write(json.load(f), wall_path)
+            return entry["qtile_theme"], entry["closest_color"]
+
+        # Without numpy, wal generates the palette (and its own cache) itself
+        raw = extract.colors_json(wall_path) if extract.has_numpy else palette.run_wal(wall_path)
+        wal = json.loads(raw)
+        qtile_theme = palette.qtile_theme(wal["colors"])
+        closest_color = palette.closest_papirus_color(qtile_theme["blue"])
+        self.cache.put(key, qtile_theme, closest_color, raw)
+        if extract.has_numpy:
+            walfiles.write(wal, wall_path)
+        return qtile_theme, closest_color
+
+    # ─── Sync ─────────────────────────────────────────────────────────────────
+
+    def sync(self, wall_path):
+        """Set the wallpaper and match everything else to it.
+
+        Returns {"wallpaper", "changed", "written", "reloaded", "seconds",
+        "steps"}: the render targets whose files changed, the services
+        reloaded for them, the end-to-end time and the seconds spent per
+        step. Raises palette.PaletteError if no palette could be made.
+        """
+        start = time.perf_counter()
+        steps = {}
+
+        def lap(name, mark):
+            now = time.perf_counter()
+            steps[name] = now - mark
+            return now
+
+        wall_path = os.path.abspath(wall_path)
+        wall_name = os.path.basename(wall_path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        apply.set_wallpaper(wall_path)
+        mark = lap("wallpaper", start)
+        try:
+            key = self.cache.key(wall_path)
+        except OSError as e:
+            raise palette.PaletteError(f"Can't read {wall_path}: {e.strerror}") from e
+        current_state = self.state()
+        if current_state.get("key") == key:
+            self.cache.save()
+            return {
+                "wallpaper": wall_name,
+                "changed": False,
+                "written": [],
+                "reloaded": [],
+                "seconds": time.perf_counter() - start,
+                "steps": steps,
+            }
+
+        try:
+            qtile_theme, closest_color = self.palette(wall_path, key)
+        finally:
+            self.cache.save()
+        mark = lap("palette", mark)
+        written = render.write_configs(qtile_theme)
+        if current_state["folder_color"] != closest_color:
+            apply.update_folders(closest_color)
+        self._save_state({"wallpaper": wall_name, "key": key, "folder_color": closest_color})
+        lap("write", mark)
+
+        reloads = apply.plan(written)
+        steps.update(apply.run(reloads, qtile_theme, wall_name))
+        return {
+            "wallpaper": wall_name,
+            "changed": True,
+            "written": written,
+            "reloaded": reloads,
+            "seconds": time.perf_counter() - start,
+            "steps": steps,
+        }
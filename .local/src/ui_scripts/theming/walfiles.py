@@ -0,0 +1,239 @@
+"""pywal's ~/.cache/wal outputs, rendered in-process.
+
+`wal --theme` re-runs all of pywal just to rewrite a few files from a
+saved colors.json. The ones this setup reads are written here instead:
+colors.json itself, colors-rofi-dark.rasi (rofi's theme in the Qtile
+config), the wallpaper path, and the terminal escape sequences, which
+are also sent to every open terminal the way pywal does.
+"""
+
+import glob
+import json
+import os
+
+from .cache import atomic_write
+
+CACHE = os.path.expanduser("~/.cache/wal")
+TERMINALS = "/dev/pts/[0-9]*"
+
+# pywal's own template, filled with str.format like pywal does
+ROFI_DARK = """* {{
+    active-background: {color2};
+    active-foreground: @foreground;
+    normal-background: @background;
+    normal-foreground: @foreground;
+    urgent-background: {color1};
+    urgent-foreground: @foreground;
+
+    alternate-active-background: @background;
+    alternate-active-foreground: @foreground;
+    alternate-normal-background: @background;
+    alternate-normal-foreground: @foreground;
+    alternate-urgent-background: @background;
+    alternate-urgent-foreground: @foreground;
+
+    selected-active-background: {color1};
+    selected-active-foreground: @foreground;
+    selected-normal-background: {color2};
+    selected-normal-foreground: @foreground;
+    selected-urgent-background: {color3};
+    selected-urgent-foreground: @foreground;
+
+    background-color: @background;
+    background: {background};
+    foreground: {foreground};
+    border-color: @background;
+    spacing: 2;
+}}
+
+#window {{
+    background-color: @background;
+    border: 0;
+    padding: 2.5ch;
+}}
+
+#mainbox {{
+    border: 0;
+    padding: 0;
+}}
+
+#message {{
+    border: 2px 0px 0px;
+    border-color: @border-color;
+    padding: 1px;
+}}
+
+#textbox {{
+    text-color: @foreground;
+}}
+
+#inputbar {{
+    children:   [ prompt,textbox-prompt-colon,entry,case-indicator ];
+}}
+
+#textbox-prompt-colon {{
+    expand: false;
+    str: ":";
+    margin: 0px 0.3em 0em 0em;
+    text-color: @normal-foreground;
+}}
+
+#listview {{
+    fixed-height: 0;
+    border: 2px 0px 0px;
+    border-color: @border-color;
+    spacing: 2px;
+    scrollbar: true;
+    padding: 2px 0px 0px;
+}}
+
+#element {{
+    border: 0;
+    padding: 1px;
+}}
+
+#element-text, element-icon {{
+    background-color: inherit;
+    text-color:       inherit;
+}}
+
+#element.normal.normal {{
+    background-color: @normal-background;
+    text-color: @normal-foreground;
+}}
+
+#element.normal.urgent {{
+    background-color: @urgent-background;
+    text-color: @urgent-foreground;
+}}
+
+#element.normal.active {{
+    background-color: @active-background;
+    text-color: @active-foreground;
+}}
+
+#element.selected.normal {{
+    background-color: @selected-normal-background;
+    text-color: @selected-normal-foreground;
+}}
+
+#element.selected.urgent {{
+    background-color: @selected-urgent-background;
+    text-color: @selected-urgent-foreground;
+}}
+
+#element.selected.active {{
+    background-color: @selected-active-background;
+    text-color: @selected-active-foreground;
+}}
+
+#element.alternate.normal {{
+    background-color: @alternate-normal-background;
+    text-color: @alternate-normal-foreground;
+}}
+
+#element.alternate.urgent {{
+    background-color: @alternate-urgent-background;
+    text-color: @alternate-urgent-foreground;
+}}
+
+#element.alternate.active {{
+    background-color: @alternate-active-background;
+    text-color: @alternate-active-foreground;
+}}
+
+#scrollbar {{
+    width: 4px;
+    border: 0;
+    handle-width: 8px;
+    padding: 0;
+}}
+
+#sidebar {{
+    border: 2px 0px 0px;
+    border-color: @border-color;
+}}
+
+#button {{
+    text-color: @normal-foreground;
+}}
+
+#button.selected {{
+    background-color: @selected-normal-background;
+    text-color: @selected-normal-foreground;
+}}
+
+#inputbar {{
+    spacing: 0;
+    text-color: @normal-foreground;
+    padding: 1px;
+}}
+
+#case-indicator {{
+    spacing: 0;
+    text-color: @normal-foreground;
+}}
+
+#entry {{
+    spacing: 0;
+    text-color: @normal-foreground;
+}}
+
+#prompt {{
+    spacing: 0;
+    text-color: @normal-foreground;
+}}
+"""
+
+TEMPLATES = {
+    "colors-rofi-dark.rasi": ROFI_DARK,
+}
+
+
+def sequences(wal):
+    """The escape sequences that recolour a terminal (pywal's, minus the macOS ones)."""
+    special = wal["special"]
+    alpha = wal.get("alpha", "100")
+    background = special["background"] if alpha == "100" else f"[{alpha}]{special['background']}"
+    out = [f"\033]4;{i};{wal['colors'][f'color{i}']}\033\\" for i in range(16)]
+    out += [
+        f"\033]10;{special['foreground']}\033\\",
+        f"\033]11;{background}\033\\",
+        f"\033]12;{special['cursor']}\033\\",
+        f"\033]13;{special['foreground']}\033\\",
+        f"\033]17;{special['foreground']}\033\\",
+        f"\033]19;{special['background']}\033\\",
+        f"\033]4;232;{special['background']}\033\\",
+        f"\033]4;256;{special['foreground']}\033\\",
+        f"\033]4;257;{special['background']}\033\\",
+        f"\033]708;{background}\033\\",
+    ]
+    return "".join(out)
+
+
+def send_sequences(text):
+    for dev in glob.glob(TERMINALS):
+        try:
+            # Non-blocking: a stuck terminal mustn't hold up the sync
+            fd = os.open(dev, os.O_WRONLY | os.O_NOCTTY | os.O_NONBLOCK)
+        except OSError:
+            continue
+        try:
+            os.write(fd, text.encode())
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def write(wal, wall_path, cache=CACHE):
+    """Make ~/.cache/wal match a palette (a parsed colors.json)."""
+    wal = {**wal, "wallpaper": wall_path}
+    flat = {"wallpaper": wall_path, "alpha": wal.get("alpha", "100"), **wal["special"], **wal["colors"]}
+    atomic_write(os.path.join(cache, "colors.json"), json.dumps(wal, indent=4))
+    atomic_write(os.path.join(cache, "wal"), wall_path)
+    for name, template in TEMPLATES.items():
+        atomic_write(os.path.join(cache, name), template.format(**flat))
+    text = sequences(wal)
+    atomic_write(os.path.join(cache, "sequences"), text)
+    send_sequences(text)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Long-lived workspace HUD.
+
+Qtile used to spawn a fresh ws_hud process on every group switch, so
+cycling through workspaces stacked up overlapping HUDs. This process stays
+up instead and listens on a Unix datagram socket: the config's setgroup
+hook sends it the group name (one non-blocking sendto, see
+~/.config/qtile/hud.py). Names arriving in a burst are debounced, so only
+the latest one is drawn once the switching settles (or after `max_wait`,
+so holding a key still shows progress).
+
+  ws_hud_server.py [--socket PATH] [--debounce S] [--show NAME]
+  ws_hud_server.py --headless     # print renders instead of drawing (tests)
+"""
+
+import argparse
+import json
+import os
+import selectors
+import socket
+import sys
+import time
+
+SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or "/tmp", "ws_hud.sock")
+THEME_FILE = os.path.expanduser("~/.config/qtile_theme.json")
+FALLBACK_COLORS = {"bg": "#1e1e2e", "fg": "#cdd6f4", "blue": "#89b4fa"}
+
+
+class HudState:
+    """Latest requested name and when it may be drawn (trailing-edge debounce)."""
+
+    def __init__(self, debounce=0.08, max_wait=0.3):
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.pending = None
+        self.due = None
+        self.first = None
+        self.received = 0
+        self.rendered = 0
+
+    def receive(self, text, now):
+        if self.pending is None:
+            self.first = now
+        self.pending = text
+        self.due = min(now + self.debounce, self.first + self.max_wait)
+        self.received += 1
+
+    def timeout(self, now):
+        """Seconds until the pending name is due, or None if nothing is pending."""
+        if self.pending is None:
+            return None
+        return max(0.0, self.due - now)
+
+    def take(self, now):
+        if self.pending is None or now < self.due:
+            return None
+        text, self.pending = self.pending, None
+        self.rendered += 1
+        return text
+
+
+def bind(path):
+    # An empty datagram is ignored by a live server and refused by a stale
+    # socket file, which is then left over from a crash and safe to replace
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        probe.sendto(b"", path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+    else:
+        raise OSError("another ws_hud_server is listening")
+    finally:
+        probe.close()
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC)
+    sock.bind(path)
+    sock.setblocking(False)
+    return sock
+
+
+def drain(sock, state):
+    now = time.monotonic()
+    while True:
+        try:
+            data = sock.recv(256)
+        except BlockingIOError:
+            return
+        text = data.decode(errors="replace").strip()
+        if text:
+            state.receive(text, now)
+
+
+# ─── Headless (tests / fake server) ──────────────────────────────────────────
+
+
+def run_headless(sock, state):
+    sel = selectors.DefaultSelector()
+    sel.register(sock, selectors.EVENT_READ)
+    while True:
+        if sel.select(state.timeout(time.monotonic())):
+            drain(sock, state)
+        text = state.take(time.monotonic())
+        if text is not None:
+            print(f"render {text} ({state.rendered}/{state.received})", flush=True)
+
+
+# ─── Tk overlay ───────────────────────────────────────────────────────────────
+
+
+def run_tk(sock, state, duration):
+    import tkinter as tk
+
+    root = tk.Tk(className="WSHud")
+    root.withdraw()
+    root.overrideredirect(True)
+    root.attributes("-topmost", True)
+    label = tk.Label(root, font=("JetBrains Mono", 28), padx=40, pady=16, highlightthickness=2)
+    label.pack()
+    ui = {"mtime": None, "hide": None, "timer": None}
+
+    def load_theme():
+        try:
+            mtime = os.stat(THEME_FILE).st_mtime_ns
+        except OSError:
+            mtime = 0
+        if mtime == ui["mtime"]:
+            return
+        ui["mtime"] = mtime
+        colors = dict(FALLBACK_COLORS)
+        try:
+            with open(THEME_FILE) as f:
+                colors.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        for scheme in (colors, FALLBACK_COLORS):
+            try:
+                label.configure(
+                    bg=scheme["bg"], fg=scheme["fg"],
+                    highlightbackground=scheme["blue"], highlightcolor=scheme["blue"],
+                )
+                return
+            except tk.TclError:
+                continue
+
+    def hide():
+        ui["hide"] = None
+        root.withdraw()
+
+    def show(text):
+        load_theme()
+        label.configure(text=text)
+        root.update_idletasks()
+        width, height = root.winfo_reqwidth(), root.winfo_reqheight()
+        x = (root.winfo_screenwidth() - width) // 2
+        y = (root.winfo_screenheight() - height) // 2
+        root.geometry(f"+{x}+{y}")
+        root.deiconify()
+        root.lift()
+        if ui["hide"] is not None:
+            root.after_cancel(ui["hide"])
+        ui["hide"] = root.after(int(duration * 1000), hide)
+
+    def fire():
+        ui["timer"] = None
+        text = state.take(time.monotonic())
+        if text is not None:
+            show(text)
+        schedule()
+
+    def schedule():
+        if ui["timer"] is not None:
+            root.after_cancel(ui["timer"])
+            ui["timer"] = None
+        timeout = state.timeout(time.monotonic())
+        if timeout is not None:
+            ui["timer"] = root.after(max(1, int(timeout * 1000)), fire)
+
+    def readable(*_):
+        drain(sock, state)
+        schedule()
+
+    root.tk.createfilehandler(sock, tk.READABLE, readable)
+    schedule()
+    root.mainloop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workspace HUD server")
+    parser.add_argument("--socket", default=SOCKET)
+    parser.add_argument("--debounce", type=float, default=0.08)
+    parser.add_argument("--max-wait", type=float, default=0.3)
+    parser.add_argument("--duration", type=float, default=0.8, help="Seconds the HUD stays up")
+    parser.add_argument("--show", help="Name to show as soon as the server is up")
+    parser.add_argument("--headless", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        sock = bind(args.socket)
+    except OSError as e:
+        print(f"ws_hud_server: can't bind {args.socket}: {e}", file=sys.stderr)
+        sys.exit(1)
+    state = HudState(args.debounce, args.max_wait)
+    if args.show:
+        state.receive(args.show, time.monotonic())
+
+    try:
+        if args.headless:
+            run_headless(sock, state)
+        else:
+            run_tk(sock, state, args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        try:
+            os.unlink(args.socket)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
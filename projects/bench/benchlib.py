@@ -0,0 +1,109 @@
+"""Helpers shared by the harnesses and benches in this directory.
+
+check() prints one PASS/FAIL line and records failures in FAILED, which
+each script turns into its exit status. SpawnCounter counts forks,
+start_bus() starts a private session bus, and FakeNotifications stands in
+for dunst on it (the last two need dbus-daemon and dbus_fast).
+"""
+
+import os
+import subprocess
+import time
+
+try:
+    from dbus_fast import DBusError
+    from dbus_fast.service import ServiceInterface, method
+
+    has_dbus_fast = True
+except ImportError:
+    has_dbus_fast = False
+
+FAILED = []
+
+
+def check(name, ok, detail=""):
+    print(f"{'PASS' if ok else 'FAIL'} {name}{f'  ({detail})' if detail else ''}")
+    if not ok:
+        FAILED.append(name)
+
+
+class SpawnCounter:
+    """Counts every subprocess.Popen (asyncio subprocesses included)."""
+
+    def __init__(self):
+        self.count = 0
+        self.procs = []
+        self.started = []
+        self._orig = subprocess.Popen._execute_child
+        counter = self
+
+        def execute_child(popen, *args, **kwargs):
+            counter.count += 1
+            counter.procs.append(popen)
+            counter.started.append(popen)
+            return counter._orig(popen, *args, **kwargs)
+
+        subprocess.Popen._execute_child = execute_child
+
+    def kill_all(self):
+        """Stop long-lived children (HUD server, streams) left at the end."""
+        for proc in self.started:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+    def settle(self, timeout=10):
+        """Wait for short-lived children so their grandchildren are logged."""
+        deadline = time.monotonic() + timeout
+        for proc in self.procs:
+            try:
+                proc.wait(max(0.01, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        self.procs.clear()
+
+
+def start_bus():
+    daemon = subprocess.Popen(
+        ["dbus-daemon", "--session", "--nofork", "--print-address=1"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    os.environ["DBUS_SESSION_BUS_ADDRESS"] = daemon.stdout.readline().strip()
+    return daemon
+
+
+if has_dbus_fast:
+
+    class FakeNotifications(ServiceInterface):
+        """Records each Notify as (sent id, returned id, summary, body, hints).
+
+        Set fail_next to a D-Bus error name to reject the next call with it.
+        """
+
+        def __init__(self):
+            super().__init__("org.freedesktop.Notifications")
+            self.received = []
+            self.received_at = []
+            self.fail_next = None
+            self._next_id = 1
+
+        @method()
+        def Notify(
+            self, app_name: "s", replaces_id: "u", icon: "s", summary: "s", body: "s",
+            actions: "as", hints: "a{sv}", timeout: "i",
+        ) -> "u":
+            if self.fail_next is not None:
+                name, self.fail_next = self.fail_next, None
+                raise DBusError(name, "rejected")
+            sent_id = replaces_id
+            if not replaces_id:
+                replaces_id = self._next_id
+                self._next_id += 1
+            self.received.append(
+                (sent_id, replaces_id, summary, body, {k: v.value for k, v in hints.items()})
+            )
+            self.received_at.append(time.perf_counter())
+            return replaces_id
@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""Benchmark the Qtile config's hot paths without a running Qtile.
+
+The config is imported against stub `libqtile` modules and a fake qtile
+object (groups, windows), with $HOME and $PATH pointed at a temp dir full
+of fake sysmon/pactl/rofi/notify-send/qtile/nvidia-smi/ws_hud scripts.
+Each fake can be given extra latency or made to fail.
+
+For every get_* poll plus group_changed, workspace_switcher, add_group and
+restore_groups it reports per-call latency (mean/p50/p95/max), allocation
+peak per call (tracemalloc), direct process spawns per call and the
+total fake executables run per call (including grandchildren, e.g. rofi
+launched by a bash script). It then times emulated reload_config cycles
+and counts bar widgets that would come back blank. "theme_change" sets
+the two ways a wallpaper change can reach the bar side by side: a full
+reload_config, or set_theme recolouring the live bar (theme.py).
+
+Usage:
+  config_bench.py [-n N] [--latency pactl=0.2] [--fail rofi]
+                  [--windows 300] [--groups 30] [--reloads 20]
+                  [--output results.json] [--baseline old.json]
+                  [--tolerance 0.25] [--floor-ms 0.05]
+
+With --baseline, any target whose mean latency exceeds
+baseline * (1 + tolerance) + floor, or that spawns more processes (or,
+for reloads, leaks more fds or blanks more widgets) than before, is listed
+under "regressions" and the exit status is 1.
+"""
+
+import argparse
+import asyncio
+import gc
+import importlib
+import inspect
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+CONFIG_DIR = HOME / ".config/qtile"
+
+from benchlib import SpawnCounter  # noqa: E402
+
+# ─── Stub libqtile ────────────────────────────────────────────────────────────
+
+
+class _Anything:
+    """Accepts any construction, attribute access, call or subscript."""
+
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Anything()
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+    def __getitem__(self, key):
+        return _Anything()
+
+    def __iter__(self):
+        return iter(())
+
+
+class _Subscribe:
+    def __getattr__(self, name):
+        return lambda func: func
+
+
+class _Widget:
+    defaults = []
+
+    def __init__(self, length=0, **config):
+        self.length = length
+        self._config = config
+        self.name = config.get("name", type(self).__name__.lower())
+        self.qtile = None
+        self.background = None
+        self.foreground = config.get("foreground")
+
+    def add_defaults(self, defaults):
+        for key, value, _ in defaults:
+            setattr(self, key, self._config.get(key, value))
+
+    def _configure(self, qtile, bar):
+        self.qtile = qtile
+        self.bar = bar
+
+    def timeout_add(self, seconds, method, method_args=()):
+        pass
+
+    def draw(self):
+        pass
+
+    def finalize(self):
+        pass
+
+
+class _TextBox(_Widget):
+    def __init__(self, text=" ", width=None, **config):
+        _Widget.__init__(self, 0, **config)
+        self.text = text
+
+    def update(self, text):
+        self.text = text
+
+
+class FakeWindow:
+    def __init__(self, wid, group):
+        self.wid = wid
+        self.group = group
+
+
+class FakeGroup:
+    def __init__(self, qtile, name):
+        self.qtile = qtile
+        self.name = name
+        self.windows = []
+        self.layouts = [_Anything(), _Anything()]
+        self.screen = None
+
+    def layout_all(self):
+        pass
+
+    def toscreen(self, *args, **kwargs):
+        self.qtile.current_group = self
+
+    def __repr__(self):
+        return f"<group {self.name}>"
+
+
+class FakeQtile:
+    def __init__(self):
+        self.groups = []
+        self.groups_map = {}
+        self.windows_map = {}
+        self.current_group = None
+        self.core = None
+
+    def add_group(self, name, *args, **kwargs):
+        if name in self.groups_map:
+            return False
+        group = FakeGroup(self, name)
+        self.groups.append(group)
+        self.groups_map[name] = group
+        if self.current_group is None:
+            self.current_group = group
+        return True
+
+    def del_group(self, name):
+        group = self.groups_map.pop(name)
+        self.groups.remove(group)
+
+    def populate(self, groups, windows):
+        for name in "123456789":
+            self.add_group(name)
+        for i in range(groups - 9):
+            self.add_group(f"ws{i}")
+        # Windows on dynamic groups Qtile "forgot" exercise restore_groups
+        for i in range(windows):
+            group = self.groups[i % len(self.groups)]
+            if i % 10 == 0:
+                group = FakeGroup(self, f"lost{i % 7}")
+            window = FakeWindow(1000 + i, group)
+            group.windows.append(window)
+            self.windows_map[window.wid] = window
+
+    def saved_index(self, session):
+        """What group_index.json would hold after a restart in `session`."""
+        groups = {}
+        for window in self.windows_map.values():
+            groups.setdefault(window.group.name, []).append(window.wid)
+        return {"session": session, "mru": [g.name for g in self.groups], "groups": groups}
+
+    # Event loop access the config uses
+    def call_soon(self, func, *args):
+        return asyncio.get_running_loop().call_soon(func, *args)
+
+    def call_soon_threadsafe(self, func, *args):
+        return asyncio.get_event_loop().call_soon_threadsafe(func, *args)
+
+    def call_later(self, delay, func, *args):
+        return asyncio.get_running_loop().call_later(delay, func, *args)
+
+
+def install_stubs(fake_qtile):
+    def module(name, **attrs):
+        mod = types.ModuleType(name)
+        mod.__dict__.update(attrs)
+        sys.modules[name] = mod
+        return mod
+
+    base = module("libqtile.widget.base", _Widget=_Widget, _TextBox=_TextBox)
+    widget = module("libqtile.widget", base=base)
+    widget.__getattr__ = lambda name: _Anything
+    layout = module("libqtile.layout")
+    layout.__getattr__ = lambda name: _Anything
+    layout.Floating = type("Floating", (_Anything,), {"default_float_rules": []})
+    bar = module("libqtile.bar", Bar=_Anything, CALCULATED=-1, STRETCH=-2)
+    hook = module("libqtile.hook", subscribe=_Subscribe())
+    module(
+        "libqtile",
+        bar=bar,
+        layout=layout,
+        widget=widget,
+        hook=hook,
+        qtile=fake_qtile,
+    )
+    module(
+        "libqtile.config",
+        Click=_Anything,
+        Drag=_Anything,
+        Key=_Anything,
+        KeyChord=_Anything,
+        Match=_Anything,
+        Screen=_Anything,
+        Group=type("Group", (_Anything,), {"name": property(lambda self: self.args[0])}),
+    )
+    module("libqtile.lazy", lazy=_Anything())
+    module("libqtile.command")
+    module("libqtile.command.base", expose_command=lambda *a, **k: (lambda f: f))
+    module("libqtile.log_utils", logger=__import__("logging").getLogger("libqtile"))
+
+
+# ─── Fake executables ─────────────────────────────────────────────────────────
+
+FAKE_OUTPUT = {
+    "sysmon": 'echo "CPU [██░░░]"',
+    "pactl": (
+        'if [ "$1" = subscribe ]; then exec sleep 3600; fi\n'
+        'echo "Volume: front-left: 32768 /  50% / -18.06 dB"'
+    ),
+    # Picks row 2 from a list (-format i) and invents a fresh name for prompts
+    "rofi": (
+        'case "$*" in *"-format i"*) echo "${BENCH_ROFI_CHOICE:-2}" ;;\n'
+        '  *"Switch to"*) echo "  3" ;;\n'
+        '  *) echo "bench$$" ;; esac'
+    ),
+    "notify-send": "",
+    "qtile": "",
+    "playerctl": 'echo "Track"',
+    "nvidia-smi": 'while :; do echo "12, 512, 4096, 45"; sleep 2; done',
+    "ws_hud": "",
+    # The real HUD server, headless, stands in for the GTK one
+    "ws_hud_server": (
+        f'exec {sys.executable} {HOME}/.local/src/ui_scripts/ws_hud_server.py --headless "$@"'
+    ),
+    "sys_popup": "",
+}
+
+
+def write_fakes(bin_dir, log_path, latency, failing):
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for name, body in FAKE_OUTPUT.items():
+        delay = latency.get(name, 0)
+        lines = ["#!/bin/sh", f'echo {name} >> "{log_path}"']
+        if delay:
+            lines.append(f"sleep {delay}")
+        if name in failing:
+            lines.append("exit 1")
+        lines.append(body)
+        path = bin_dir / name
+        path.write_text("\n".join(lines) + "\n")
+        path.chmod(0o755)
+
+
+# ─── Measurement ──────────────────────────────────────────────────────────────
+
+
+async def call(func, args):
+    result = func(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def p95(samples):
+    # quantiles() needs two samples; a single one is its own p95
+    return statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+
+
+async def drain(spawns, timeout=10):
+    """Let background work started by the calls (asyncio tasks, their
+    children, fire-and-forget scripts) run to the end."""
+    await asyncio.sleep(0.05)
+    pending = asyncio.all_tasks() - {asyncio.current_task()}
+    if pending:
+        await asyncio.wait(pending, timeout=timeout)
+    await asyncio.get_running_loop().run_in_executor(None, spawns.settle)
+
+
+async def measure(name, func, args, iterations, spawns, exec_log):
+    # Latency pass
+    spawns.settle()
+    before_spawns = spawns.count
+    before_execs = _exec_count(exec_log)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call(func, args)
+        samples.append((time.perf_counter() - start) * 1000)
+    await drain(spawns)
+    spawned = spawns.count - before_spawns
+    execs = _exec_count(exec_log) - before_execs
+
+    # Allocation pass (tracemalloc distorts timing, so it runs separately)
+    alloc_iterations = max(1, min(iterations, 50))
+    peaks = []
+    tracemalloc.start()
+    for _ in range(alloc_iterations):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await call(func, args)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    await drain(spawns)
+
+    samples.sort()
+    return {
+        "calls": iterations,
+        "mean_ms": round(sum(samples) / len(samples), 4),
+        "p50_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(p95(samples), 4),
+        "max_ms": round(samples[-1], 4),
+        "alloc_peak_bytes": int(sum(peaks) / len(peaks)),
+        "spawns_per_call": round(spawned / iterations, 3),
+        "execs_per_call": round(execs / iterations, 3),
+    }
+
+
+def _exec_count(log_path):
+    try:
+        with open(log_path) as f:
+            return sum(1 for _ in f)
+    except FileNotFoundError:
+        return 0
+
+
+def compare(results, baseline, tolerance, floor_ms):
+    regressions = []
+    for name, now in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        limit = before["mean_ms"] * (1 + tolerance) + floor_ms
+        if now["mean_ms"] > limit:
+            regressions.append(
+                f"{name}: mean {now['mean_ms']}ms > {limit:.4f}ms (baseline {before['mean_ms']}ms)"
+            )
+        for key in ("spawns_per_call", "blank_widgets", "fds_leaked"):
+            if now.get(key, 0) > before.get(key, 0):
+                regressions.append(f"{name}: {key} {now[key]} (baseline {before.get(key, 0)})")
+    return regressions
+
+
+def _pairs(values):
+    result = {}
+    for value in values:
+        name, _, seconds = value.partition("=")
+        result[name] = float(seconds)
+    return result
+
+
+def bar_widgets(config):
+    widgets = []
+    for screen in getattr(config, "screens", []):
+        top = screen.kwargs.get("top")
+        if top is not None and top.args:
+            widgets.extend(top.args[0])
+    return widgets
+
+
+def start_polls(config, fake_qtile):
+    """What Qtile does once the bar is up: configure, then timer_setup()."""
+    for widget in bar_widgets(config):
+        if hasattr(widget, "force_update"):
+            widget._configure(fake_qtile, None)
+            widget.timer_setup()
+
+
+async def stop_polls(config):
+    """Finalize the bar and wait out the polls it cancelled.
+
+    A cancelled run_command kills and reaps its child, but the asyncio
+    transport is only closed by callbacks queued after that, so the loop
+    gets a few more turns before anyone counts fds or closes it.
+    """
+    pending = set()
+    for widget in bar_widgets(config):
+        pending.update(getattr(widget, "_tasks", ()))
+        widget.finalize()
+    if pending:
+        await asyncio.wait(pending, timeout=10)
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def measure_reload(config, fake_qtile, count):
+    """Emulate reload_config: finalize the bar, reload every module in the
+    config dir (Qtile does this too), re-run config.py, start the new bar.
+
+    "blank_widgets" counts poll widgets that would be drawn empty (or with
+    their error text) before their first poll comes back, "fds_leaked" the
+    descriptors still open afterwards that weren't before.
+    """
+    samples = []
+    blank = 0
+    # Count with no poll children running, before and after
+    await stop_polls(config)
+    gc.collect()
+    fds = len(os.listdir("/proc/self/fd"))
+    start_polls(config, fake_qtile)
+    for _ in range(count):
+        for widget in bar_widgets(config):
+            widget.finalize()
+        start = time.perf_counter()
+        for module in list(sys.modules.values()):
+            path = getattr(module, "__file__", None)
+            if module is not config and isinstance(path, str) and Path(path).parent == CONFIG_DIR:
+                importlib.reload(module)
+        importlib.reload(config)
+        samples.append((time.perf_counter() - start) * 1000)
+        for widget in bar_widgets(config):
+            if hasattr(widget, "force_update") and widget.text in ("", widget.error_text):
+                blank += 1
+        start_polls(config, fake_qtile)
+        await asyncio.sleep(0.05)
+    await stop_polls(config)
+    gc.collect()
+    leaked = len(os.listdir("/proc/self/fd")) - fds
+    samples.sort()
+    return {
+        "calls": count,
+        "mean_ms": round(sum(samples) / len(samples), 4),
+        "p50_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(p95(samples), 4),
+        "max_ms": round(samples[-1], 4),
+        "blank_widgets": round(blank / count, 2),
+        "fds_leaked": leaked,
+    }
+
+
+def targets(config, fake_qtile, iterations):
+    spawning = max(1, iterations // 10)
+    found = []
+    for name in sorted(vars(config)):
+        if name.startswith("get_") and callable(getattr(config, name)):
+            found.append((name, getattr(config, name), (), iterations))
+    found += [
+        ("group_changed", config.group_changed, (), spawning),
+        ("workspace_switcher", config.workspace_switcher, (fake_qtile,), spawning),
+        ("add_group", config.add_group, (fake_qtile,), spawning),
+        ("restore_groups", config.restore_groups, (), iterations),
+    ]
+    theme = getattr(config, "theme", None)
+    if theme is not None:
+        # Alternate between two palettes so every call really changes colours
+        palettes = itertools.cycle([{k: "#102030" for k in theme.colors}, dict(theme.colors)])
+        found.append(
+            ("set_theme", lambda: theme.apply(next(palettes), fake_qtile), (), iterations)
+        )
+    return found
+
+
+async def run(args):
+    tmp = Path(tempfile.mkdtemp(prefix="config-bench-"))
+    exec_log = tmp / "execs.log"
+    bin_dir = tmp / ".local/bin"
+    write_fakes(bin_dir, exec_log, _pairs(args.latency), set(args.fail))
+    # config.py imports the shared ui_scripts (notifications.py) from $HOME
+    (tmp / ".local/src").symlink_to(HOME / ".local/src")
+
+    os.environ["HOME"] = str(tmp)
+    os.environ["XDG_RUNTIME_DIR"] = str(tmp / "run")
+    (tmp / "run").mkdir()
+    os.environ["PATH"] = f"{bin_dir}:{os.environ['PATH']}"
+
+    fake_qtile = FakeQtile()
+    fake_qtile.populate(args.groups, args.windows)
+    install_stubs(fake_qtile)
+    sys.path.insert(0, str(CONFIG_DIR))
+    from group_index import session_id  # noqa: E402
+
+    index_file = tmp / ".cache/qtile/group_index.json"
+    index_file.parent.mkdir(parents=True)
+    index_file.write_text(json.dumps(fake_qtile.saved_index(session_id())))
+    # Reloads should hit cached bytecode like a normal install does
+    sys.dont_write_bytecode = False
+    sys.pycache_prefix = str(tmp / "pycache")
+
+    start = time.perf_counter()
+    import config  # noqa: E402
+
+    import_ms = (time.perf_counter() - start) * 1000
+
+    spawns = SpawnCounter()
+    found = targets(config, fake_qtile, args.iterations)
+
+    # Warm up once so long-lived children (pactl subscribe, nvidia-smi loop)
+    # are already running and don't count against a single call
+    for _, func, func_args, _ in found:
+        await call(func, func_args)
+    await asyncio.sleep(0.2)
+    spawns.procs = [p for p in spawns.procs if p.poll() is not None]
+    await asyncio.get_running_loop().run_in_executor(None, spawns.settle)
+
+    results = {}
+    for name, func, func_args, iterations in found:
+        results[name] = await measure(name, func, func_args, iterations, spawns, exec_log)
+    if args.reloads:
+        start_polls(config, fake_qtile)
+        await asyncio.sleep(0.05)
+        results["reload_config"] = await measure_reload(config, fake_qtile, args.reloads)
+        config = sys.modules["config"]
+
+    # Everything asyncio started has to be gone before asyncio.run() closes
+    # the loop, or the transports' __del__ complain about a closed loop
+    await stop_polls(config)
+    if hasattr(config, "stop_streams"):
+        config.stop_streams()
+    spawns.kill_all()
+    await drain(spawns)
+    shutil.rmtree(tmp, ignore_errors=True)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "latency": _pairs(args.latency),
+        "failing": sorted(args.fail),
+        "groups": args.groups,
+        "windows": args.windows,
+        "config_import_ms": round(import_ms, 2),
+        "results": results,
+    }
+    if "reload_config" in results and "set_theme" in results:
+        reload_ms = results["reload_config"]["mean_ms"]
+        recolor_ms = results["set_theme"]["mean_ms"]
+        report["theme_change"] = {
+            "reload_config_ms": reload_ms,
+            "set_theme_ms": recolor_ms,
+            "speedup": round(reload_ms / recolor_ms, 1),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    parser.add_argument("--latency", action="append", default=[], metavar="TOOL=SECONDS")
+    parser.add_argument("--fail", action="append", default=[], metavar="TOOL")
+    parser.add_argument("--reloads", type=int, default=20, help="0 to skip reload timing")
+    parser.add_argument("--groups", type=int, default=30)
+    parser.add_argument("--windows", type=int, default=300)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--floor-ms", type=float, default=0.05)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(
+            report["results"], baseline, args.tolerance, args.floor_ms
+        )
+        status = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    print(text)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Check .config/qtile/gamemode.py with the real scheduler and a fake wallpaper.
+
+Starts a fake `xwinwrap` whose child burns CPU (standing in for mpv
+decoding a video wallpaper) plus an unrelated busy process, then switches
+GameMode on and off the way the Control widget does: paused widgets stop
+at once rather than at the next mode check, the rest slow down, only the
+wallpaper's process tree is stopped and resumed, the state file follows,
+and the reported CPU saving matches what the player was burning.
+Prints one PASS/FAIL line per check; exits non-zero on any failure.
+"""
+
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(HOME / ".config/qtile"))
+
+from benchlib import FAILED, check  # noqa: E402
+from gamemode import GameMode, _stat  # noqa: E402
+from scheduler import PollScheduler  # noqa: E402
+
+BUSY = [sys.executable, "-c", "while True: pass"]
+
+
+def state(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().rsplit(")", 1)[1].split()[0]
+
+
+def children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def notify(self, summary, body="", tag=None, timeout=-1, value=None, urgency=None):
+        self.sent.append((tag, summary, body))
+
+
+async def count_calls(seconds, counters):
+    before = dict(counters)
+    await asyncio.sleep(seconds)
+    return {name: counters[name] - before[name] for name in counters}
+
+
+async def run(tmp):
+    # The script's comm is its file name, as with the real xwinwrap binary
+    xwinwrap = tmp / "xwinwrap"
+    xwinwrap.write_text(f"#!/bin/sh\n{' '.join(BUSY[:2])} '{BUSY[2]}' &\nwait\n")
+    xwinwrap.chmod(0o755)
+    player = subprocess.Popen([str(xwinwrap)])
+    bystander = subprocess.Popen(BUSY)
+    await asyncio.sleep(0.5)
+    decoder = children(player.pid)
+    # What the decoder actually gets on this machine, in CPU s per s
+    cpu = _stat(decoder[0])[2] if decoder else 0
+    await asyncio.sleep(1.0)
+    rate = ((_stat(decoder[0])[2] if decoder else 0) - cpu) / os.sysconf("SC_CLK_TCK")
+
+    counters = {"paused": 0, "slowed": 0}
+    scheduler = PollScheduler(tick=0.05, check_interval=30)
+    notifier = FakeNotifier()
+    state_file = tmp / "qtile_gamemode"
+    game_mode = GameMode(scheduler, notifier, state_file=str(state_file))
+    scheduler.set_mode("gamemode", lambda: game_mode.active, 5)
+
+    def counter(name):
+        return lambda: counters.__setitem__(name, counters[name] + 1)
+
+    scheduler.register(counter("paused"), 0.05, ("gamemode",))
+    scheduler.register(counter("slowed"), 0.05)
+    normal = await count_calls(1.0, counters)
+
+    game_mode.set(True)
+    gaming = await count_calls(1.0, counters)
+    check(
+        "widgets: paused at once",
+        gaming["paused"] == 0,
+        f"{normal['paused']} -> {gaming['paused']} calls/s",
+    )
+    check(
+        "widgets: others slowed",
+        0 < gaming["slowed"] <= normal["slowed"] / 4 + 1,
+        f"{normal['slowed']} -> {gaming['slowed']} calls/s",
+    )
+    stopped = [player.pid, *decoder]
+    check("player: stopped", all(state(pid) == "T" for pid in stopped), stopped)
+    check("bystander: left running", state(bystander.pid) != "T")
+    check("state file written", state_file.exists())
+    check(
+        "notified: on",
+        notifier.sent[-1][:2] == ("gamemode", "Game Mode")
+        and "2 wallpaper processes stopped" in notifier.sent[-1][2],
+        notifier.sent[-1][2],
+    )
+    cpu = _stat(decoder[0])[2] if decoder else None
+
+    await asyncio.sleep(1.0)
+    check("decoder: burns nothing while stopped", decoder and _stat(decoder[0])[2] == cpu)
+    report = game_mode.report()["session"]
+    check("report: polls skipped", report["polls_skipped"] >= 30, report["polls_skipped"])
+    expected = rate * report["seconds"]
+    check(
+        "report: wallpaper saving matches its usage",
+        0.5 * expected <= report["wallpaper_cpu_s"] <= 1.5 * expected,
+        f"{report['wallpaper_cpu_s']:.2f} s reported, {expected:.2f} s measured",
+    )
+
+    report = game_mode.set(False)
+    after = await count_calls(0.5, counters)
+    check("player: resumed", all(state(pid) != "T" for pid in stopped))
+    check("widgets: resumed", after["paused"] > 0)
+    check("state file removed", not state_file.exists())
+    check("notified: off with saving", "saved" in notifier.sent[-1][2], notifier.sent[-1][2])
+    check(
+        "report: total kept",
+        report["reclaimed_total_s"] >= report["session"]["wallpaper_cpu_s"],
+    )
+    check("set twice: no-op", game_mode.set(False)["active"] is False and len(notifier.sent) == 2)
+
+    scheduler.stop()
+    for proc in (bystander, player):
+        proc.kill()
+    for pid in decoder:
+        try:
+            os.kill(pid, 9)
+        except ProcessLookupError:
+            pass
+
+
+def main():
+    tmp = Path(tempfile.mkdtemp(prefix="gamemode-harness-"))
+    try:
+        asyncio.run(run(tmp))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{len(FAILED)} failed" if FAILED else "all checks passed")
+    sys.exit(1 if FAILED else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Check the GPU backends in .config/qtile/gpu.py without a GPU.
+
+Builds a fake nvidia-smi, a fake amdgpu sysfs tree and a fake /proc with
+i915 fdinfo in a temp dir, then verifies parsing and sampling cadence for
+each backend. Prints one PASS/FAIL line per check; exits non-zero on any
+failure.
+"""
+
+import asyncio
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(HOME / ".config/qtile"))
+
+from benchlib import FAILED, check  # noqa: E402
+from gpu import DrmFdinfoBackend, GpuSample, GpuSource, NvidiaSmiBackend, SysfsBackend  # noqa: E402
+
+FAKE_NVIDIA_SMI = """\
+#!{python}
+import sys, time
+loop_ms = next(int(a.split("=")[1]) for a in sys.argv if a.startswith("--loop-ms="))
+i = 0
+while True:
+    temp = "[N/A]" if i % 2 else str(40 + i)
+    print(f"{{i % 101}}, {{1000 + i}}, 4096, {{temp}}", flush=True)
+    i += 1
+    time.sleep(loop_ms / 1000)
+"""
+
+
+def nvidia(tmp):
+    binary = tmp / "nvidia-smi"
+    binary.write_text(FAKE_NVIDIA_SMI.format(python=sys.executable))
+    binary.chmod(0o755)
+
+    backend = NvidiaSmiBackend.find(str(binary), interval=0.1)
+    check("nvidia: find", backend is not None)
+    check("nvidia: parse N/A", backend.parse(b"7, 10, 20, [N/A]") == GpuSample(7, 10, 20, None))
+
+    async def run():
+        backend.start()
+        await asyncio.sleep(1.05)
+        sample = backend.read()
+        lines = backend.lines
+        backend.stop()
+        return sample, lines
+
+    sample, lines = asyncio.run(run())
+    check("nvidia: streamed sample", sample is not None and sample.mem_total == 4096, str(sample))
+    # One child for the whole run, one line per --loop-ms
+    check("nvidia: cadence", 8 <= lines <= 12, f"{lines} lines in ~1s at 100ms")
+
+
+def amd(tmp):
+    device = tmp / "sys/class/drm/card1/device"
+    (device / "hwmon/hwmon3").mkdir(parents=True)
+    (device / "gpu_busy_percent").write_text("37\n")
+    (device / "mem_info_vram_used").write_text(str(512 * 1024 * 1024))
+    (device / "mem_info_vram_total").write_text(str(8192 * 1024 * 1024))
+    (device / "hwmon/hwmon3/temp1_input").write_text("55000\n")
+
+    source = GpuSource(SysfsBackend.find(str(tmp / "sys")), max_age=0)
+    check("sysfs: find", source.backend is not None)
+    check("sysfs: read", source.sample() == GpuSample(37, 512, 8192, 55), str(source.sample()))
+    (device / "gpu_busy_percent").write_text("100\n")
+    check("sysfs: re-read via pread", source.sample().util == 100)
+    check("sysfs: text", source.text() == "GPU [█████]", source.text())
+    source.stop()
+
+
+def fdinfo(tmp):
+    sys_root = tmp / "sys2"
+    card = sys_root / "class/drm/card0/device"
+    card.mkdir(parents=True)
+    (tmp / "drivers/i915").mkdir(parents=True)
+    (card / "driver").symlink_to(tmp / "drivers/i915")
+
+    proc = tmp / "proc"
+    for pid, fd in (("100", "7"), ("200", "4")):
+        (proc / pid / "fd").mkdir(parents=True)
+        (proc / pid / "fdinfo").mkdir()
+        (proc / pid / "fd" / fd).symlink_to("/dev/dri/renderD128")
+        (proc / pid / "fd" / "0").symlink_to("/dev/null")
+        (proc / pid / "fdinfo" / "0").write_text("pos: 0\n")
+
+    def write(pid, fd, client, render_ns):
+        (proc / pid / "fdinfo" / fd).write_text(textwrap.dedent(f"""\
+            pos:\t0
+            drm-driver:\ti915
+            drm-client-id:\t{client}
+            drm-engine-render:\t{render_ns} ns
+            drm-engine-video:\t0 ns
+            drm-engine-capacity-video:\t2
+            """))
+
+    now = [0]
+    backend = DrmFdinfoBackend.find(str(sys_root), str(proc), clock=lambda: now[0])
+    check("fdinfo: find", backend is not None)
+    check("fdinfo: polled off the event loop", not GpuSource(backend).inline)
+
+    write("100", "7", 1, 0)
+    write("200", "4", 2, 0)
+    check("fdinfo: first read has no baseline", backend.read() is None)
+
+    # 1 s of wall time; clients were busy 300 ms + 200 ms on render
+    now[0] += 1_000_000_000
+    write("100", "7", 1, 300_000_000)
+    write("200", "4", 2, 200_000_000)
+    sample = backend.read()
+    check("fdinfo: busiest engine share", sample is not None and sample.util == 50, str(sample))
+
+    # A vanished client must not produce a negative/garbage delta
+    (proc / "200/fdinfo/4").unlink()
+    now[0] += 1_000_000_000
+    write("100", "7", 1, 400_000_000)
+    sample = backend.read()
+    check("fdinfo: client exit", sample.util == 10, str(sample))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        nvidia(tmp)
+        amd(tmp)
+        fdinfo(tmp)
+    print(f"{len(FAILED)} failed" if FAILED else "all checks passed")
+    sys.exit(1 if FAILED else 0)
+
+
+if __name__ == "__main__":
+    main()
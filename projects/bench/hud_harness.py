@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Check the workspace HUD client/server without a display.
+
+Runs ui_scripts/ws_hud_server.py --headless (it prints each render instead
+of drawing) on a temp socket and drives it with the config's HudClient:
+auto-start on first use, debouncing of a burst, max_wait during a long
+burst, send cost, and that a second server refuses to steal the socket.
+Prints one PASS/FAIL line per check; exits non-zero on any failure.
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+SERVER = HOME / ".local/src/ui_scripts/ws_hud_server.py"
+sys.path.insert(0, str(HOME / ".config/qtile"))
+
+from benchlib import FAILED, check  # noqa: E402
+from hud import HudClient  # noqa: E402
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def renders(log):
+    try:
+        return [line.split()[1] for line in log.read_text().splitlines() if line.startswith("render")]
+    except FileNotFoundError:
+        return []
+
+
+def main():
+    tmp = Path(tempfile.mkdtemp(prefix="hud-harness-"))
+    sock = tmp / "ws_hud.sock"
+    log = tmp / "renders.log"
+    launcher = tmp / "ws_hud_server"
+    launcher.write_text(
+        f'#!/bin/sh\nexec {sys.executable} {SERVER} --headless --debounce 0.05 --max-wait 0.2 "$@" > {log}\n'
+    )
+    launcher.chmod(0o755)
+
+    client = HudClient([str(launcher)], path=str(sock), respawn_delay=1.0)
+
+    # First show starts the server with that name
+    check("client: no server -> not sent", client.show("1") is False)
+    check("server: started", wait_for(sock.exists))
+    check("server: initial --show rendered", wait_for(lambda: renders(log) == ["1"]), renders(log))
+
+    # A burst faster than the debounce renders only the last name
+    start = time.perf_counter()
+    for name in "23456789":
+        client.show(name)
+    cost_us = (time.perf_counter() - start) / 8 * 1e6
+    check("client: sends without blocking", cost_us < 500, f"{cost_us:.1f} µs/send")
+    check("burst: only latest rendered", wait_for(lambda: renders(log)[-1:] == ["9"]))
+    time.sleep(0.15)
+    check("burst: one render", renders(log) == ["1", "9"], renders(log))
+
+    # Holding a key for longer than max_wait still shows progress
+    for i in range(40):
+        client.show(f"x{i}")
+        time.sleep(0.02)
+    time.sleep(0.2)
+    held = renders(log)[2:]
+    check("long burst: progress every max_wait", 2 <= len(held) <= 6, held)
+    check("long burst: ends on latest", held[-1:] == ["x39"], held[-1:])
+
+    # A second server must not unlink the live one's socket
+    second = subprocess.run(
+        [sys.executable, str(SERVER), "--headless", "--socket", str(sock)],
+        capture_output=True,
+        timeout=10,
+    )
+    check("second server refuses", second.returncode != 0 and sock.exists())
+    check("client still connected", client.show("1") is True)
+
+    client.close()
+    subprocess.run(["pkill", "-f", f"{SERVER} --headless --debounce 0.05"])
+    shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{len(FAILED)} failed" if FAILED else "all checks passed")
+    sys.exit(1 if FAILED else 0)
+
+
+if __name__ == "__main__":
+    main()
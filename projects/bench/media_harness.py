@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Check the volume/media controller in .config/qtile/media.py against fakes.
+
+Starts a private dbus-daemon carrying a fake notification server and a
+fake MPRIS player, and drives MediaController with an in-process fake
+audio server whose calls take `--latency` seconds. Verifies that key
+presses are coalesced into few audio round trips, that notifications are
+replaced in place with the stack tag, that track changes are picked up
+from PropertiesChanged instead of a fixed sleep, and that nothing forks.
+Prints one PASS/FAIL line per check; exits non-zero on any failure.
+
+Needs dbus-daemon and dbus_fast.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(HOME / ".config/qtile"))
+sys.path.insert(0, str(HOME / ".local/src/ui_scripts"))
+
+# media.py only needs run_command from polling, which imports libqtile's widget base
+for name in ("libqtile", "libqtile.widget", "libqtile.widget.base"):
+    sys.modules.setdefault(name, types.ModuleType(name))
+sys.modules["libqtile.widget"].base = sys.modules["libqtile.widget.base"]
+sys.modules["libqtile.widget.base"].__dict__.setdefault("_TextBox", object)
+
+from dbus_fast import Variant  # noqa: E402
+from dbus_fast.aio import MessageBus  # noqa: E402
+from dbus_fast.service import PropertyAccess, ServiceInterface, dbus_property, method  # noqa: E402
+
+from benchlib import FAILED, FakeNotifications, SpawnCounter, check, start_bus  # noqa: E402
+from media import MediaController, Mpris  # noqa: E402
+from notifications import Notifier, SessionBus  # noqa: E402
+
+
+class FakeAudio:
+    def __init__(self, latency):
+        self.latency = latency
+        self.percent = 50
+        self.muted = False
+        self.calls = 0
+
+    async def _round_trip(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+    async def volume(self):
+        await self._round_trip()
+        return self.percent, self.muted
+
+    async def change_volume(self, delta):
+        await self._round_trip()
+        self.percent += delta
+        return self.percent, self.muted
+
+    async def toggle_mute(self):
+        await self._round_trip()
+        self.muted = not self.muted
+        return self.percent, self.muted
+
+    def close(self):
+        pass
+
+
+class FakePlayer(ServiceInterface):
+    """Announces a new track 50 ms after Next/Previous, like real players."""
+
+    def __init__(self):
+        super().__init__("org.mpris.MediaPlayer2.Player")
+        self.tracks = ["One", "Two", "Three", "Four"]
+        self.index = 0
+        self.calls = []
+
+    def _skip(self, step):
+        def announce():
+            self.index = (self.index + step) % len(self.tracks)
+            self.emit_properties_changed({"Metadata": self._metadata()})
+
+        asyncio.get_running_loop().call_later(0.05, announce)
+
+    def _metadata(self):
+        return {"xesam:title": Variant("s", self.tracks[self.index])}
+
+    @method()
+    def PlayPause(self):
+        self.calls.append("PlayPause")
+
+    @method()
+    def Next(self):
+        self.calls.append("Next")
+        self._skip(1)
+
+    @method()
+    def Previous(self):
+        self.calls.append("Previous")
+        self._skip(-1)
+
+    @dbus_property(access=PropertyAccess.READ)
+    def Metadata(self) -> "a{sv}":
+        return self._metadata()
+
+
+async def run(latency):
+    server = await MessageBus().connect()
+    notifications = FakeNotifications()
+    player = FakePlayer()
+    server.export("/org/freedesktop/Notifications", notifications)
+    server.export("/org/mpris/MediaPlayer2", player)
+    await server.request_name("org.freedesktop.Notifications")
+    await server.request_name("org.mpris.MediaPlayer2.fake")
+
+    spawns = SpawnCounter()
+    bus = SessionBus()
+    audio = FakeAudio(latency)
+    refreshed = []
+    notifier = Notifier(bus)
+    controller = MediaController(audio, Mpris(bus), notifier, lambda: refreshed.append(1))
+
+    # Holding volume-up: 10 presses arrive while the first change is in flight
+    for _ in range(10):
+        controller.change_volume(5)
+        await asyncio.sleep(latency / 10)
+    await controller._volume_task
+    await notifier.flush()
+    check("volume: all presses applied", audio.percent == 100, audio.percent)
+    check("volume: presses coalesced", audio.calls <= 3, f"{audio.calls} audio calls for 10 presses")
+    vol = [n for n in notifications.received if n[2] == "Volume"]
+    check("volume: one notification per batch", len(vol) <= controller.batches, len(vol))
+    check("volume: replaced in place", len({n[1] for n in vol}) == 1, [n[1] for n in vol])
+    check(
+        "volume: stack tag + value hint",
+        vol and vol[-1][4].get("x-dunst-stack-tag") == "vol" and vol[-1][4].get("value") == 100,
+        vol[-1][4] if vol else None,
+    )
+    check("volume: widget refreshed", bool(refreshed))
+
+    # Mute pressed twice before anything happens is a no-op; three times toggles once
+    calls = audio.calls
+    controller.toggle_mute()
+    controller.toggle_mute()
+    await asyncio.sleep(0)
+    check("mute: even presses cancel out", audio.calls == calls and not audio.muted)
+    for _ in range(3):
+        controller.toggle_mute()
+    await controller._volume_task
+    await notifier.flush()
+    check("mute: odd presses toggle once", audio.muted and audio.calls == calls + 1)
+    check("mute: notification says Muted", notifications.received[-1][3] == "Muted")
+
+    # Next waits for the player's PropertiesChanged, not a fixed sleep
+    start = time.perf_counter()
+    controller.media_command("Next")
+    await controller._media_task
+    await notifier.flush()
+    elapsed = time.perf_counter() - start
+    media = [n for n in notifications.received if n[2] == "Next Track"]
+    check("media: new title notified", media and media[-1][3] == "Two", media[-1:])
+    check("media: woke on signal", elapsed < 0.3, f"{elapsed * 1000:.0f} ms")
+    check("media: stack tag", media and media[-1][4].get("x-dunst-stack-tag") == "media")
+
+    controller.media_command("Next")
+    controller.media_command("Previous")
+    controller.media_command("PlayPause")
+    await controller._media_task
+    check("media: commands kept in order", player.calls[-3:] == ["Next", "Previous", "PlayPause"])
+    check("nothing forked", spawns.count == 0, f"{spawns.count} processes")
+
+    # Without a session bus the notifier falls back to notify-send
+    tmp = Path(tempfile.mkdtemp(prefix="media-harness-"))
+    (tmp / "notify-send").write_text("#!/bin/sh\n")
+    (tmp / "notify-send").chmod(0o755)
+    os.environ["PATH"] = f"{tmp}:{os.environ['PATH']}"
+    os.environ["DBUS_SESSION_BUS_ADDRESS"] = f"unix:path={tmp}/missing"
+    before = spawns.count
+    fallback = Notifier(SessionBus())
+    fallback.notify("Volume", "50%", "vol")
+    await fallback.flush()
+    check("no bus: falls back to notify-send", spawns.count == before + 1)
+
+    bus.close()
+    server.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake audio round trip")
+    args = parser.parse_args()
+    daemon = start_bus()
+    try:
+        asyncio.run(run(args.latency))
+    finally:
+        daemon.terminate()
+        daemon.wait()
+    print(f"{len(FAILED)} failed" if FAILED else "all checks passed")
+    sys.exit(1 if FAILED else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Check ui_scripts/notifications.py against a fake notification server.
+
+Starts a private dbus-daemon and registers fake org.freedesktop.Notifications
+servers on it, then drives Notifier and the one-shot notify(): messages are
+held until a daemon appears and sent as soon as it does, bursts are
+coalesced per tag, ids are reused to replace in place, a daemon marked
+stale (dunst being restarted) is skipped for its successor, a failure
+that isn't the daemon going away or no daemon at all falls back to
+notify-send, and the script entry point neither forks nor hangs without
+a daemon.
+Prints one PASS/FAIL line per check; exits non-zero on any failure.
+
+Needs dbus-daemon and dbus_fast.
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+UI_SCRIPTS = HOME / ".local/src/ui_scripts"
+sys.path.insert(0, str(UI_SCRIPTS))
+
+from dbus_fast.aio import MessageBus  # noqa: E402
+
+import notifications  # noqa: E402
+from benchlib import FAILED, FakeNotifications, check, start_bus  # noqa: E402
+from notifications import NOTIFICATIONS, NOTIFICATIONS_PATH, Notifier, SessionBus  # noqa: E402
+
+async def start_server():
+    bus = await MessageBus().connect()
+    server = FakeNotifications()
+    bus.export(NOTIFICATIONS_PATH, server)
+    await bus.request_name(NOTIFICATIONS)
+    return bus, server
+
+
+async def stop_server(bus):
+    await bus.release_name(NOTIFICATIONS)
+    bus.disconnect()
+
+
+def run_script(code):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "PYTHONPATH": str(UI_SCRIPTS)},
+        capture_output=True,
+        text=True,
+        timeout=20,
+    )
+    return proc, time.perf_counter() - start
+
+
+async def run():
+    # recheck is left long so only the NameOwnerChanged signal can explain a
+    # quick delivery
+    bus = SessionBus()
+    notifier = Notifier(bus, "harness", recheck=5.0)
+
+    # No daemon yet: everything waits
+    notifier.notify("Volume", "10%", "vol")
+    notifier.notify("Workspace Exists", '"web" already exists.', "workspace")
+    notifier.notify("Untagged", "one")
+    await asyncio.sleep(0.2)
+    check("no daemon: nothing sent", notifier.sent == 0 and len(notifier._pending) == 3)
+
+    server_bus, server = await start_server()
+    appeared = time.perf_counter()
+    await notifier.flush()
+    delay = (server.received_at[0] - appeared) * 1000 if server.received_at else None
+    check(
+        "daemon up: queue delivered",
+        [r[2] for r in server.received] == ["Volume", "Workspace Exists", "Untagged"],
+    )
+    check(
+        "daemon up: sent on NameOwnerChanged",
+        delay is not None and delay < 100,
+        f"{delay:.1f} ms" if delay is not None else None,
+    )
+
+    # A burst for one tag is coalesced into a single Notify
+    server.received.clear()
+    for percent in range(0, 100, 2):
+        notifier.notify("Volume", f"{percent}%", "vol", value=percent)
+    await notifier.flush()
+    check("burst: one Notify for 50 calls", len(server.received) == 1, len(server.received))
+    check("burst: latest value shown", server.received and server.received[-1][3] == "98%")
+    check("burst: replaces earlier vol notification", server.received and server.received[-1][0] == 1)
+    check(
+        "hints: stack tag + value",
+        server.received and server.received[-1][4] == {"x-dunst-stack-tag": "vol", "value": 98},
+        server.received[-1][4] if server.received else None,
+    )
+    notifier.notify("Workspace Busy", "Close all windows before deleting.", "workspace")
+    notifier.notify("Untagged", "two")
+    await notifier.flush()
+    check("tags keep separate ids", server.received[-2][0] == 2, server.received[-2])
+    check("untagged: always new", server.received[-1][0] == 0)
+
+    # dunst being restarted: skip the old daemon, wait for the new one
+    notifier.stale_owner = server_bus.unique_name
+    notifier.notify("Theme Updated", "Matched colors", "theme")
+    await asyncio.sleep(0.1)
+    skipped = server.received[-1][2] != "Theme Updated"
+    await stop_server(server_bus)
+    new_bus, new_server = await start_server()
+    await notifier.flush()
+    check("restart: old daemon skipped", skipped)
+    check("restart: new daemon got it", [r[2] for r in new_server.received] == ["Theme Updated"])
+    notifier.notify("Volume", "50%", "vol")
+    await notifier.flush()
+    check("restart: ids from the old daemon dropped", new_server.received[-1][0] == 0)
+
+    # Anything but the daemon going away goes out through notify-send
+    forked = []
+    notifications._notify_send = lambda *message: forked.append(message[1])
+    new_server.fail_next = "org.freedesktop.Notifications.Error.Rejected"
+    notifier.notify("Rejected", "by the daemon", "vol")
+    notifier.notify("Bad urgency", "never reaches the bus", urgency="urgent")
+    await notifier.flush()
+    check(
+        "daemon error / bad message: falls back to notify-send",
+        sorted(forked) == ["Bad urgency", "Rejected"],
+        forked,
+    )
+    received = len(new_server.received)
+    new_server.fail_next = "org.freedesktop.DBus.Error.NoReply"
+    notifier.notify("Volume", "60%", "vol")
+    await notifier.flush()
+    check(
+        "daemon gone mid-call: retried over the bus",
+        len(new_server.received) == received + 1 and len(forked) == 2,
+        forked,
+    )
+    bus.close()
+
+    # Script entry point: one-shot, no fork
+    script = (
+        "import subprocess\n"
+        "forks = []\n"
+        "orig = subprocess.Popen._execute_child\n"
+        "subprocess.Popen._execute_child = lambda *a, **k: forks.append(1) or orig(*a, **k)\n"
+        "from notifications import notify\n"
+        "notify('Game Mode', 'ON - HUDs Disabled', tag='gamemode', app_name='gamemode')\n"
+        "print(len(forks))\n"
+    )
+    loop = asyncio.get_running_loop()
+    proc, _ = await loop.run_in_executor(None, run_script, script)
+    check("script: delivered", new_server.received[-1][2] == "Game Mode", proc.stderr.strip()[-200:])
+    check("script: no fork", proc.stdout.strip() == "0", proc.stdout.strip())
+
+    await stop_server(new_bus)
+
+    # No daemon at all: give up after `wait` instead of polling forever
+    bus = SessionBus()
+    notifier = Notifier(bus, "harness", wait=0.3)
+    notifier.notify("Nobody", "listening")
+    await notifier.flush()
+    check("no daemon: falls back to notify-send after wait", forked[-1:] == ["Nobody"], forked)
+    bus.close()
+
+    proc, elapsed = await loop.run_in_executor(
+        None, run_script, "from notifications import notify; notify('Nobody', wait=0.3)"
+    )
+    check(
+        "script: no daemon gives up after wait",
+        proc.returncode == 0 and elapsed < 5,
+        f"{elapsed:.2f} s",
+    )
+
+
+def main():
+    daemon = start_bus()
+    try:
+        asyncio.run(run())
+    finally:
+        daemon.terminate()
+        daemon.wait()
+    print(f"{len(FAILED)} failed" if FAILED else "all checks passed")
+    sys.exit(1 if FAILED else 0)
+
+
+if __name__ == "__main__":
+    main()
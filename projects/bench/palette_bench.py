@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Compare `wal --backend colorthief` with theming.extract on generated images.
+
+    python3 projects/bench/palette_bench.py -n 8 --wal ~/.local/bin/wal
+
+Writes a corpus of wallpapers (soft colour blobs plus noise, a few sizes,
+JPEG and PNG) to a scratch $HOME, then per image times wal (a subprocess
+that also writes ~/.cache/wal) and extract.palette() in this process. The
+distance column is the mean RGB distance between the two palettes over the
+qtile_theme roles, i.e. how different the bar would look. extract follows
+colorthief step for step, so the exit status is 1 if any image is further
+than --tolerance from wal. Needs numpy and Pillow; wal is skipped if it
+isn't installed.
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(HOME / ".local/src/ui_scripts"))
+
+from theming import extract, palette  # noqa: E402
+
+SIZES = [(1920, 1080), (2560, 1440), (3840, 2160)]
+
+
+def make_corpus(directory, count, seed):
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(count):
+        w, h = SIZES[i % len(SIZES)]
+        # Blobs are drawn at 1/8 scale and upsampled, which is plenty for gradients
+        y, x = np.mgrid[0 : h // 8, 0 : w // 8].astype(np.float32)
+        img = np.full((h // 8, w // 8, 3), rng.uniform(0, 255, 3), np.float32)
+        for _ in range(rng.integers(3, 9)):
+            cx, cy = rng.uniform(0, w // 8), rng.uniform(0, h // 8)
+            r = rng.uniform(10, 90)
+            m = np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (2 * r * r))[..., None]
+            img = img * (1 - m) + rng.uniform(0, 255, 3) * m
+        img = np.asarray(Image.fromarray(img.astype(np.uint8)).resize((w, h), Image.BILINEAR), np.float32)
+        img += rng.normal(0, 6, img.shape)
+        path = directory / f"wall{i}.{'png' if i % 4 == 3 else 'jpg'}"
+        Image.fromarray(np.clip(img, 0, 255).astype(np.uint8)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def run_wal(wal, path, env):
+    subprocess.run(
+        [wal, "-i", path, "-n", "-q", "-s", "-t", "-e", "--backend", "colorthief", "--saturate", "0.6"],
+        env=env, check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+    )
+    with open(Path(env["HOME"]) / ".cache/wal/colors.json") as f:
+        return json.load(f)["colors"]
+
+
+def distance(a, b):
+    ta, tb = palette.qtile_theme(a), palette.qtile_theme(b)
+    return statistics.fmean(
+        math.dist(palette.hex_to_rgb(ta[role]), palette.hex_to_rgb(tb[role])) for role in ta
+    )
+
+
+def summary(times):
+    times = [t * 1000 for t in times]
+    return statistics.fmean(times), statistics.quantiles(times, n=20)[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=8, help="Images in the corpus")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--wal", default=shutil.which("wal") or os.path.expanduser("~/.local/bin/wal"))
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Largest distance from wal allowed")
+    parser.add_argument("--output", help="Also write the results as JSON here")
+    args = parser.parse_args()
+
+    if not extract.has_numpy:
+        sys.exit("palette_bench: needs numpy and Pillow")
+    tmp = Path(tempfile.mkdtemp(prefix="palette-bench-"))
+    env = dict(os.environ, HOME=str(tmp))
+    walls = make_corpus(tmp, args.n, args.seed)
+    has_wal = os.access(args.wal, os.X_OK)
+
+    rows = []
+    for wall in walls:
+        start = time.perf_counter()
+        native = extract.palette(str(wall))
+        row = {"image": wall.name, "native_s": time.perf_counter() - start}
+        if has_wal:
+            # A fresh pywal cache each time, or wal would answer from it
+            shutil.rmtree(tmp / ".cache", ignore_errors=True)
+            start = time.perf_counter()
+            colors = run_wal(args.wal, wall, env)
+            row["wal_s"] = time.perf_counter() - start
+            row["distance"] = distance(native, colors)
+        rows.append(row)
+
+    print(f"{'image':<12} {'wal ms':>9} {'native ms':>10} {'distance':>9}")
+    for row in rows:
+        wal_ms = f"{row['wal_s'] * 1000:9.1f}" if has_wal else f"{'-':>9}"
+        dist = f"{row['distance']:9.1f}" if has_wal else f"{'-':>9}"
+        print(f"{row['image']:<12} {wal_ms} {row['native_s'] * 1000:10.1f} {dist}")
+    native_mean, native_p95 = summary(r["native_s"] for r in rows)
+    print(f"\nnative  mean {native_mean:.1f} ms  p95 {native_p95:.1f} ms")
+    if has_wal:
+        wal_mean, wal_p95 = summary(r["wal_s"] for r in rows)
+        print(f"wal     mean {wal_mean:.1f} ms  p95 {wal_p95:.1f} ms  ({wal_mean / native_mean:.0f}x)")
+        print(f"mean role distance {statistics.fmean(r['distance'] for r in rows):.1f} (RGB, 0-441)")
+    else:
+        print(f"wal not found at {args.wal}; native only")
+    if args.output:
+        Path(args.output).write_text(json.dumps(rows, indent=2))
+    shutil.rmtree(tmp, ignore_errors=True)
+    if has_wal:
+        worst = max(rows, key=lambda r: r["distance"])
+        if worst["distance"] > args.tolerance:
+            sys.exit(f"{worst['image']}: {worst['distance']:.1f} from wal (tolerance {args.tolerance})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Compare the bar's old `sysmon <metric>` subprocess path with Sampler.
+
+Usage: sampler_bench.py [iterations]
+
+For each metric it reports the mean/p95 wall time of one bar tick and the
+CPU time burned per tick, split into the calling process (what Qtile
+pays directly) and its children (the forked sysmon).
+"""
+
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(HOME / ".config/qtile"))
+
+from sampler import Sampler  # noqa: E402
+
+SYSMON = HOME / ".local/bin/sysmon"
+
+
+def _cpu_times():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime, kids.ru_utime + kids.ru_stime
+
+
+def measure(func, iterations):
+    samples = []
+    own0, kids0 = _cpu_times()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    own1, kids1 = _cpu_times()
+    return {
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "p95_ms": statistics.quantiles(samples, n=20)[-1] * 1000,
+        "cpu_self_ms": (own1 - own0) / iterations * 1000,
+        "cpu_children_ms": (kids1 - kids0) / iterations * 1000,
+    }
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    # max_age=0 so every call really hits the files instead of the cache
+    sampler = Sampler(max_age=0)
+    in_process = {
+        "cpu": sampler.cpu_text,
+        "ram": sampler.ram_text,
+        "bat": sampler.battery_text,
+    }
+
+    results = {}
+    for metric, func in in_process.items():
+        entry = {"sampler": measure(func, iterations)}
+        if os.access(SYSMON, os.X_OK):
+            entry["subprocess"] = measure(
+                lambda: subprocess.check_output([str(SYSMON), metric], timeout=2),
+                iterations,
+            )
+        results[metric] = entry
+
+    print(json.dumps({"iterations": iterations, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
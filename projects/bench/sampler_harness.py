@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Check the delta math in .config/qtile/sampler.py on canned /proc snapshots.
+
+Feeds CpuSampler before/after /proc/stat contents with known answers:
+no reading without a baseline, iowait counted as idle, counters that step
+backwards clamped, and old kernels without the steal column. Feeds
+NetSampler /proc/net/dev snapshots the same way: the first measurement
+seeds the rate and later ones are smoothed by the half life, virtual
+interfaces are skipped, and a 32-bit counter that wraps is told apart
+from one that was reset.
+Prints one PASS/FAIL line per check; exits non-zero on any failure.
+"""
+
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(HOME / ".config/qtile"))
+
+from benchlib import FAILED, check  # noqa: E402
+from sampler import CpuSampler, NetSampler  # noqa: E402
+
+
+def proc_stat(*rows):
+    """A /proc/stat with the given aggregate row and a cpu0 copy of it."""
+    fields = " ".join(str(x) for x in rows)
+    return f"cpu  {fields} 0 0\ncpu0 {fields} 0 0\nintr 12345 0 0\nctxt 678\n".encode()
+
+
+def cpu_checks():
+    # user nice system idle iowait irq softirq steal
+    before = proc_stat(1000, 0, 500, 8000, 200, 0, 0, 0)
+    cpu = CpuSampler()
+    check("cpu: first read has no baseline", cpu.update(before) == 0)
+
+    # 400 busy ticks out of 1000, 100 of the idle ones waiting on I/O
+    after = proc_stat(1300, 0, 600, 8500, 300, 0, 0, 0)
+    percent = cpu.update(after)
+    check("cpu: busy share, iowait counted as idle", percent == 40, percent)
+
+    # Steal is time the hypervisor took: not idle, so busy from here
+    cpu.update(proc_stat(0, 0, 0, 0, 0, 0, 0, 0))
+    percent = cpu.update(proc_stat(100, 0, 0, 700, 0, 0, 0, 200))
+    check("cpu: steal counts as busy", percent == 30, percent)
+
+    # iowait can step backwards on some kernels; that row contributes 0
+    cpu.update(proc_stat(1000, 0, 0, 1000, 500, 0, 0, 0))
+    percent = cpu.update(proc_stat(1500, 0, 0, 1500, 400, 0, 0, 0))
+    check("cpu: backwards counter clamped", percent == 50, percent)
+
+    cpu.update(proc_stat(1000, 0, 0, 1000, 0, 0, 0, 0))
+    percent = cpu.update(proc_stat(1000, 0, 0, 1000, 0, 0, 0, 0))
+    check("cpu: no ticks elapsed", percent == 0, percent)
+
+    old = CpuSampler()
+    old.update(b"cpu  100 0 0 900 0 0 0\nintr 1\n")
+    percent = old.update(b"cpu  300 0 100 1600 0 0 0\nintr 1\n")
+    check("cpu: seven-column kernel", percent == 30, percent)
+
+    try:
+        CpuSampler().update(b"intr 1\n")
+        check("cpu: garbage rejected", False)
+    except ValueError:
+        check("cpu: garbage rejected", True)
+
+
+def net_dev(**ifaces):
+    """A /proc/net/dev with the given {name: (rx, tx)} byte counters."""
+    lines = [
+        "Inter-|   Receive                            |  Transmit",
+        " face |bytes    packets errs drop fifo frame compressed multicast|bytes ...",
+    ]
+    for name, (rx, tx) in ifaces.items():
+        lines.append(f"{name:>6}: {rx} 10 0 0 0 0 0 0 {tx} 10 0 0 0 0 0 0")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def net_checks(sys_class_net):
+    for name in ("eth0", "wlan0"):
+        (sys_class_net / name / "device").mkdir(parents=True)
+    (sys_class_net / "docker0").mkdir()
+
+    net = NetSampler(half_life=2.0, sys_class_net=str(sys_class_net))
+    net.update(net_dev(lo=(0, 0), eth0=(1000, 500), wlan0=(0, 0), docker0=(0, 0)), 10.0)
+    check("net: first read has no baseline", net.rates("eth0") == (0.0, 0.0), net.rates("eth0"))
+    check("net: loopback and virtual skipped", net.names == ["eth0", "wlan0"], net.names)
+
+    net.update(net_dev(lo=(9, 9), eth0=(5000, 1500), wlan0=(100, 0), docker0=(9, 9)), 12.0)
+    check("net: first rate is the plain delta", net.rates("eth0") == (2000.0, 500.0), net.rates("eth0"))
+    check("net: busiest interface", net.busiest() == "eth0", net.busiest())
+
+    # One half life later the old rate keeps half its weight
+    net.update(net_dev(eth0=(13000, 1500), wlan0=(100, 0)), 14.0)
+    check("net: smoothed by half life", net.rates("eth0") == (3000.0, 250.0), net.rates("eth0"))
+    check("net: unknown interface", net.rates("tun0") == (0.0, 0.0))
+
+    wrap = 1 << 32
+    net = NetSampler(sys_class_net=str(sys_class_net))
+    net.update(net_dev(eth0=(wrap - 1000, 0)), 0.0)
+    net.update(net_dev(eth0=(1000, 0)), 1.0)
+    check("net: 32-bit wrap counted", net.rates("eth0")[0] == 2000.0, net.rates("eth0"))
+
+    # Down from 2.5 GB: a wrap would mean 1.8 GB in one second
+    net = NetSampler(sys_class_net=str(sys_class_net))
+    net.update(net_dev(eth0=(2_500_000_000, 0)), 0.0)
+    net.update(net_dev(eth0=(500, 0)), 1.0)
+    check("net: reset from high counter is not a wrap", net.rates("eth0")[0] == 0.0, net.rates("eth0"))
+
+    net = NetSampler(sys_class_net=str(sys_class_net))
+    net.update(net_dev(eth0=(wrap + 5000, 0)), 0.0)
+    net.update(net_dev(eth0=(100, 0)), 1.0)
+    check("net: 64-bit counter reset", net.rates("eth0")[0] == 0.0, net.rates("eth0"))
+
+
+def main():
+    cpu_checks()
+    tmp = Path(tempfile.mkdtemp(prefix="sampler-harness-"))
+    try:
+        net_checks(tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{len(FAILED)} failed" if FAILED else "all checks passed")
+    sys.exit(1 if FAILED else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Check when .config/qtile/scheduler.py wakes up after its entries change.
+
+Runs PollScheduler on a 50 ms tick: an entry registered while the next
+wakeup is far away fires on the next tick rather than at that wakeup,
+without the ticks since the last wakeup being replayed back to back;
+entries registered before the first wakeup all fire on tick 0; and
+periods shrunk by refresh_modes() take effect on the next tick.
+Prints one PASS/FAIL line per check; exits non-zero on any failure.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(HOME / ".config/qtile"))
+
+from benchlib import FAILED, check  # noqa: E402
+from scheduler import PollScheduler  # noqa: E402
+
+TICK = 0.05
+
+
+def recorder(calls):
+    return lambda: calls.append(time.perf_counter())
+
+
+async def run():
+    # One slow entry puts the next wakeup 20 ticks out
+    scheduler = PollScheduler(tick=TICK, check_interval=60)
+    slow, fast = [], []
+    scheduler.register(recorder(slow), 20 * TICK)
+    await asyncio.sleep(6.5 * TICK)
+    registered = time.perf_counter()
+    scheduler.register(recorder(fast), TICK)
+    await asyncio.sleep(4 * TICK)
+    scheduler.stop()
+    first = (fast[0] - registered) / TICK if fast else None
+    check(
+        "register: short entry fires on the next tick",
+        first is not None and first < 1.5,
+        f"after {first:.2f} ticks" if first is not None else "never",
+    )
+    gaps = [(b - a) / TICK for a, b in zip(fast, fast[1:])]
+    check(
+        "register: skipped ticks not replayed",
+        len(fast) <= 5 and all(gap > 0.5 for gap in gaps),
+        f"{len(fast)} calls, gaps {[round(gap, 2) for gap in gaps]}",
+    )
+    check("register: slow entry unaffected", len(slow) == 1, len(slow))
+
+    # Registered before the first wakeup: nothing is skipped
+    scheduler = PollScheduler(tick=TICK, check_interval=60)
+    a, b = [], []
+    scheduler.register(recorder(a), 20 * TICK)
+    scheduler.register(recorder(b), 20 * TICK)
+    await asyncio.sleep(TICK / 2)
+    scheduler.stop()
+    check("before first wakeup: both fire on tick 0", len(a) == 1 and len(b) == 1, (len(a), len(b)))
+
+    # A mode stretching every period 20x ends; refresh_modes() applies it now
+    scheduler = PollScheduler(tick=TICK, check_interval=60)
+    slowed = [True]
+    scheduler.set_mode("slow", lambda: slowed[0], 20)
+    calls = []
+    scheduler.register(recorder(calls), TICK)
+    await asyncio.sleep(3.5 * TICK)
+    before = len(calls)
+    slowed[0] = False
+    refreshed = time.perf_counter()
+    scheduler.refresh_modes()
+    await asyncio.sleep(2 * TICK)
+    scheduler.stop()
+    after = [t for t in calls if t > refreshed]
+    first = (after[0] - refreshed) / TICK if after else None
+    check("mode on: polls slowed", before == 1, before)
+    check(
+        "refresh_modes: shorter period applies on the next tick",
+        first is not None and first < 1.5,
+        f"after {first:.2f} ticks" if first is not None else "never",
+    )
+
+
+def main():
+    asyncio.run(run())
+    print(f"{len(FAILED)} failed" if FAILED else "all checks passed")
+    sys.exit(1 if FAILED else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Time theme_sync per wallpaper change: cold script vs warm daemon.
+
+Builds a throwaway $HOME with fake wal/feh/dunst/qtile/sudo/spicetify
+(each logs its argv; wal writes a palette derived from the image bytes
+after --wal-latency seconds) and a set of generated "wallpapers", then
+cycles through them:
+
+  cold      `theme_sync.py --local <wall>`, a fresh interpreter each time
+  warm      `theme_sync.py <wall>` against a running `theme_sync.py --daemon`
+  request   the daemon round trip alone, from this process
+
+Each phase is run twice, so the first round shows cache misses and the
+second cache hits. Reports mean/p95 ms and processes started per change,
+and for the request phase the services reloaded per change and the
+daemon's per-step times.
+
+With numpy and Pillow installed the wallpapers are real images and misses
+go through theming.extract instead of the fake wal; see palette_bench.py
+for how that compares with the real one. A "retouch" round then switches
+from each image to a byte-different copy of it: a new cache key but the
+same palette, so nothing should be rewritten or reloaded.
+
+    python3 projects/bench/theme_bench.py -n 6 --wal-latency 0.3
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parents[2]
+UI_SCRIPTS = HOME / ".local/src/ui_scripts"
+THEME_SYNC = UI_SCRIPTS / "theme_sync.py"
+sys.path.insert(0, str(UI_SCRIPTS))
+
+from theming import daemon, extract  # noqa: E402
+
+if extract.has_numpy:
+    import numpy as np
+    from PIL import Image
+
+FAKE_WAL = """#!{python} -I
+import hashlib, json, os, sys, time
+open({log!r}, "a").write("wal " + " ".join(sys.argv[1:]) + "\\n")
+time.sleep({latency})
+out = os.path.expanduser("~/.cache/wal/colors.json")
+os.makedirs(os.path.dirname(out), exist_ok=True)
+if "--theme" in sys.argv:
+    data = open(sys.argv[sys.argv.index("--theme") + 1]).read()
+else:
+    digest = hashlib.sha256(open(sys.argv[sys.argv.index("-i") + 1], "rb").read()).digest()
+    colors = {{f"color{{i}}": "#" + digest[i:i + 3].hex() for i in range(16)}}
+    data = json.dumps({{"colors": colors, "special": {{}}}})
+open(out, "w").write(data)
+"""
+
+# Answers set_theme the way Control.set_theme does through cmd-obj
+FAKE_QTILE = """#!/bin/sh
+echo "qtile $*" >> {log}
+case "$*" in *set_theme*) echo "{{'status': 'ok', 'changed': []}}" ;; esac
+"""
+
+# The theming package runs feh by absolute path; point it at the fake, and
+# keep the palettes' escape sequences out of the terminals on this machine
+SITECUSTOMIZE = """
+import theming.apply
+import theming.walfiles
+theming.apply.FEH = {feh!r}
+theming.walfiles.TERMINALS = {pts!r}
+"""
+
+
+def write_tool(path, body, log):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(body or f'#!/bin/sh\necho "{path.name} $*" >> {log}\n')
+    path.chmod(0o755)
+
+
+def setup(tmp, latency, count):
+    log = tmp / "execs.log"
+    bin_dir = tmp / "bin"
+    for name in ("feh", "dunst", "sudo", "notify-send"):
+        write_tool(bin_dir / name, None, log)
+    write_tool(bin_dir / "qtile", FAKE_QTILE.format(log=log), log)
+    write_tool(tmp / ".spicetify/spicetify", None, log)
+    wal = FAKE_WAL.format(python=sys.executable, latency=latency, log=str(log))
+    write_tool(tmp / ".local/bin/wal", wal, log)
+    site = tmp / "site"
+    site.mkdir()
+    (site / "sitecustomize.py").write_text(SITECUSTOMIZE.format(feh=str(bin_dir / "feh"), pts=str(tmp / "pts/[0-9]*")))
+
+    walls = []
+    for i in range(count):
+        wall = tmp / "walls" / f"wall{i}.jpg"
+        wall.parent.mkdir(exist_ok=True)
+        if extract.has_numpy:
+            # theming.extract decodes the image; the fake wal only hashes it
+            pixels = np.random.default_rng(i).integers(0, 256, (1080 // 8, 1920 // 8, 3), np.uint8)
+            Image.fromarray(pixels).resize((1920, 1080)).save(wall, quality=90)
+        else:
+            wall.write_bytes(os.urandom(64 * 1024))
+        walls.append(wall)
+
+    env = dict(os.environ)
+    env.pop("DBUS_SESSION_BUS_ADDRESS", None)
+    env.update(
+        HOME=str(tmp),
+        XDG_RUNTIME_DIR=str(tmp),
+        PATH=f"{bin_dir}:{env['PATH']}",
+        PYTHONPATH=f"{site}:{UI_SCRIPTS}",
+    )
+    return env, log, walls
+
+
+def count_lines(path):
+    try:
+        return len(path.read_text().splitlines())
+    except FileNotFoundError:
+        return 0
+
+
+def start_daemon(env, sock):
+    server = subprocess.Popen(
+        [sys.executable, THEME_SYNC, "--daemon", "--socket", sock],
+        env=env, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(sock))
+            return server
+        except OSError:
+            time.sleep(0.01)
+        finally:
+            probe.close()
+    raise RuntimeError("theme_sync --daemon didn't start")
+
+
+def settle(log, quiet=0.1):
+    """Wait for processes spawned in the background to finish logging."""
+    count = count_lines(log)
+    while True:
+        time.sleep(quiet)
+        now = count_lines(log)
+        if now == count:
+            return
+        count = now
+
+
+def phase(name, walls, log, run, rounds=("miss", "hit"), before=None):
+    """Time `run` on every wall, once per round; `before(wall)` runs untimed."""
+    results = []
+    for round_name in rounds:
+        times = []
+        replies = []
+        execs = 0
+        for wall in walls:
+            if before is not None:
+                before(wall)
+                settle(log)
+            logged = count_lines(log)
+            start = time.perf_counter()
+            reply = run(wall)
+            times.append((time.perf_counter() - start) * 1000)
+            execs += count_lines(log) - logged
+            if reply is not None:
+                replies.append(reply)
+        result = {
+            "phase": name,
+            "round": round_name,
+            "mean_ms": statistics.fmean(times),
+            "p95_ms": statistics.quantiles(times, n=20)[-1],
+            "execs_per_change": execs / len(walls),
+        }
+        if replies:
+            # The daemon's own account: what it reloaded and where the time went
+            result["reloads_per_change"] = statistics.fmean(len(r["reloaded"]) for r in replies)
+            steps = {step for r in replies for step in r["steps"]}
+            result["steps_ms"] = {
+                step: statistics.fmean(r["steps"].get(step, 0) * 1000 for r in replies)
+                for step in sorted(steps)
+            }
+        results.append(result)
+    return results
+
+
+def retouch(walls):
+    """{copy: original} for byte-different copies of `walls` with the same pixels.
+
+    JPEG decoders stop at the end-of-image marker, so trailing bytes give a
+    new cache key (a miss) but the same palette as the original: switching
+    from one to the other should reload nothing.
+    """
+    copies = {}
+    for wall in walls:
+        copy = wall.with_name(f"{wall.stem}-retouched{wall.suffix}")
+        copy.write_bytes(wall.read_bytes() + b"\0" * 16)
+        copies[copy] = wall
+    return copies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=6, help="Wallpapers per round")
+    parser.add_argument("--wal-latency", type=float, default=0.3, help="Seconds the fake wal takes")
+    parser.add_argument("--output", help="Also write the results as JSON here")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="theme-bench-"))
+    env, log, walls = setup(tmp, args.wal_latency, args.n)
+    sock = tmp / "theme_sync.sock"
+
+    def cold(wall):
+        subprocess.run(
+            [sys.executable, THEME_SYNC, "--local", wall],
+            env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def warm(wall):
+        subprocess.run(
+            [sys.executable, THEME_SYNC, "--socket", sock, wall],
+            env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+
+    def request(wall):
+        reply = daemon.request(wall, str(sock))
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        return reply
+
+    results = phase("cold", walls, log, cold)
+    for name, run in (("warm", warm), ("request", request)):
+        # Start over with empty caches so every phase sees misses first
+        shutil.rmtree(tmp / ".cache")
+        server = start_daemon(env, sock)
+        try:
+            results += phase(name, walls, log, run)
+            if name == "request" and extract.has_numpy:
+                copies = retouch(walls)
+                # Put each original up first, untimed, then switch to its copy
+                results += phase(
+                    name, list(copies), log, run, rounds=("retouch",),
+                    before=lambda copy: run(copies[copy]),
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'phase':<8} {'round':<7} {'mean ms':>9} {'p95 ms':>9} {'execs':>6} {'reloads':>8}")
+    for r in results:
+        reloads = f"{r['reloads_per_change']:>8.1f}" if "reloads_per_change" in r else f"{'-':>8}"
+        print(
+            f"{r['phase']:<8} {r['round']:<7} {r['mean_ms']:>9.1f} {r['p95_ms']:>9.1f}"
+            f" {r['execs_per_change']:>6.1f} {reloads}"
+        )
+    for r in results:
+        if "steps_ms" in r:
+            steps = "  ".join(f"{step} {ms:.1f}" for step, ms in r["steps_ms"].items())
+            print(f"\n{r['phase']} {r['round']} ms per step: {steps}", end="")
+    print()
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()